@@ -3,6 +3,13 @@ ASGI config for assetportal project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The read-heavy pages (home, request report, consolidated report, receipts) are
+async views, so this is the entry point to deploy, e.g.:
+
+    uvicorn assetportal.asgi:application --workers 4 --lifespan off
+
+Sync views still work; Django runs them in a thread per request.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +19,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'assetportal.settings')
+# Persistent connections are not reused under ASGI, see DATABASES in settings.py.
+os.environ.setdefault('ASSETPORTAL_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'baseapp.instrumentation.QueryMetricsMiddleware', # first, so its timings cover the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,7 +45,7 @@ ROOT_URLCONF = 'assetportal.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'baseapp.instrumentation.TimedDjangoTemplates', # DjangoTemplates + render timing
         'DIRS': [], # DIRS can be empty if templates are in app's 'templates' folder
         'APP_DIRS': True,
         'OPTIONS': {
@@ -64,10 +65,39 @@ WSGI_APPLICATION = 'assetportal.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# SQLite profiles, picked with the ASSETPORTAL_DB_PROFILE environment variable. Django runs
+# init_command on every new connection. 'stock' is Django's defaults (kept to compare
+# against in load tests); 'production' is tuned for concurrent readers and writers.
+SQLITE_PROFILES = {
+    'stock': {
+        'init_command': 'PRAGMA journal_mode=DELETE',
+    },
+    'production': {
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL', # readers and the writer no longer block each other
+            'PRAGMA synchronous=NORMAL', # in WAL mode only a power loss can drop the last commits
+            'PRAGMA busy_timeout=5000', # ms a connection waits for a lock before "database is locked"
+            'PRAGMA mmap_size=268435456', # read pages through a 256 MiB shared memory map
+            'PRAGMA cache_size=-20000', # ~20 MB page cache per connection
+            'PRAGMA temp_store=MEMORY',
+        ]),
+        # BEGIN IMMEDIATE takes the write lock when a transaction starts, waiting busy_timeout
+        # for it. A deferred transaction that reads first fails right away when it tries to write.
+        'transaction_mode': 'IMMEDIATE',
+    },
+}
+DB_PROFILE = os.environ.get('ASSETPORTAL_DB_PROFILE', 'production')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_PROFILES[DB_PROFILE],
+        # Reuse a connection across requests for this many seconds instead of reconnecting (and
+        # re-running init_command) per request. asgi.py defaults it to 0: under ASGI each request
+        # runs its sync code on a new thread, so a kept connection would never be reused.
+        'CONN_MAX_AGE': int(os.environ.get('ASSETPORTAL_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -125,4 +155,60 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/login/' # Redirect unauthenticated users here
 LOGIN_REDIRECT_URL = '/' # Redirect users to home after login
-LOGOUT_REDIRECT_URL = '/login/' # Redirect users to login after logout
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/login/' # Redirect users to login after logout
+
+# Reference data (locations, departments, categories, model names) is cached per process,
+# see baseapp/refdata.py. Point REFDATA_CACHE_ALIAS at a shared CACHES alias (Redis,
+# Memcached) to share it between workers and make invalidation immediate everywhere.
+REFDATA_CACHE_ALIAS = None
+REFDATA_LOCAL_TTL = 300 # seconds a process-local entry may live without a shared version check
+
+# Chunked, resumable attachment uploads (baseapp/uploads.py). Partial files live outside
+# MEDIA_ROOT so they are never served; finished ones are moved into the FileFields.
+CHUNKED_UPLOAD_TEMP_DIR = os.path.join(BASE_DIR, 'upload_tmp')
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024 # size the browser sends per request
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+CHUNKED_UPLOAD_MAX_SIZE = 200 * 1024 * 1024 # per attachment
+
+# PDF receipts (baseapp/receipts.py) are converted in a process pool and cached on disk
+# by object id + content version, so repeat downloads are plain file responses.
+RECEIPT_CACHE_DIR = os.path.join(BASE_DIR, 'receipt_cache')
+RECEIPT_RENDER_WORKERS = 2
+RECEIPT_RENDER_WAIT = 10 # seconds a download waits for a first render before answering 202
+
+# Per-view instrumentation (baseapp/instrumentation.py): query count, DB time, template time
+# and latency per URL name, served as JSON at /metrics/ to logged-in staff only (REMOTE_ADDR
+# is the proxy's address behind a reverse proxy, so it is not used to grant access).
+# Maximum queries per request (session and auth lookups included) by URL name. Exceeding one
+# logs a warning, and fails the request when QUERY_BUDGET_STRICT is on (baseapp.tests does).
+VIEW_QUERY_BUDGETS = {
+    'home': 4,
+    'request_submission': 23, # POST, cold cache, one chunked upload: upload lookup and delete, rollup, search and duplicate index writes
+    'request_receipt': 8,
+    'request_report': 5,
+    'request_report_export': 5,
+    'review_requests': 14, # POST: lock, update, budget rollup, search index and transition log writes, savepoints
+    'review_requests_batch': 14, # same writes for a whole claim batch, no per-request queries
+    'survey_form': 29, # POST: prefilled-from survey lookup, existing survey lookup and unique check, survey get_or_create, entry and aggregate upserts, revision log, savepoints
+    'survey_import': 31, # POST, cold cache: survey_form's writes plus creating missing models
+    'survey_receipt': 8,
+    'consolidated_report': 5,
+    'consolidated_report_export': 5,
+    'budget_dashboard': 5,
+    'budget_rollup_api': 5,
+}
+QUERY_BUDGET_STRICT = False
+
+# Write transactions that still find the database locked after busy_timeout are rerun
+# (baseapp/transactions.py), up to this many attempts with jittered exponential backoff.
+DB_WRITE_ATTEMPTS = 3
+DB_WRITE_RETRY_BACKOFF = 0.05 # seconds before the first retry
+
+# Approver queue (baseapp/review_queue.py). A pending request is due for a decision this many
+# hours after submission by item_type, or by the first matching cost tier if that is sooner.
+# The queue is served earliest-due first, so cost, item type and age all set the order; run
+# `manage.py reschedule_review_queue` after changing these.
+REVIEW_SLA_HOURS = {'capital': 72, 'revenue': 120}
+REVIEW_SLA_COST_TIERS = [(1000000, 24), (100000, 48)] # (estimated_cost at least, hours), highest first
+REVIEW_CLAIM_BATCH = 20 # requests an approver works on at a time
+REVIEW_CLAIM_MINUTES = 30 # lease on claimed requests; undecided ones then return to the queue
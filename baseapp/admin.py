@@ -1,6 +1,8 @@
 # baseapp/admin.py
 from django.contrib import admin
-from .models import SystemModel, SurveyInfo, SurveyEntry, Location, Department, Category, AssetRequest, SubCategory, UserProfile
+
+from . import search
+from .models import SystemModel, SurveyInfo, SurveyEntry, SurveyRevision, Location, Department, Category, AssetRequest, StatusTransition, SubCategory, UserProfile
 
 
 # Register your models here.
@@ -41,15 +43,32 @@ class SubCategoryAdmin(admin.ModelAdmin):
 @admin.register(SystemModel)
 class SystemModelAdmin(admin.ModelAdmin):
     # CORRECTED: Removed 'department' from list_display and list_filter
-    list_display = ('name', 'category', 'subcategory', 'location')
+    list_display = ('name', 'slug', 'category', 'subcategory', 'location')
     list_filter = ('category', 'location')
     search_fields = ('name',)
     # Add fields for easier creation/editing if needed
-    fields = ('name', 'category', 'subcategory', 'location')
+    fields = ('name', 'slug', 'category', 'subcategory', 'location')
+    readonly_fields = ('slug',)
+
+
+
 
 
 
+# Read-only timeline of status changes, newest first
+class StatusTransitionInline(admin.TabularInline):
+    model = StatusTransition
+    fields = ('changed_at', 'from_status', 'to_status', 'changed_by', 'remarks')
+    readonly_fields = fields
+    ordering = ('-changed_at',)
+    extra = 0
+    can_delete = False
 
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 # Admin for AssetRequest
@@ -57,16 +76,20 @@ class SystemModelAdmin(admin.ModelAdmin):
 class AssetRequestAdmin(admin.ModelAdmin):
     list_display = ('id', 'location', 'department', 'financial_year', 'asset_type', 'estimated_cost', 'item_type', 'date', 'status')
     list_filter = ('location', 'department', 'financial_year', 'asset_type', 'item_type', 'status', 'date')
-    search_fields = ('description', 'location__name', 'department__name', 'asset_type__name')
+    search_fields = ('description', 'remarks', 'location__name', 'department__name', 'asset_type__name')
     date_hierarchy = 'date'
     list_editable = ('status',) # Allows direct editing of status in list view
     raw_id_fields = ('location', 'department', 'asset_type') # For large numbers of related objects
+    readonly_fields = (
+        'duplicate_of', 'duplicate_score',  # Set by the duplicate detector at submission
+        'submitted_at', 'due_at', 'claimed_by', 'claimed_until',  # Maintained by the review queue
+    )
     fieldsets = (
         (None, {
             'fields': (('location', 'department'), 'financial_year', 'asset_type', 'description', ('estimated_cost', 'item_type'), 'date')
         }),
         ('Approval Information', {
-            'fields': ('status', 'remarks'),
+            'fields': ('status', 'remarks', ('duplicate_of', 'duplicate_score'), ('submitted_at', 'due_at'), ('claimed_by', 'claimed_until')),
             'classes': ('collapse',), # Makes this section collapsible
         }),
         ('Attachments', {
@@ -74,5 +97,36 @@ class AssetRequestAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
         }),
     )
+
+    inlines = (StatusTransitionInline,)
+
+    def save_model(self, request, obj, form, change):
+        # Picked up by the status transition log in baseapp/signals.py (also for list_editable saves).
+        obj._changed_by = request.user
+        super().save_model(request, obj, form, change)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Served from the full-text index instead of one LIKE '%...%' scan per search field.
+        return search.filter_requests(queryset, search_term), False
+
 admin.site.register(SurveyInfo)
 admin.site.register(SurveyEntry)
+admin.site.register(SurveyRevision)
+
+
+# Admin for StatusTransition (append-only: no add, change or delete)
+@admin.register(StatusTransition)
+class StatusTransitionAdmin(admin.ModelAdmin):
+    list_display = ('asset_request_id', 'from_status', 'to_status', 'changed_by', 'changed_at')
+    list_filter = ('to_status', 'changed_at')
+    date_hierarchy = 'changed_at'
+    raw_id_fields = ('asset_request', 'changed_by')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,134 @@
+# baseapp/aggregates.py
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import SurveyAggregate, SurveyEntry
+
+AGGREGATE_KEY_FIELDS = ('financial_year', 'location_id', 'department_id', 'system_model_id', 'manpower_type')
+AGGREGATE_BATCH_SIZE = 500
+
+
+def entry_key(entry, financial_year):
+    """Returns the SurveyAggregate key a SurveyEntry contributes to."""
+    return (financial_year, entry.location_id, entry.department_id, entry.system_model_id, entry.manpower_type)
+
+
+def new_deltas():
+    """Returns an empty {key: [headcount_delta, entry_count_delta]} accumulator."""
+    return defaultdict(lambda: [0, 0])
+
+
+def survey_deltas(survey_info_id, financial_year, sign=1, deltas=None):
+    """Adds every entry of one survey to `deltas` (one grouped query), multiplied by `sign`."""
+    deltas = new_deltas() if deltas is None else deltas
+    groups = (
+        SurveyEntry.objects.filter(survey_info_id=survey_info_id)
+        .order_by()
+        .values('location_id', 'department_id', 'system_model_id', 'manpower_type')
+        .annotate(headcount_total=Sum('headcount'), entries=Count('pk'))
+    )
+    for group in groups:
+        key = (financial_year, group['location_id'], group['department_id'], group['system_model_id'],
+               group['manpower_type'])
+        deltas[key][0] += sign * group['headcount_total']
+        deltas[key][1] += sign * group['entries']
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    Folds `deltas` into the SurveyAggregate table.
+
+    Existing rows are read (and locked where supported) with one query, then
+    written back with one bulk upsert and one delete for groups that no longer
+    have any entries.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if key[0] is not None and any(delta)}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        existing = {}
+        candidates = SurveyAggregate.objects.select_for_update().filter(
+            financial_year__in={key[0] for key in deltas},
+            location_id__in={key[1] for key in deltas},
+            department_id__in={key[2] for key in deltas},
+            system_model_id__in={key[3] for key in deltas},
+        )
+        for aggregate in candidates:
+            key = tuple(getattr(aggregate, field) for field in AGGREGATE_KEY_FIELDS)
+            if key in deltas:
+                existing[key] = aggregate
+
+        to_write, to_delete = [], []
+        for key, (headcount, entries) in deltas.items():
+            aggregate = existing.get(key)
+            if aggregate is None:
+                # Nothing to subtract from, e.g. the group was already removed by a cascading delete.
+                if entries > 0:
+                    to_write.append(SurveyAggregate(
+                        **dict(zip(AGGREGATE_KEY_FIELDS, key)), headcount=headcount, entry_count=entries
+                    ))
+                continue
+            if aggregate.entry_count + entries <= 0:
+                to_delete.append(aggregate.pk)
+            else:
+                to_write.append(SurveyAggregate(
+                    **dict(zip(AGGREGATE_KEY_FIELDS, key)),
+                    headcount=max(aggregate.headcount + headcount, 0), entry_count=aggregate.entry_count + entries,
+                ))
+
+        if to_write:
+            # One upsert on the group key writes new and changed groups alike, with far less
+            # ORM work inside the write transaction than a bulk_update's CASE expressions.
+            SurveyAggregate.objects.bulk_create(
+                to_write, batch_size=AGGREGATE_BATCH_SIZE, update_conflicts=True,
+                unique_fields=AGGREGATE_KEY_FIELDS, update_fields=['headcount', 'entry_count'],
+            )
+        if to_delete:
+            SurveyAggregate.objects.filter(pk__in=to_delete).delete()
+
+
+def add_entries(entries, financial_year):
+    """Adds freshly inserted entries (e.g. from bulk_create, which sends no signals) to the aggregates."""
+    deltas = new_deltas()
+    for entry in entries:
+        key = entry_key(entry, financial_year)
+        deltas[key][0] += entry.headcount
+        deltas[key][1] += 1
+    apply_deltas(deltas)
+
+
+def rebuild_aggregates(batch_size=AGGREGATE_BATCH_SIZE):
+    """Recomputes the whole SurveyAggregate table from SurveyEntry. Returns the number of groups."""
+    groups = (
+        SurveyEntry.objects.filter(survey_info__isnull=False)
+        .order_by()
+        .values('survey_info__financial_year', 'location_id', 'department_id', 'system_model_id', 'manpower_type')
+        .annotate(headcount_total=Sum('headcount'), entries=Count('pk'))
+    )
+    with transaction.atomic():
+        SurveyAggregate.objects.all().delete()
+        created = 0
+        batch = []
+        for group in groups.iterator(chunk_size=batch_size):
+            batch.append(SurveyAggregate(
+                financial_year=group['survey_info__financial_year'],
+                location_id=group['location_id'],
+                department_id=group['department_id'],
+                system_model_id=group['system_model_id'],
+                manpower_type=group['manpower_type'],
+                headcount=group['headcount_total'],
+                entry_count=group['entries'],
+            ))
+            if len(batch) >= batch_size:
+                SurveyAggregate.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            SurveyAggregate.objects.bulk_create(batch)
+            created += len(batch)
+    return created
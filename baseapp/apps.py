@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BaseappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'baseapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects the model signal receivers)
+        from . import instrumentation  # noqa: F401  (installs the query counter on new DB connections)
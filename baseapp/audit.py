@@ -0,0 +1,47 @@
+# baseapp/audit.py
+
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import StatusTransition
+
+
+def record_transitions(changes, changed_by=None, remarks=None, changed_at=None):
+    """
+    Appends one StatusTransition per (asset_request_id, from_status, to_status) in
+    `changes` with a single INSERT. Callers pass statuses they already read (the
+    review lock, the admin's pre_save lookup), so logging adds no extra SELECT.
+    """
+    changed_at = changed_at or timezone.now()
+    user_id = getattr(changed_by, 'pk', changed_by)
+    return StatusTransition.objects.bulk_create([
+        StatusTransition(
+            asset_request_id=request_id, from_status=from_status, to_status=to_status,
+            changed_by_id=user_id, changed_at=changed_at, remarks=remarks or None,
+        )
+        for request_id, from_status, to_status in changes
+        if from_status != to_status
+    ])
+
+
+def request_timeline(request_id):
+    """Transitions of one request, oldest first."""
+    return StatusTransition.objects.filter(asset_request_id=request_id).order_by('changed_at', 'pk')
+
+
+def approver_throughput(since=None, until=None):
+    """
+    {user id: {to_status: count}} of the transitions made between `since` and
+    `until`; None collects changes made without a signed-in user.
+    """
+    transitions = StatusTransition.objects.all()
+    if since is not None:
+        transitions = transitions.filter(changed_at__gte=since)
+    if until is not None:
+        transitions = transitions.filter(changed_at__lt=until)
+    throughput = {}
+    for user_id, to_status, count in (
+        transitions.values_list('changed_by_id', 'to_status').annotate(count=Count('pk')).order_by()
+    ):
+        throughput.setdefault(user_id, {})[to_status] = count
+    return throughput
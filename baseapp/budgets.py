@@ -0,0 +1,186 @@
+# baseapp/budgets.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from . import refdata
+from .models import STATUS_CHOICES, AssetRequest, BudgetRollup
+
+ROLLUP_KEY_FIELDS = ('financial_year', 'location_id', 'department_id', 'asset_type_id', 'item_type', 'status')
+ROLLUP_BATCH_SIZE = 500
+
+# Dashboard/API drill-down order: each level groups by its field within the filters chosen so far.
+DRILL_DOWN_LEVELS = ('financial_year', 'location', 'department', 'asset_type')
+# Query parameter -> BudgetRollup column, for filtering and grouping.
+ROLLUP_COLUMNS = {
+    'financial_year': 'financial_year',
+    'location': 'location_id',
+    'department': 'department_id',
+    'asset_type': 'asset_type_id',
+    'item_type': 'item_type',
+    'status': 'status',
+}
+
+
+def request_key(asset_request):
+    """Returns the BudgetRollup key an AssetRequest contributes to."""
+    return tuple(getattr(asset_request, field) for field in ROLLUP_KEY_FIELDS)
+
+
+def new_deltas():
+    """Returns an empty {key: [cost_delta, request_count_delta]} accumulator."""
+    return defaultdict(lambda: [Decimal(0), 0])
+
+
+def transition_deltas(rows, new_status):
+    """
+    Deltas that move requests to `new_status`; `rows` are (estimated_cost, *ROLLUP_KEY_FIELDS)
+    tuples read before the status change.
+    """
+    deltas = new_deltas()
+    for cost, *key in rows:
+        for delta_key, sign in ((tuple(key), -1), (tuple(key[:-1]) + (new_status,), 1)):
+            deltas[delta_key][0] += sign * cost
+            deltas[delta_key][1] += sign
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    Folds `deltas` into the BudgetRollup table.
+
+    Existing rows are read (and locked where supported) with one query, then
+    written back with one bulk update, one bulk insert and one delete for groups
+    that no longer have any requests.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    # No savepoint: callers write the requests in the same transaction, and a failed rollup
+    # update must roll those back too rather than be caught and skipped.
+    with transaction.atomic(savepoint=False):
+        existing = {}
+        candidates = BudgetRollup.objects.select_for_update().filter(
+            financial_year__in={key[0] for key in deltas},
+            location_id__in={key[1] for key in deltas},
+            department_id__in={key[2] for key in deltas},
+            asset_type_id__in={key[3] for key in deltas},
+        )
+        for rollup in candidates:
+            key = tuple(getattr(rollup, field) for field in ROLLUP_KEY_FIELDS)
+            if key in deltas:
+                existing[key] = rollup
+
+        to_create, to_update, to_delete = [], [], []
+        for key, (cost, requests) in deltas.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                # Nothing to subtract from, e.g. the group was already removed by a cascading delete.
+                if requests > 0:
+                    to_create.append(BudgetRollup(
+                        **dict(zip(ROLLUP_KEY_FIELDS, key)), total_cost=cost, request_count=requests
+                    ))
+                continue
+            rollup.total_cost += cost
+            rollup.request_count += requests
+            if rollup.request_count <= 0:
+                to_delete.append(rollup.pk)
+            else:
+                to_update.append(rollup)
+
+        if to_create:
+            BudgetRollup.objects.bulk_create(to_create, batch_size=ROLLUP_BATCH_SIZE)
+        if to_update:
+            BudgetRollup.objects.bulk_update(to_update, ['total_cost', 'request_count'], batch_size=ROLLUP_BATCH_SIZE)
+        if to_delete:
+            BudgetRollup.objects.filter(pk__in=to_delete).delete()
+
+
+def rebuild_rollup(batch_size=ROLLUP_BATCH_SIZE):
+    """Recomputes the whole BudgetRollup table from AssetRequest. Returns the number of groups."""
+    groups = (
+        AssetRequest.objects.order_by()
+        .values(*ROLLUP_KEY_FIELDS)
+        .annotate(cost=Sum('estimated_cost'), requests=Count('pk'))
+    )
+    with transaction.atomic():
+        BudgetRollup.objects.all().delete()
+        created = 0
+        batch = []
+        for group in groups.iterator(chunk_size=batch_size):
+            batch.append(BudgetRollup(
+                **{field: group[field] for field in ROLLUP_KEY_FIELDS},
+                total_cost=group['cost'], request_count=group['requests'],
+            ))
+            if len(batch) >= batch_size:
+                BudgetRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            BudgetRollup.objects.bulk_create(batch)
+            created += len(batch)
+    return created
+
+
+# --- Reading the rollup ---
+
+def label(level, value):
+    """Display name of a rollup key value (a location id, status code, ...)."""
+    lookups = {
+        'location': refdata.location_by_id,
+        'department': refdata.department_by_id,
+        'asset_type': refdata.category_by_id,
+    }
+    if level not in lookups:
+        return dict(STATUS_CHOICES + AssetRequest.ITEM_TYPE_CHOICES).get(value, value)
+    obj = lookups[level](value)
+    return obj.name if obj else f"#{value}"
+
+
+def next_level(filters):
+    """The first drill-down level not yet pinned by `filters`, or None at the bottom."""
+    for level in DRILL_DOWN_LEVELS:
+        if level not in filters:
+            return level
+    return None
+
+
+def summarize(filters, group_by):
+    """
+    Totals of the BudgetRollup rows matching `filters`, one row per `group_by` value.
+
+    Each row carries the total cost and request count with a breakdown by status
+    and by item type. Reads only the (small) rollup table, never AssetRequest.
+    Returns (rows, totals); rows are sorted by label.
+    """
+    rollups = BudgetRollup.objects.filter(**{ROLLUP_COLUMNS[field]: value for field, value in filters.items()})
+    group_field = ROLLUP_COLUMNS[group_by]
+    groups = (
+        rollups.order_by()
+        .values(group_field, 'item_type', 'status')
+        .annotate(cost=Sum('total_cost'), requests=Sum('request_count'))
+    )
+
+    def empty():
+        return {
+            'total_cost': Decimal(0), 'request_count': 0,
+            'by_status': {status: Decimal(0) for status, _ in STATUS_CHOICES},
+            'by_item_type': {item_type: Decimal(0) for item_type, _ in AssetRequest.ITEM_TYPE_CHOICES},
+        }
+
+    rows = {}
+    totals = empty()
+    for group in groups:
+        row = rows.get(group[group_field])
+        if row is None:
+            row = rows[group[group_field]] = dict(empty(), key=group[group_field], label=label(group_by, group[group_field]))
+        for summary in (row, totals):
+            summary['total_cost'] += group['cost']
+            summary['request_count'] += group['requests']
+            summary['by_status'][group['status']] += group['cost']
+            summary['by_item_type'][group['item_type']] += group['cost']
+    return sorted(rows.values(), key=lambda row: str(row['label'])), totals
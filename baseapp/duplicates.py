@@ -0,0 +1,208 @@
+# baseapp/duplicates.py
+
+import hashlib
+from array import array
+
+from .models import AssetRequest, AssetRequestBucket, AssetRequestFingerprint
+from .search import tokenize
+from .storage import blob_digest
+from .uploads import ATTACHMENT_FIELDS
+
+# MinHash over character shingles of the normalized description. NUM_PERM hashes
+# are split into 21 LSH bands of BAND_ROWS; two requests become candidates when any
+# band matches: ~99% of pairs at 0.6 similarity, few below (1 / 21) ** (1 / 3) = 0.36.
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BAND_ROWS = 3
+# Estimated Jaccard similarity from which a candidate is flagged.
+DUPLICATE_THRESHOLD = 0.6
+# Statuses a new request is compared against; decided-away requests are not "the original".
+OPEN_STATUSES = ('pending', 'approved')
+REBUILD_BATCH_SIZE = 1000
+
+_PRIME = (1 << 61) - 1
+
+
+def _permutations():
+    # Fixed seed: signatures stored in the database must stay comparable across processes.
+    coefficients = []
+    for index in range(NUM_PERM):
+        seed = hashlib.blake2b(f'perm-{index}'.encode(), digest_size=16).digest()
+        a = int.from_bytes(seed[:8], 'big') % (_PRIME - 1) + 1
+        b = int.from_bytes(seed[8:], 'big') % _PRIME
+        coefficients.append((a, b))
+    return coefficients
+
+
+_PERMUTATIONS = _permutations()
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+def _key(*parts):
+    """Signed 64-bit bucket key (fits a BigIntegerField) for the given parts."""
+    digest = hashlib.blake2b('\x1f'.join(str(part) for part in parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def shingles(text):
+    normalized = ' '.join(tokenize(text))
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[start:start + SHINGLE_SIZE] for start in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """NUM_PERM-value MinHash signature of `text`, or None when it has no words."""
+    hashes = [_hash64(shingle) for shingle in shingles(text)]
+    if not hashes:
+        return None
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(1 for left, right in zip(signature, other) if left == right) / NUM_PERM
+
+
+def _group(location_id, department_id, financial_year, asset_type_id):
+    # Only requests for the same location, department, year and category can be duplicates.
+    return (location_id, department_id, financial_year, asset_type_id)
+
+
+def _bucket_keys(group, signature, digests):
+    keys = set()
+    if signature is not None:
+        for band, start in enumerate(range(0, NUM_PERM - BAND_ROWS + 1, BAND_ROWS)):
+            keys.add(_key('band', *group, band, *signature[start:start + BAND_ROWS]))
+    for digest in digests:
+        keys.add(_key('file', *group, digest))
+    return keys
+
+
+def _digests(asset_request):
+    return {digest for digest in (blob_digest(getattr(asset_request, name).name) for name in ATTACHMENT_FIELDS) if digest}
+
+
+def _pack(signature):
+    return array('Q', signature).tobytes() if signature is not None else None
+
+
+def _unpack(data):
+    return array('Q', bytes(data)).tolist() if data else None
+
+
+class Fingerprint:
+    """What the index knows about one request: its group, MinHash signature and attachment digests."""
+
+    def __init__(self, asset_request):
+        self.group = _group(
+            asset_request.location_id, asset_request.department_id,
+            asset_request.financial_year, asset_request.asset_type_id,
+        )
+        self.signature = minhash(asset_request.description)
+        self.digests = _digests(asset_request)
+        self.keys = _bucket_keys(self.group, self.signature, self.digests)
+
+
+# --- Index maintenance (wired to AssetRequest post_save in baseapp/signals.py) ---
+
+def _store(pairs):
+    """Writes fingerprint rows and buckets for [(asset_request_id, Fingerprint)]."""
+    AssetRequestFingerprint.objects.bulk_create([
+        AssetRequestFingerprint(
+            asset_request_id=pk, minhash=_pack(fingerprint.signature),
+            attachment_digests=' '.join(sorted(fingerprint.digests)),
+        )
+        for pk, fingerprint in pairs
+    ], batch_size=REBUILD_BATCH_SIZE)
+    AssetRequestBucket.objects.bulk_create([
+        AssetRequestBucket(key=key, asset_request_id=pk) for pk, fingerprint in pairs for key in fingerprint.keys
+    ], batch_size=REBUILD_BATCH_SIZE)
+
+
+def index_request(asset_request, created=False):
+    """Replaces the fingerprint and buckets of one saved request."""
+    if not created:
+        AssetRequestBucket.objects.filter(asset_request_id=asset_request.pk).delete()
+        AssetRequestFingerprint.objects.filter(asset_request_id=asset_request.pk).delete()
+    _store([(asset_request.pk, Fingerprint(asset_request))])
+
+
+def rebuild():
+    """Empties and refills the whole index. Returns the number of requests indexed."""
+    AssetRequestBucket.objects.all().delete()
+    AssetRequestFingerprint.objects.all().delete()
+    fields = ['id', 'location_id', 'department_id', 'financial_year', 'asset_type_id', 'description', *ATTACHMENT_FIELDS]
+    indexed = 0
+    batch = []
+    for asset_request in AssetRequest.objects.only(*fields).order_by().iterator(chunk_size=REBUILD_BATCH_SIZE):
+        batch.append((asset_request.pk, Fingerprint(asset_request)))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            _store(batch)
+            indexed += len(batch)
+            batch = []
+    _store(batch)
+    return indexed + len(batch)
+
+
+# --- Detection ---
+
+class Match:
+    def __init__(self, asset_request_id, score, shared_attachment):
+        self.asset_request_id = asset_request_id
+        self.score = score
+        self.shared_attachment = shared_attachment
+
+    def __repr__(self):
+        return f"Match(#{self.asset_request_id}, score={self.score:.2f}, shared_attachment={self.shared_attachment})"
+
+
+def find_duplicates(asset_request, threshold=DUPLICATE_THRESHOLD):
+    """
+    Returns open requests in the same location/department/year/category that
+    look like duplicates of `asset_request`, best match first.
+
+    Candidates come from the LSH buckets (an indexed IN lookup, not a scan);
+    each is confirmed by comparing the stored signatures. A shared attachment
+    (same SHA-256) counts as a certain match.
+    """
+    fingerprint = Fingerprint(asset_request)
+    if not fingerprint.keys:
+        return []
+    candidate_ids = (
+        AssetRequestBucket.objects.filter(key__in=fingerprint.keys)
+        .exclude(asset_request_id=asset_request.pk).values('asset_request_id')
+    )
+    candidates = AssetRequestFingerprint.objects.filter(
+        asset_request_id__in=candidate_ids, asset_request__status__in=OPEN_STATUSES,
+    ).values_list('asset_request_id', 'minhash', 'attachment_digests')
+
+    matches = []
+    for pk, packed, digests in candidates:
+        shared_attachment = bool(fingerprint.digests.intersection(digests.split()))
+        signature = _unpack(packed)
+        score = similarity(fingerprint.signature, signature) if fingerprint.signature and signature else 0.0
+        if shared_attachment:
+            score = 1.0
+        if score >= threshold:
+            matches.append(Match(pk, score, shared_attachment))
+    matches.sort(key=lambda match: (-match.score, match.asset_request_id))
+    return matches
+
+
+def flag_duplicates(asset_request):
+    """Records the best match (if any) on a just-submitted request; returns it or None."""
+    matches = find_duplicates(asset_request)
+    if not matches:
+        return None
+    best = matches[0]
+    asset_request.duplicate_of_id = best.asset_request_id
+    asset_request.duplicate_score = best.score
+    # .update(): a save() would re-run the post_save indexing for no change in indexed data.
+    AssetRequest.objects.filter(pk=asset_request.pk).update(
+        duplicate_of_id=best.asset_request_id, duplicate_score=best.score,
+    )
+    return best
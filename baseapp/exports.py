@@ -0,0 +1,199 @@
+# baseapp/exports.py
+
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+# Rows written between yields; bounds both memory and response latency.
+EXPORT_CHUNK_ROWS = 500
+
+# Characters spreadsheet apps treat as the start of a formula (CSV injection).
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# XML 1.0 forbids most control characters, which can appear in pasted descriptions.
+ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yields CSV text for `header` + `rows`, a chunk of rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for index, row in enumerate(rows, 1):
+        writer.writerow([_csv_value(value) for value in row])
+        if index % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+# --- Streaming XLSX ---
+# A minimal SpreadsheetML package: one worksheet with inline strings, so nothing has to be
+# buffered for a shared-strings table and rows can be compressed and sent as they are produced.
+
+_XLSX_STATIC_PARTS = (
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+     'Target="xl/workbook.xml"/>'
+     '</Relationships>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+     'Target="worksheets/sheet1.xml"/>'
+     '</Relationships>'),
+)
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+class _ChunkBuffer:
+    """Write-only, unseekable sink; zipfile then streams entries with data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_cell(reference, value):
+    if value is None or value == '':
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    text = escape(ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def stream_xlsx(header, rows, sheet_name='Export', chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yields the bytes of a single-sheet .xlsx workbook for `header` + `rows` in constant memory."""
+    columns = [column_letter(index) for index in range(len(header))]
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS:
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', _XLSX_WORKBOOK.format(name=escape(sheet_name[:31], {'"': '&quot;'})))
+        yield buffer.pop()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(_XLSX_SHEET_HEAD.encode('utf-8'))
+            for row_number, row in enumerate([header], 1):
+                cells = ''.join(_xlsx_cell(f'{column}{row_number}', value) for column, value in zip(columns, row))
+                sheet.write(f'<row r="{row_number}">{cells}</row>'.encode('utf-8'))
+            for row_number, row in enumerate(rows, 2):
+                cells = ''.join(_xlsx_cell(f'{column}{row_number}', value) for column, value in zip(columns, row))
+                sheet.write(f'<row r="{row_number}">{cells}</row>'.encode('utf-8'))
+                if row_number % chunk_rows == 0:
+                    data = buffer.pop()
+                    if data:
+                        yield data
+            sheet.write(_XLSX_SHEET_TAIL.encode('utf-8'))
+    yield buffer.pop()
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+}
+
+
+async def iterate_in_thread(iterator):
+    """
+    Async version of a sync iterator that runs queries: each step runs in a worker
+    thread, so the event loop is not blocked and nothing is buffered up front.
+    """
+    step = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    try:
+        while (chunk := await step(iterator, done)) is not done:
+            yield chunk
+    finally:
+        # A client that disconnects early leaves a generator (and its cursor) open.
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+def streaming_content(request, iterator):
+    """
+    `iterator` in the form the server streams without buffering: as is under WSGI,
+    through iterate_in_thread() under ASGI (which would otherwise read a sync
+    iterator to the end before sending a byte).
+    """
+    if isinstance(request, ASGIRequest):
+        return iterate_in_thread(iter(iterator))
+    return iterator
+
+
+def export_response(export_format, filename, header, rows, request=None):
+    """Returns a StreamingHttpResponse that downloads `rows` as `filename`.<export_format>."""
+    content_type, writer = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(streaming_content(request, writer(header, rows)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -1,9 +1,55 @@
 from datetime import date
 from django import forms
+from django.forms.models import ModelChoiceIterator
+from . import refdata
+from .duplicates import flag_duplicates
+from .budgets import ROLLUP_COLUMNS
 from .models import (
-    AssetRequest, Category, Department, Location,
+    STATUS_CHOICES, AssetRequest, Category, ChunkedUpload, Department, Location,
     SubCategory, SurveyInfo,  SystemModel
 )
+from .survey_import import IMPORT_FORMATS
+from .uploads import ATTACHMENT_FIELDS, attach_uploads, discard_uploads
+
+
+# -------------------------------
+# CACHED REFERENCE-DATA CHOICE FIELD
+# -------------------------------
+class ReferenceChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.loader():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.loader()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.loader())
+
+
+class ReferenceChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField that renders and validates against baseapp.refdata instead of querying."""
+    iterator = ReferenceChoiceIterator
+
+    def __init__(self, loader, queryset, **kwargs):
+        self.loader = loader
+        super().__init__(queryset, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        for obj in self.loader():
+            if str(obj.pk) == str(value):
+                return obj
+        raise forms.ValidationError(
+            self.error_messages['invalid_choice'],
+            code='invalid_choice',
+            params={'value': value},
+        )
 
 # -------------------------------
 # LOGIN FORM
@@ -17,6 +63,16 @@ class LoginForm(forms.Form):
 # ASSET REQUEST FORM
 # -------------------------------
 class AssetRequestForm(forms.ModelForm):
+    location = ReferenceChoiceField(refdata.locations, Location.objects.all())
+    department = ReferenceChoiceField(refdata.departments, Department.objects.all())
+    asset_type = ReferenceChoiceField(refdata.categories, Category.objects.all())
+
+    # Tokens of finished chunked uploads; they take the place of the matching file inputs.
+    indent_file_token = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    annexure_x_token = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    annexure_y_token = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    gem_file_token = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = AssetRequest
         fields = [
@@ -28,12 +84,52 @@ class AssetRequestForm(forms.ModelForm):
             'date': forms.DateInput(attrs={'type': 'date'}),
         }
 
+    def __init__(self, *args, user=None, **kwargs):
+        self.user = user
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        tokens = {
+            field_name: cleaned_data.get(f'{field_name}_token')
+            for field_name in ATTACHMENT_FIELDS
+            if cleaned_data.get(f'{field_name}_token')
+        }
+        self.chunked_uploads = {}
+        if tokens:
+            uploads = {
+                upload.token: upload
+                for upload in ChunkedUpload.objects.filter(
+                    token__in=tokens.values(), user=self.user, completed_at__isnull=False
+                )
+            }
+            for field_name, token in tokens.items():
+                if token not in uploads:
+                    self.add_error(f'{field_name}_token', "This upload is missing or has not finished yet.")
+                else:
+                    self.chunked_uploads[field_name] = uploads[token]
+        return cleaned_data
+
+    def save(self, commit=True):
+        asset_request = super().save(commit=False)
+        attach_uploads(asset_request, self.chunked_uploads)
+        self.duplicate_match = None
+        if commit:
+            asset_request.save()
+            discard_uploads(self.chunked_uploads.values())
+            # After save(): attachments only have their content-addressed names once stored.
+            self.duplicate_match = flag_duplicates(asset_request)
+        return asset_request
+
 
 # -------------------------------
 # SURVEY INFO FORM (Corrected)
 # -------------------------------
 class SurveyInfoForm(forms.ModelForm):
     financial_year = forms.ChoiceField(choices=[], required=True)
+    location = ReferenceChoiceField(refdata.locations, Location.objects.all())
+    category = ReferenceChoiceField(refdata.categories, Category.objects.all(), required=False)
+    prefill = forms.BooleanField(required=False, label='Prefill from the last survey')
 
     class Meta:
         model = SurveyInfo
@@ -66,6 +162,38 @@ class SurveyInfoForm(forms.ModelForm):
         if not self.is_bound and 'financial_year' not in self.initial:
             self.initial['financial_year'] = f"{fin_year_start}-{fin_year_start+1}"
 
+    def clean(self):
+        cleaned_data = super().clean()
+        # Submitting an existing survey again saves a new revision of it
+        # (baseapp.surveys.save_survey_revision): validate against that survey, so the
+        # unique constraint only rejects a clash with some other row.
+        key = {field: cleaned_data.get(field) for field in ('financial_year', 'location', 'category', 'date')}
+        if self.instance.pk is None and all(value is not None for value in key.values()):
+            self.instance = SurveyInfo.objects.filter(**key).first() or self.instance
+        return cleaned_data
+
+
+# -------------------------------
+# SURVEY IMPORT FORM (Bulk headcounts from a CSV/XLSX matrix)
+# -------------------------------
+class SurveyImportForm(SurveyInfoForm):
+    category = ReferenceChoiceField(refdata.categories, Category.objects.all())
+    prefill = None
+    file = forms.FileField(
+        label='Headcount matrix',
+        help_text='CSV or XLSX: model names across the first row, one department (name or code) per row.',
+    )
+    create_models = forms.BooleanField(
+        required=False,
+        label='Create models missing from this location and category',
+    )
+
+    def clean_file(self):
+        uploaded = self.cleaned_data['file']
+        if not uploaded.name.lower().endswith(IMPORT_FORMATS):
+            raise forms.ValidationError(f"Upload one of: {', '.join(IMPORT_FORMATS)}.")
+        return uploaded
+
 
 # -------------------------------
 # REPORT FILTER FORM (Used for consolidated report)
@@ -87,6 +215,10 @@ class ReportFilterForm(forms.Form):
 # -------------------------------
 class RequestReportFilterForm(forms.Form):
     financial_year = forms.ChoiceField(choices=[], required=False, label="Financial Year")
+    q = forms.CharField(
+        max_length=200, required=False, label="Search",
+        widget=forms.TextInput(attrs={'placeholder': 'Description, remarks, location...'}),
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -109,3 +241,28 @@ class RequestReportFilterForm(forms.Form):
 
         if not self.is_bound:
             self.fields['financial_year'].initial = current_financial_year_str
+
+
+# -------------------------------
+# BUDGET ROLLUP FILTER FORM (Used by the budget dashboard and its JSON API)
+# -------------------------------
+class BudgetRollupFilterForm(forms.Form):
+    financial_year = forms.CharField(max_length=9, required=False, label="Financial Year")
+    location = forms.IntegerField(required=False, widget=forms.HiddenInput)
+    department = forms.IntegerField(required=False, widget=forms.HiddenInput)
+    asset_type = forms.IntegerField(required=False, widget=forms.HiddenInput)
+    item_type = forms.ChoiceField(choices=[('', 'All')] + AssetRequest.ITEM_TYPE_CHOICES, required=False, label="Item Type")
+    status = forms.ChoiceField(choices=[('', 'All')] + STATUS_CHOICES, required=False, label="Status")
+    group_by = forms.ChoiceField(choices=[], required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group_by'].choices = [('', '')] + [(field, field) for field in ROLLUP_COLUMNS]
+
+    def filters(self):
+        """The non-empty filters, keyed like baseapp.budgets.ROLLUP_COLUMNS."""
+        return {
+            field: self.cleaned_data[field]
+            for field in ROLLUP_COLUMNS
+            if self.cleaned_data.get(field) not in (None, '')
+        }
@@ -0,0 +1,241 @@
+# baseapp/instrumentation.py
+
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per view for the percentiles on the metrics endpoint.
+LATENCY_SAMPLES = 1000
+
+_current = contextvars.ContextVar('baseapp_request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised (with QUERY_BUDGET_STRICT) when a view runs more queries than VIEW_QUERY_BUDGETS allows."""
+
+
+class RequestMetrics:
+    """Counters for one request; called by count_queries for each query the request runs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+class ViewStats:
+    def __init__(self, name):
+        self.name = name
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, queries, db_ms, template_ms, total_ms):
+        self.requests += 1
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.db_ms += db_ms
+        self.template_ms += template_ms
+        self.total_ms += total_ms
+        self.latencies.append(total_ms)
+
+    def as_dict(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 2) if latencies else None
+
+        return {
+            'requests': self.requests,
+            'avg_queries': round(self.queries / self.requests, 2),
+            'max_queries': self.max_queries,
+            'avg_db_ms': round(self.db_ms / self.requests, 2),
+            'avg_template_ms': round(self.template_ms / self.requests, 2),
+            'avg_total_ms': round(self.total_ms / self.requests, 2),
+            'p50_total_ms': percentile(0.50),
+            'p95_total_ms': percentile(0.95),
+            'query_budget': query_budget_for(self.name),
+        }
+
+
+class MetricsRegistry:
+    """Per-process totals by URL name; served by views.metrics_view."""
+
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def record(self, view_name, metrics, total):
+        with self._lock:
+            stats = self._views.get(view_name)
+            if stats is None:
+                stats = self._views[view_name] = ViewStats(view_name)
+            stats.add(metrics.queries, metrics.db_time * 1000, metrics.template_time * 1000, total * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self._views.items())}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+def query_budget_for(view_name):
+    return getattr(settings, 'VIEW_QUERY_BUDGETS', {}).get(view_name)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every database connection (see install_query_counter).
+
+    Counts into the RequestMetrics of the current context, if any. Async views run
+    their ORM calls in worker threads with their own connections, but those calls
+    carry the request's context, so this attributes them to the right request.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+@contextlib.contextmanager
+def _tracking(metrics):
+    """Makes `metrics` the current request's counters for count_queries and TimedTemplate."""
+    token = _current.set(metrics)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class QueryMetricsMiddleware:
+    """
+    Records query count, DB time, template render time and total latency per URL name.
+
+    Put it first in MIDDLEWARE so the totals include the rest of the stack. It runs
+    natively under both WSGI and ASGI, so it does not force async views onto a thread.
+    Streaming responses are recorded once their content has been consumed. A view that
+    runs more queries than its VIEW_QUERY_BUDGETS entry is logged, and raises
+    QueryBudgetExceeded when QUERY_BUDGET_STRICT is on (QueryBudgetTests turns it on).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        with _tracking(metrics):
+            response = self.get_response(request)
+        return self._track_response(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        with _tracking(metrics):
+            response = await self.get_response(request)
+        return self._track_response(request, response, metrics)
+
+    def _track_response(self, request, response, metrics):
+        if not response.streaming:
+            self._finish(request, metrics)
+        elif response.is_async:
+            response.streaming_content = self._afinish_after(response.streaming_content, request, metrics)
+        else:
+            response.streaming_content = self._finish_after(response.streaming_content, request, metrics)
+        return response
+
+    def _finish_after(self, content, request, metrics):
+        with _tracking(metrics):
+            yield from content
+        self._finish(request, metrics)
+
+    async def _afinish_after(self, content, request, metrics):
+        with _tracking(metrics):
+            async for chunk in content:
+                yield chunk
+        self._finish(request, metrics)
+
+    def _finish(self, request, metrics):
+        total = time.perf_counter() - metrics.started
+        view_name = _view_name(request)
+        registry.record(view_name, metrics, total)
+
+        budget = query_budget_for(view_name)
+        if budget is not None and metrics.queries > budget:
+            message = f"{view_name} ran {metrics.queries} queries (budget {budget}) for {request.path}"
+            logger.warning(message)
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+
+
+# --- Template render timing ---
+# Selected with TEMPLATES[...]['BACKEND'] = 'baseapp.instrumentation.TimedDjangoTemplates'.
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The standard Django template backend, timing each top-level render into the request's metrics."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,89 @@
+# baseapp/management/commands/benchmark_survey_save.py
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from baseapp.models import Category, Department, Location, SurveyEntry, SurveyInfo, SystemModel
+from baseapp.surveys import save_survey_entries
+
+BENCH_LOCATION_NAME = '~survey-save-benchmark'
+BENCH_CATEGORY_NAME = '~survey-save-benchmark'
+
+
+def _save_per_cell(survey_info, cells):
+    """The pre-bulk save path (one get_or_create + one INSERT per cell), kept for comparison."""
+    for department, model_name, headcount in cells:
+        system_model, _ = SystemModel.objects.get_or_create(
+            name=model_name, location=survey_info.location, category=survey_info.category
+        )
+        SurveyEntry.objects.create(
+            survey_info=survey_info, location=survey_info.location, department=department,
+            system_model=system_model, headcount=headcount,
+        )
+    return len(cells)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures survey save (commit) latency for increasing department x model grid sizes. "
+        "Writes to and then cleans up the configured database, so run it against a copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='5x5,10x10,20x20,40x30',
+            help="Comma-separated DEPARTMENTSxMODELS grid sizes (default: %(default)s).",
+        )
+        parser.add_argument('--repeat', type=int, default=5, help="Saves per grid size (default: %(default)s).")
+        parser.add_argument(
+            '--mode', choices=['bulk', 'per-cell', 'both'], default='both',
+            help="Save path(s) to measure (default: %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [tuple(int(part) for part in size.lower().split('x')) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must look like 10x10,40x30")
+
+        modes = ['bulk', 'per-cell'] if options['mode'] == 'both' else [options['mode']]
+        savers = {'bulk': save_survey_entries, 'per-cell': _save_per_cell}
+
+        self.stdout.write(f"{'grid':>8} {'cells':>6} {'mode':>9} {'median ms':>10} {'max ms':>10}")
+        for department_count, model_count in sizes:
+            location, category, departments = self._setup(department_count)
+            try:
+                model_names = [f"Model {index:03d}" for index in range(model_count)]
+                cells = [(department, model_name, 1) for department in departments for model_name in model_names]
+                for mode in modes:
+                    timings = []
+                    for _ in range(options['repeat']):
+                        # Start each run from an empty grid so both paths create the same rows.
+                        SurveyInfo.objects.filter(location=location).delete()
+                        SystemModel.objects.filter(location=location).delete()
+                        started = time.perf_counter()
+                        with transaction.atomic():
+                            survey_info = SurveyInfo.objects.create(
+                                financial_year='2000-2001', location=location, category=category
+                            )
+                            savers[mode](survey_info, cells)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    self.stdout.write(
+                        f"{department_count:>3}x{model_count:<4} {len(cells):>6} {mode:>9} "
+                        f"{statistics.median(timings):>10.1f} {max(timings):>10.1f}"
+                    )
+            finally:
+                location.delete()
+                category.delete()
+
+    def _setup(self, department_count):
+        location = Location.objects.create(name=BENCH_LOCATION_NAME)
+        category = Category.objects.create(name=BENCH_CATEGORY_NAME)
+        departments = Department.objects.bulk_create([
+            Department(name=f"~bench-{location.pk}-{index}", code=f"~{location.pk % 1000}-{index}"[:10], location=location)
+            for index in range(department_count)
+        ])
+        return location, category, departments
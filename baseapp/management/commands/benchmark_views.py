@@ -0,0 +1,222 @@
+# baseapp/management/commands/benchmark_views.py
+
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from baseapp import refdata
+from baseapp.models import AssetRequest, SurveyEntry, SurveyInfo, SystemModel
+
+BENCH_USERNAME = 'benchmark-approver'
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Scenario:
+    """One benchmarked request; `rollback` undoes whatever the request writes."""
+
+    def __init__(self, name, url, method='get', data=None, rollback=False):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.data = data or {}
+        self.rollback = rollback
+
+    def request(self, client):
+        if self.rollback:
+            with transaction.atomic():
+                response = self._send(client)
+                transaction.set_rollback(True)
+            return response
+        return self._send(client)
+
+    def _send(self, client):
+        response = getattr(client, self.method)(self.url, self.data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the hot views (request report, review queue, survey grid GET/POST, consolidated "
+        "report) through the Django test client against the configured database and reports p50/p95 "
+        "latency, query counts and peak memory as JSON. Fill the database with generate_synthetic_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per scenario (default: %(default)s).")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per scenario (default: %(default)s).")
+        parser.add_argument('--only', help="Comma-separated scenario names to run.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--compare', help="Earlier JSON report to print p50/p95/query changes against.")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        scenarios = self._scenarios()
+        if options['only']:
+            wanted = set(options['only'].split(','))
+            unknown = wanted.difference(scenario.name for scenario in scenarios)
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in scenarios if scenario.name in wanted]
+
+        client = Client()
+        client.force_login(self._user())
+        results = {}
+        # Production-like: no DEBUG query log, no budget failures; 'testserver' is the test client's host.
+        with override_settings(DEBUG=False, QUERY_BUDGET_STRICT=False, ALLOWED_HOSTS=['testserver']):
+            for scenario in scenarios:
+                results[scenario.name] = self._run(client, scenario, options['repeat'], options['warmup'])
+                self.stderr.write(
+                    f"{scenario.name:<28} p50 {results[scenario.name]['p50_ms']:>8.1f} ms  "
+                    f"p95 {results[scenario.name]['p95_ms']:>8.1f} ms  "
+                    f"{results[scenario.name]['queries']:>3} queries  "
+                    f"{results[scenario.name]['peak_memory_kib']:>8.0f} KiB"
+                )
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'dataset': {
+                'asset_requests': AssetRequest.objects.count(),
+                'surveys': SurveyInfo.objects.count(),
+                'survey_entries': SurveyEntry.objects.count(),
+                'system_models': SystemModel.objects.count(),
+            },
+            'repeat': options['repeat'],
+            'scenarios': results,
+        }
+
+        if options['compare']:
+            self._compare(options['compare'], results)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def _user(self):
+        user, created = User.objects.get_or_create(username=BENCH_USERNAME)
+        if created:
+            user.set_unusable_password()
+            user.save()
+        user.groups.add(Group.objects.get_or_create(name='Approvers')[0])
+        return user
+
+    def _scenarios(self):
+        # The survey grid with the most cells is the worst case for GET and POST.
+        grid = (
+            SystemModel.objects.values('location_id', 'category_id').annotate(models=Count('id')).order_by('-models').first()
+        )
+        latest_year = AssetRequest.objects.order_by('-financial_year').values_list('financial_year', flat=True).first()
+        if grid is None or latest_year is None:
+            raise CommandError("No data to benchmark; run generate_synthetic_data first.")
+
+        location_id, category_id = grid['location_id'], grid['category_id']
+        refdata.invalidate()
+        model_index = refdata.system_models(location_id, category_id)
+        departments = refdata.departments_for_location(location_id)
+        grid_query = {
+            'location': location_id, 'category': category_id,
+            'date': timezone.localdate().isoformat(), 'financial_year': latest_year,
+        }
+        rng = random.Random(0)
+        grid_post = dict(grid_query, **{
+            f'count__{department.id}__{slug}': str(rng.randint(0, 9))
+            for department in departments
+            for slug in model_index.slugs
+        })
+
+        return [
+            Scenario('request_report', '/request/report/'),
+            Scenario('request_report_fy', '/request/report/', data={'financial_year': latest_year}),
+            Scenario('review_requests', '/requests/review/'),
+            Scenario('survey_form_get', '/survey/', data=grid_query),
+            Scenario('survey_form_post', '/survey/', method='post', data=grid_post, rollback=True),
+            Scenario('consolidated_report', '/report/'),
+            Scenario('consolidated_report_fy', '/report/', data={'financial_year': latest_year}),
+        ]
+
+    def _run(self, client, scenario, repeat, warmup):
+        for _ in range(warmup):
+            scenario.request(client)
+
+        timings, query_counts = [], []
+        status_code = None
+        for _ in range(repeat):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                response = scenario.request(client)
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(counter.count)
+            status_code = response.status_code
+
+        # Memory is measured on one extra request: tracemalloc slows everything down.
+        tracemalloc.start()
+        try:
+            scenario.request(client)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'method': scenario.method.upper(),
+            'url': scenario.url,
+            'status': status_code,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(_percentile(timings, 0.95), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(query_counts),
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+
+    def _compare(self, path, results):
+        try:
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)['scenarios']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not read baseline report {path}: {e}")
+
+        self.stderr.write(f"\nCompared with {path}:")
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            changes = []
+            for key in ('p50_ms', 'p95_ms', 'queries', 'peak_memory_kib'):
+                if before.get(key):
+                    changes.append(f"{key} {(result[key] - before[key]) / before[key]:+.0%}")
+            self.stderr.write(f"  {name:<28} " + '  '.join(changes))
@@ -0,0 +1,64 @@
+# baseapp/management/commands/gc_attachment_blobs.py
+
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from baseapp.models import AssetRequest
+from baseapp.storage import BLOB_DIR, TEMP_DIR, attachment_storage
+from baseapp.uploads import ATTACHMENT_FIELDS
+
+
+class Command(BaseCommand):
+    help = ("Deletes content-addressed attachment blobs that no AssetRequest references any more, "
+            "and temp files left behind by interrupted saves.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=1,
+            help="Keep blobs and temp files younger than this, so uploads whose request is still being "
+                 "saved survive (default: %(default)s).",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be deleted.")
+
+    def handle(self, *args, **options):
+        referenced = set()
+        for names in AssetRequest.objects.values_list(*ATTACHMENT_FIELDS).iterator(chunk_size=2000):
+            referenced.update(name for name in names if name)
+
+        cutoff = time.time() - options['grace_hours'] * 3600
+        root = attachment_storage.path('')
+        deleted = kept = freed = 0
+        for directory, _, filenames in os.walk(root):
+            if os.path.basename(os.path.dirname(directory)) != BLOB_DIR:
+                continue
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                if name in referenced or os.path.getmtime(path) > cutoff:
+                    kept += 1
+                    continue
+                freed += os.path.getsize(path)
+                deleted += 1
+                if not options['dry_run']:
+                    attachment_storage.delete_blob(name)
+
+        # A save writes to a temp file and renames it into place within seconds; older ones were abandoned.
+        temp_dir = attachment_storage.path(TEMP_DIR)
+        stale_temp = 0
+        for entry in (os.scandir(temp_dir) if os.path.isdir(temp_dir) else ()):
+            if not entry.is_file() or entry.stat().st_mtime > cutoff:
+                continue
+            freed += entry.stat().st_size
+            stale_temp += 1
+            if not options['dry_run']:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {deleted} orphaned blob(s) and {stale_temp} stale temp file(s), {freed} bytes; kept {kept}."
+        ))
@@ -0,0 +1,231 @@
+# baseapp/management/commands/generate_synthetic_data.py
+
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from baseapp import budgets, duplicates, refdata, review_queue, search
+from baseapp.aggregates import rebuild_aggregates
+from baseapp.models import (
+    MANPOWER_CHOICES, AssetRequest, Category, Department, Location, SurveyEntry, SurveyInfo, SystemModel,
+)
+from baseapp.surveys import SURVEY_ENTRY_BATCH_SIZE
+
+CITIES = [
+    'Mumbai', 'Delhi', 'Bengaluru', 'Hyderabad', 'Chennai', 'Kolkata', 'Pune', 'Ahmedabad',
+    'Jaipur', 'Lucknow', 'Bhopal', 'Nagpur', 'Kochi', 'Indore', 'Chandigarh', 'Guwahati',
+]
+DEPARTMENTS = [
+    ('Finance', 'FIN'), ('Human Resources', 'HR'), ('Information Technology', 'IT'), ('Operations', 'OPS'),
+    ('Procurement', 'PRC'), ('Legal', 'LGL'), ('Marketing', 'MKT'), ('Sales', 'SLS'),
+    ('Engineering', 'ENG'), ('Quality', 'QA'), ('Maintenance', 'MNT'), ('Administration', 'ADM'),
+    ('Security', 'SEC'), ('Research', 'RND'), ('Logistics', 'LOG'), ('Training', 'TRN'),
+]
+CATEGORIES = {
+    'Desktop': ['Dell OptiPlex', 'HP EliteDesk', 'Lenovo ThinkCentre', 'Acer Veriton'],
+    'Laptop': ['Dell Latitude', 'HP ProBook', 'Lenovo ThinkPad', 'Apple MacBook'],
+    'Printer': ['HP LaserJet', 'Canon imageRUNNER', 'Epson EcoTank', 'Brother HL'],
+    'Server': ['Dell PowerEdge', 'HPE ProLiant', 'Lenovo ThinkSystem'],
+    'Network': ['Cisco Catalyst', 'Aruba', 'Juniper EX', 'Netgear ProSafe'],
+    'UPS': ['APC Smart-UPS', 'Eaton 9SX', 'Vertiv Liebert'],
+    'Projector': ['Epson EB', 'BenQ MW', 'ViewSonic PA'],
+    'Scanner': ['Fujitsu fi', 'Canon DR', 'Epson DS'],
+}
+# Status mix for generated requests; only the current year keeps pending ones.
+STATUS_WEIGHTS = {'pending': 30, 'approved': 50, 'rejected': 15, 'duplicate': 5}
+BATCH_SIZE = 1000
+
+
+def _numbered(names, count):
+    """First `count` names from the pool, numbering repeats once it runs out."""
+    return [names[index % len(names)] + (f" {index // len(names) + 1}" if index >= len(names) else '')
+            for index in range(count)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates realistic synthetic locations, departments, categories, system models, "
+        "years of surveys and asset requests for benchmarking (see benchmark_views). "
+        "Names carry --prefix so the data can be removed again with --clear."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=5)
+        parser.add_argument('--departments', type=int, default=8, help="Departments per location.")
+        parser.add_argument('--categories', type=int, default=4)
+        parser.add_argument('--models', type=int, default=15, help="System models per location and category.")
+        parser.add_argument('--years', type=int, default=3, help="Financial years of data, ending with the current one.")
+        parser.add_argument('--surveys-per-year', type=int, default=1, help="Per location and category.")
+        parser.add_argument('--fill', type=float, default=0.6, help="Share of survey grid cells with a headcount.")
+        parser.add_argument('--requests', type=int, default=5000, help="Asset requests in total.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='Synthetic ', help="Prepended to generated names (default: %(default)r).")
+        parser.add_argument('--clear', action='store_true', help="Delete data generated with --prefix and exit.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if not prefix:
+            raise CommandError("--prefix must not be empty; it is how generated data is found again.")
+        if options['clear']:
+            self._clear(prefix)
+            return
+        if Location.objects.filter(name__startswith=prefix).exists():
+            raise CommandError(f"Data with prefix {prefix!r} already exists; run with --clear first.")
+
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            locations = self._locations(prefix, options['locations'])
+            departments = self._departments(prefix, locations, options['departments'])
+            categories = self._categories(prefix, options['categories'])
+            system_models = self._system_models(rng, locations, categories, options['models'])
+            years = self._financial_years(options['years'])
+            entries = self._surveys(rng, locations, departments, categories, system_models, years, options)
+            requests = self._requests(rng, locations, departments, categories, system_models, years, options['requests'])
+            rebuild_aggregates()
+            # bulk_create skips the signals that maintain the budget rollup, search and duplicate indexes.
+            budgets.rebuild_rollup()
+            search.rebuild()
+            duplicates.rebuild()
+        refdata.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(locations)} locations, {sum(len(d) for d in departments.values())} departments, "
+            f"{len(categories)} categories, {sum(len(m) for m in system_models.values())} system models, "
+            f"{entries} survey entries over {len(years)} year(s) and {requests} asset requests."
+        ))
+
+    def _clear(self, prefix):
+        with transaction.atomic():
+            # Cascades remove departments, system models, surveys, entries and requests.
+            deleted, _ = Location.objects.filter(name__startswith=prefix).delete()
+            deleted += Category.objects.filter(name__startswith=prefix).delete()[0]
+            rebuild_aggregates()
+        refdata.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} generated row(s)."))
+
+    def _locations(self, prefix, count):
+        return Location.objects.bulk_create([
+            Location(name=f"{prefix}{city}", city=city.split(' ')[0], state='Synthetic')
+            for city in _numbered(CITIES, count)
+        ])
+
+    def _departments(self, prefix, locations, per_location):
+        names = _numbered([name for name, _ in DEPARTMENTS], per_location)
+        codes = [DEPARTMENTS[index % len(DEPARTMENTS)][1] + str(index // len(DEPARTMENTS) or '') for index in range(per_location)]
+        created = Department.objects.bulk_create([
+            Department(name=f"{prefix}{name} - {location.name[len(prefix):]}", code=f"{code}-{location.pk}"[:10], location=location)
+            for location in locations
+            for name, code in zip(names, codes)
+        ])
+        departments = {}
+        for department in created:
+            departments.setdefault(department.location_id, []).append(department)
+        return departments
+
+    def _categories(self, prefix, count):
+        return Category.objects.bulk_create([Category(name=f"{prefix}{name}") for name in _numbered(list(CATEGORIES), count)])
+
+    def _system_models(self, rng, locations, categories, per_group):
+        series_by_category = {}
+        for index, category in enumerate(categories):
+            series_by_category[category.pk] = CATEGORIES[list(CATEGORIES)[index % len(CATEGORIES)]]
+
+        objects = []
+        for location in locations:
+            for category in categories:
+                taken_names, taken_slugs = set(), set()
+                while len(taken_names) < per_group:
+                    name = f"{rng.choice(series_by_category[category.pk])} {rng.randint(100, 9999)}"
+                    if name in taken_names:
+                        continue
+                    taken_names.add(name)
+                    objects.append(SystemModel(
+                        name=name, slug=SystemModel.unique_slug(name, taken_slugs), location=location, category=category,
+                    ))
+        SystemModel.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+        system_models = {}
+        for system_model in SystemModel.objects.filter(location__in=locations, category__in=categories):
+            system_models.setdefault((system_model.location_id, system_model.category_id), []).append(system_model)
+        return system_models
+
+    def _financial_years(self, count):
+        today = date.today()
+        current = today.year if today.month >= 4 else today.year - 1
+        return [(start, f"{start}-{start + 1}") for start in range(current - count + 1, current + 1)]
+
+    def _random_date(self, rng, start_year):
+        first = date(start_year, 4, 1)
+        last = min(date(start_year + 1, 3, 31), date.today())
+        return first + timedelta(days=rng.randint(0, max((last - first).days, 0)))
+
+    def _random_dates(self, rng, start_year, count):
+        """Up to `count` distinct dates in the financial year (a survey is unique per date)."""
+        first = date(start_year, 4, 1)
+        days = (min(date(start_year + 1, 3, 31), date.today()) - first).days + 1
+        return [first + timedelta(days=offset) for offset in rng.sample(range(max(days, 1)), min(count, max(days, 1)))]
+
+    def _surveys(self, rng, locations, departments, categories, system_models, years, options):
+        survey_infos = SurveyInfo.objects.bulk_create([
+            SurveyInfo(date=survey_date, financial_year=financial_year, location=location, category=category)
+            for start_year, financial_year in years
+            for location in locations
+            for category in categories
+            for survey_date in self._random_dates(rng, start_year, options['surveys_per_year'])
+        ], batch_size=BATCH_SIZE)
+
+        manpower_types = [value for value, _ in MANPOWER_CHOICES]
+        created = 0
+        batch = []
+        for survey_info in survey_infos:
+            for department in departments[survey_info.location_id]:
+                for system_model in system_models[(survey_info.location_id, survey_info.category_id)]:
+                    if rng.random() >= options['fill']:
+                        continue
+                    batch.append(SurveyEntry(
+                        survey_info=survey_info, location_id=survey_info.location_id, department=department,
+                        system_model=system_model, headcount=rng.randint(1, 25),
+                        manpower_type=rng.choices(manpower_types, weights=[70, 20, 10])[0],
+                    ))
+            if len(batch) >= BATCH_SIZE:
+                SurveyEntry.objects.bulk_create(batch, batch_size=SURVEY_ENTRY_BATCH_SIZE)
+                created += len(batch)
+                batch = []
+        SurveyEntry.objects.bulk_create(batch, batch_size=SURVEY_ENTRY_BATCH_SIZE)
+        return created + len(batch)
+
+    def _requests(self, rng, locations, departments, categories, system_models, years, count):
+        statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        current_year = years[-1][1]
+        batch = []
+        for index in range(count):
+            location = rng.choice(locations)
+            department = rng.choice(departments[location.pk])
+            category = rng.choice(categories)
+            start_year, financial_year = years[min(int(rng.random() ** 0.5 * len(years)), len(years) - 1)]
+            system_model = rng.choice(system_models[(location.pk, category.pk)])
+            quantity = rng.randint(1, 20)
+            status = rng.choices(statuses, weights=weights)[0]
+            if status == 'pending' and financial_year != current_year:
+                status = 'approved'
+            request_date = self._random_date(rng, start_year)
+            asset_request = AssetRequest(
+                location=location, department=department, financial_year=financial_year, asset_type=category,
+                description=f"{quantity} x {system_model.name} for {department.name.split(' - ')[0]}",
+                estimated_cost=Decimal(quantity * rng.randint(200, 4000) * 25),
+                item_type=rng.choice(['capital', 'capital', 'revenue']),
+                date=request_date,
+                submitted_at=timezone.make_aware(datetime.combine(request_date, time.min)) + timedelta(seconds=rng.randint(0, 86399)),
+                status=status,
+            )
+            review_queue.schedule(asset_request)  # bulk_create skips the pre_save signal that sets due_at
+            batch.append(asset_request)
+            if len(batch) >= BATCH_SIZE:
+                AssetRequest.objects.bulk_create(batch)
+                batch = []
+        AssetRequest.objects.bulk_create(batch)
+        return count
@@ -0,0 +1,72 @@
+# baseapp/management/commands/import_survey.py
+
+import re
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from baseapp.models import Category, Location
+from baseapp.survey_import import SurveyImportError, parse_matrix, read_matrix
+from baseapp.surveys import save_survey_revision
+
+FINANCIAL_YEAR_PATTERN = re.compile(r'^(\d{4})-(\d{4})$')
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates a survey from a CSV/XLSX department x model headcount matrix "
+        "(model names across the first row, one department name or code per row), "
+        "or updates it if that survey was already submitted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file to import.")
+        parser.add_argument('--location', required=True, help="Location name.")
+        parser.add_argument('--category', required=True, help="Category name.")
+        parser.add_argument('--financial-year', required=True, help="Financial year, e.g. 2025-2026.")
+        parser.add_argument(
+            '--date', type=date.fromisoformat, default=date.today(),
+            help="Survey date as YYYY-MM-DD (default: today).",
+        )
+        parser.add_argument(
+            '--create-models', action='store_true',
+            help="Create models that do not exist yet for the location and category instead of rejecting them.",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Validate the file without saving anything.")
+
+    def handle(self, *args, **options):
+        match = FINANCIAL_YEAR_PATTERN.match(options['financial_year'])
+        if not match or int(match.group(2)) != int(match.group(1)) + 1:
+            raise CommandError(f"Invalid financial year {options['financial_year']!r}; expected e.g. 2025-2026.")
+        try:
+            location = Location.objects.get(name=options['location'])
+            category = Category.objects.get(name=options['category'])
+        except (Location.DoesNotExist, Category.DoesNotExist) as e:
+            raise CommandError(str(e))
+
+        try:
+            with open(options['path'], 'rb') as matrix_file:
+                rows = read_matrix(matrix_file, options['path'])
+            cells = parse_matrix(rows, location, category, create_models=options['create_models'])
+        except OSError as e:
+            raise CommandError(f"Could not open {options['path']}: {e}")
+        except SurveyImportError as e:
+            for error in e.errors:
+                self.stderr.write(error)
+            raise CommandError(f"{len(e.errors)} problem(s) found; nothing was imported.")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"{options['path']} is valid: {len(cells)} entries would be imported."))
+            return
+
+        with transaction.atomic():
+            survey_info, revision = save_survey_revision(
+                location, category, options['financial_year'], options['date'], cells,
+            )
+        if revision.number == 1:
+            self.stdout.write(self.style.SUCCESS(f"Imported survey {survey_info.id} with {revision.entry_count} entries."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Updated survey {survey_info.id} (revision {revision.number}): {len(revision.changes)} count(s) changed."
+            ))
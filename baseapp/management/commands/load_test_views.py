@@ -0,0 +1,241 @@
+# baseapp/management/commands/load_test_views.py
+
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+
+from baseapp import refdata
+from baseapp.models import AssetRequest, SurveyInfo, SystemModel
+
+from .benchmark_views import BENCH_USERNAME, _percentile
+
+HANDLERS = ('wsgi', 'asgi')
+# Pages that write; they only run when named in --only.
+WRITE_PAGES = ('survey_submit',)
+
+
+class Page:
+    def __init__(self, url, method='get', data=None, expected_status=200):
+        self.url = url
+        self.method = method
+        self.data = data or {}  # or a callable returning fresh data for each request
+        self.expected_status = expected_status
+
+    def send(self, client):
+        return getattr(client, self.method)(self.url, self.data() if callable(self.data) else self.data)
+
+
+def _consume(response):
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+async def _aconsume(response):
+    if response.streaming:
+        if response.is_async:
+            async for _ in response.streaming_content:
+                pass
+        else:
+            b''.join(response.streaming_content)
+    return response
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the read-heavy pages with concurrent clients through Django's WSGI handler "
+        "(one thread per client, like a threaded WSGI server) and its ASGI handler (one event loop, "
+        "one task per client, like uvicorn) in process, and reports req/s and p50/p95 latency per "
+        "page as JSON. Fill the database with generate_synthetic_data first. `--only survey_submit` "
+        "instead has every client post survey grids (concurrent writers, resubmitting one survey), "
+        "then deletes the survey it created; compare ASSETPORTAL_DB_PROFILE=stock with the default "
+        "production profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients (default: %(default)s).")
+        parser.add_argument('--requests', type=int, default=200, help="Timed requests per page and handler (default: %(default)s).")
+        parser.add_argument('--only', help="Comma-separated page names to run.")
+        parser.add_argument('--handlers', default=','.join(HANDLERS), help="Comma-separated handlers to run (default: %(default)s).")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        concurrency, total = options['concurrency'], options['requests']
+        if concurrency < 1 or total < concurrency:
+            raise CommandError("--concurrency must be at least 1 and --requests at least --concurrency.")
+        handlers = options['handlers'].split(',')
+        if set(handlers).difference(HANDLERS):
+            raise CommandError(f"--handlers must be a subset of {', '.join(HANDLERS)}.")
+        pages = self._pages()
+        wanted = set(options['only'].split(',')) if options['only'] else set(pages).difference(WRITE_PAGES)
+        unknown = wanted.difference(pages)
+        if unknown:
+            raise CommandError(f"Unknown page(s): {', '.join(sorted(unknown))}")
+        pages = {name: page for name, page in pages.items() if name in wanted}
+
+        user = self._user()
+        results = {}
+        last_survey = SurveyInfo.objects.aggregate(last=Max('pk'))['last'] or 0
+        # Same production-like settings as benchmark_views.
+        try:
+            with override_settings(DEBUG=False, QUERY_BUDGET_STRICT=False, ALLOWED_HOSTS=['testserver']):
+                for name, page in pages.items():
+                    results[name] = {}
+                    for handler in handlers:
+                        run = self._run_wsgi if handler == 'wsgi' else self._run_asgi
+                        results[name][handler] = result = run(user, page, concurrency, total)
+                        self.stderr.write(
+                            f"{name:<24} {handler}  {result['requests_per_second']:>7.1f} req/s  "
+                            f"p50 {result['p50_ms']:>8.1f} ms  p95 {result['p95_ms']:>8.1f} ms  "
+                            f"{result['errors']} error(s)"
+                        )
+        finally:
+            if 'survey_submit' in pages:
+                deleted = SurveyInfo.objects.filter(pk__gt=last_survey).delete()[1].get(SurveyInfo._meta.label, 0)
+                self.stderr.write(f"Deleted the {deleted} survey(s) posted by the load test.")
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'db_profile': settings.DB_PROFILE,
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'concurrency': concurrency,
+            'requests': total,
+            'pages': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def _user(self):
+        user, created = User.objects.get_or_create(username=BENCH_USERNAME)
+        if created:
+            user.set_unusable_password()
+            user.save()
+        user.groups.add(Group.objects.get_or_create(name='Approvers')[0])
+        return user
+
+    def _pages(self):
+        latest = AssetRequest.objects.order_by('-pk').values_list('pk', flat=True).first()
+        # Writers post the largest survey grid, the worst case for the write transaction.
+        grid = (
+            SystemModel.objects.values('location_id', 'category_id').annotate(models=Count('id')).order_by('-models').first()
+        )
+        if latest is None or grid is None:
+            raise CommandError("No data to load-test; run generate_synthetic_data first.")
+
+        refdata.invalidate()
+        model_index = refdata.system_models(grid['location_id'], grid['category_id'])
+        input_names = [
+            f'count__{department.id}__{slug}'
+            for department in refdata.departments_for_location(grid['location_id'])
+            for slug in model_index.slugs
+        ]
+        # A date no survey of this grid has, so the first post creates the survey (removed afterwards)
+        # and the rest resubmit it with new counts: updates in place.
+        last_date = SurveyInfo.objects.filter(
+            location_id=grid['location_id'], category_id=grid['category_id'],
+        ).aggregate(last=Max('date'))['last']
+        survey_date = max(last_date + timedelta(days=1), timezone.localdate()) if last_date else timezone.localdate()
+        rng = random.Random(0)
+
+        def survey_post():
+            return {
+                'location': grid['location_id'], 'category': grid['category_id'],
+                'date': survey_date.isoformat(), 'financial_year': self._financial_year(survey_date),
+                **{name: str(rng.randint(1, 9)) for name in input_names},
+            }
+        return {
+            'home': Page('/'),
+            'request_report': Page('/request/report/'),
+            'consolidated_report': Page('/report/'),
+            'request_receipt_pdf': Page(f'/request/{latest}/receipt.pdf'),
+            # Still a sync view: the ASGI handler runs it in a thread.
+            'budget_dashboard': Page('/budget/'),
+            'survey_submit': Page('/survey/', method='post', data=survey_post, expected_status=302),
+        }
+
+    def _financial_year(self, day):
+        start = day.year if day.month >= 4 else day.year - 1
+        return f"{start}-{start + 1}"
+
+    def _summary(self, outcomes):
+        """Combines per-client (timings, errors, started, finished); throughput is over the timed window."""
+        timings = [timing for client_timings, _, _, _ in outcomes for timing in client_timings]
+        elapsed = max(finished for *_, finished in outcomes) - min(started for _, _, started, _ in outcomes)
+        errors = sum(client_errors for _, client_errors, _, _ in outcomes)
+        return {
+            'requests_per_second': round(len(timings) / elapsed, 1),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(_percentile(timings, 0.95), 2),
+            'max_ms': round(max(timings), 2),
+            'errors': errors,
+        }
+
+    def _run_wsgi(self, user, page, concurrency, total):
+        ready = threading.Barrier(concurrency)
+
+        def client_loop(count):
+            client = Client()
+            client.force_login(user)
+            _consume(page.send(client))  # warm-up (e.g. renders a receipt PDF), untimed
+            ready.wait()
+            timings, errors = [], 0
+            window_started = time.perf_counter()
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+                    response = _consume(page.send(client))
+                    timings.append((time.perf_counter() - started) * 1000)
+                    errors += response.status_code != page.expected_status
+            finally:
+                connection.close()
+            return timings, errors, window_started, time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return self._summary(list(pool.map(client_loop, self._shares(concurrency, total))))
+
+    def _run_asgi(self, user, page, concurrency, total):
+        async def client_loop(count, ready):
+            client = AsyncClient()
+            await client.aforce_login(user)
+            await _aconsume(await page.send(client))
+            await ready.wait()
+            timings, errors = [], 0
+            window_started = time.perf_counter()
+            for _ in range(count):
+                started = time.perf_counter()
+                # Like ASGIHandler: each request gets its own thread for sync (thread-sensitive) work.
+                async with ThreadSensitiveContext():
+                    response = await _aconsume(await page.send(client))
+                timings.append((time.perf_counter() - started) * 1000)
+                errors += response.status_code != page.expected_status
+            return timings, errors, window_started, time.perf_counter()
+
+        async def main():
+            ready = asyncio.Barrier(concurrency)
+            return await asyncio.gather(*(client_loop(count, ready) for count in self._shares(concurrency, total)))
+
+        return self._summary(asyncio.run(main()))
+
+    def _shares(self, concurrency, total):
+        """Splits `total` requests as evenly as possible over `concurrency` clients."""
+        return [total // concurrency + (index < total % concurrency) for index in range(concurrency)]
@@ -0,0 +1,25 @@
+# baseapp/management/commands/purge_chunked_uploads.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from baseapp.models import ChunkedUpload
+from baseapp.uploads import discard_uploads
+
+
+class Command(BaseCommand):
+    help = "Deletes chunked uploads (and their temp files) that were never attached to a request."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-hours', type=int, default=24,
+            help="Only purge uploads started more than this many hours ago (default: %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['older_than_hours'])
+        stale = list(ChunkedUpload.objects.filter(created_at__lt=cutoff))
+        discard_uploads(stale)
+        self.stdout.write(self.style.SUCCESS(f"Purged {len(stale)} stale upload(s)."))
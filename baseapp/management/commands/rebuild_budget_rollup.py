@@ -0,0 +1,13 @@
+# baseapp/management/commands/rebuild_budget_rollup.py
+
+from django.core.management.base import BaseCommand
+
+from baseapp.budgets import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the BudgetRollup table from scratch out of the raw AssetRequest rows."
+
+    def handle(self, *args, **options):
+        groups = rebuild_rollup()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {groups} budget rollup group(s)."))
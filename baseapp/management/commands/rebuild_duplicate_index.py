@@ -0,0 +1,18 @@
+# baseapp/management/commands/rebuild_duplicate_index.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from baseapp.duplicates import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the MinHash/attachment index used to flag duplicate asset requests. "
+        "Run once after upgrading, and after bulk imports that bypass model signals."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} asset request(s) for duplicate detection."))
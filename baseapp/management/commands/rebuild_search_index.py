@@ -0,0 +1,15 @@
+# baseapp/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from baseapp.search import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the asset request full-text search index from scratch (e.g. after bulk imports or raw SQL edits)."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} asset request(s)."))
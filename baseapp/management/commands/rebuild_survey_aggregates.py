@@ -0,0 +1,13 @@
+# baseapp/management/commands/rebuild_survey_aggregates.py
+
+from django.core.management.base import BaseCommand
+
+from baseapp.aggregates import rebuild_aggregates
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the SurveyAggregate table from scratch out of the raw SurveyEntry rows."
+
+    def handle(self, *args, **options):
+        groups = rebuild_aggregates()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {groups} survey aggregate group(s)."))
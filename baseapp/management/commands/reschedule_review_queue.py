@@ -0,0 +1,13 @@
+# baseapp/management/commands/reschedule_review_queue.py
+
+from django.core.management.base import BaseCommand
+
+from baseapp.review_queue import reschedule
+
+
+class Command(BaseCommand):
+    help = "Recomputes the review due time of every pending request, e.g. after changing the REVIEW_SLA_* settings."
+
+    def handle(self, *args, **options):
+        updated = reschedule()
+        self.stdout.write(self.style.SUCCESS(f"Rescheduled {updated} pending request(s)."))
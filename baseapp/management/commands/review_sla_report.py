@@ -0,0 +1,29 @@
+# baseapp/management/commands/review_sla_report.py
+
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from baseapp.review_queue import decision_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports time-to-decision (mean, p50/p95/max hours from submission), decisions made after "
+        "their due time and currently overdue pending requests as JSON, from the status transition log."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="Decisions made in the last N days (default: %(default)s).")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        since = now - timedelta(days=options['days'])
+        report = {
+            'generated_at': now.isoformat(),
+            'since': since.isoformat(),
+            **decision_metrics(since=since, now=now),
+        }
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_survey_aggregates(apps, schema_editor):
+    SurveyEntry = apps.get_model('baseapp', 'SurveyEntry')
+    SurveyAggregate = apps.get_model('baseapp', 'SurveyAggregate')
+    groups = (
+        SurveyEntry.objects.filter(survey_info__isnull=False)
+        .order_by()
+        .values('survey_info__financial_year', 'location_id', 'department_id', 'system_model_id', 'manpower_type')
+        .annotate(headcount_total=Sum('headcount'), entries=Count('pk'))
+    )
+    SurveyAggregate.objects.bulk_create([
+        SurveyAggregate(
+            financial_year=group['survey_info__financial_year'],
+            location_id=group['location_id'],
+            department_id=group['department_id'],
+            system_model_id=group['system_model_id'],
+            manpower_type=group['manpower_type'],
+            headcount=group['headcount_total'],
+            entry_count=group['entries'],
+        )
+        for group in groups
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('financial_year', models.CharField(max_length=9)),
+                ('manpower_type', models.CharField(choices=[('exe', 'Executive'), ('mr', 'MR'), ('dr', 'DR')], default='exe', max_length=10)),
+                ('headcount', models.PositiveIntegerField(default=0)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='baseapp.department')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='baseapp.location')),
+                ('system_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='baseapp.systemmodel')),
+            ],
+            options={
+                'unique_together': {('financial_year', 'location', 'department', 'system_model', 'manpower_type')},
+            },
+        ),
+        migrations.RunPython(populate_survey_aggregates, migrations.RunPython.noop),
+    ]
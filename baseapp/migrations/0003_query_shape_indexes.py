@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0002_surveyaggregate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assetrequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-date'], name='assetreq_pending_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assetrequest',
+            index=models.Index(fields=['financial_year', '-date'], name='assetreq_fy_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assetrequest',
+            index=models.Index(fields=['-date'], name='assetreq_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='surveyinfo',
+            index=models.Index(fields=['financial_year', 'location', 'category'], name='surveyinfo_fy_loc_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemmodel',
+            index=models.Index(fields=['location', 'category', 'name'], name='sysmodel_loc_cat_name_idx'),
+        ),
+    ]
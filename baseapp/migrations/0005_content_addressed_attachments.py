@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:49
+
+import baseapp.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0004_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assetrequest',
+            name='annexure_x',
+            field=models.FileField(blank=True, null=True, storage=baseapp.storage.ContentAddressedStorage(), upload_to='uploads/'),
+        ),
+        migrations.AlterField(
+            model_name='assetrequest',
+            name='annexure_y',
+            field=models.FileField(blank=True, null=True, storage=baseapp.storage.ContentAddressedStorage(), upload_to='uploads/'),
+        ),
+        migrations.AlterField(
+            model_name='assetrequest',
+            name='gem_file',
+            field=models.FileField(blank=True, null=True, storage=baseapp.storage.ContentAddressedStorage(), upload_to='uploads/'),
+        ),
+        migrations.AlterField(
+            model_name='assetrequest',
+            name='indent_file',
+            field=models.FileField(blank=True, null=True, storage=baseapp.storage.ContentAddressedStorage(), upload_to='uploads/'),
+        ),
+    ]
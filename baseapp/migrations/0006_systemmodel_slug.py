@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:40
+
+from django.db import migrations, models
+from slugify import slugify
+
+
+def populate_slugs(apps, schema_editor):
+    SystemModel = apps.get_model('baseapp', 'SystemModel')
+    taken = {}
+    system_models = list(SystemModel.objects.order_by('location_id', 'category_id', 'name', 'id'))
+    for system_model in system_models:
+        group = taken.setdefault((system_model.location_id, system_model.category_id), set())
+        base = slugify(system_model.name, max_length=100) or 'model'
+        slug, suffix = base, 2
+        while slug in group:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+        group.add(slug)
+        system_model.slug = slug
+    SystemModel.objects.bulk_update(system_models, ['slug'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0005_content_addressed_attachments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemmodel',
+            name='slug',
+            field=models.SlugField(default='', editable=False, max_length=120),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_slugs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='systemmodel',
+            constraint=models.UniqueConstraint(fields=('location', 'category', 'slug'), name='sysmodel_loc_cat_slug_uniq'),
+        ),
+    ]
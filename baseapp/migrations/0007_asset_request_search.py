@@ -0,0 +1,80 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:55
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'baseapp_assetrequest_fts'
+
+
+def _tokenize(text):
+    # Frozen copy of baseapp.search.tokenize at the time of this migration.
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [word[:64] for word in re.findall(r'[^\W_]+', text.lower())]
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "description, remarks, location, department, category, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, description, remarks, location, department, category) "
+                "SELECT r.id, COALESCE(r.description, ''), COALESCE(r.remarks, ''), l.name, d.name, c.name "
+                "FROM baseapp_assetrequest r "
+                "JOIN baseapp_location l ON l.id = r.location_id "
+                "JOIN baseapp_department d ON d.id = r.department_id "
+                "JOIN baseapp_category c ON c.id = r.asset_type_id"
+            )
+        return
+
+    AssetRequest = apps.get_model('baseapp', 'AssetRequest')
+    AssetRequestSearchTerm = apps.get_model('baseapp', 'AssetRequestSearchTerm')
+    rows = AssetRequest.objects.values_list(
+        'id', 'description', 'remarks', 'location__name', 'department__name', 'asset_type__name'
+    )
+    terms = []
+    for pk, *texts in rows.iterator(chunk_size=1000):
+        terms.extend(
+            AssetRequestSearchTerm(term=term, asset_request_id=pk)
+            for term in set(_tokenize(' '.join(text or '' for text in texts)))
+        )
+        if len(terms) >= 5000:
+            AssetRequestSearchTerm.objects.bulk_create(terms)
+            terms = []
+    AssetRequestSearchTerm.objects.bulk_create(terms)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0006_systemmodel_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetRequestSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('asset_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='baseapp.assetrequest')),
+            ],
+            options={
+                'unique_together': {('term', 'asset_request')},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
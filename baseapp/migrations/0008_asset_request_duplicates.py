@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0007_asset_request_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetRequestFingerprint',
+            fields=[
+                ('asset_request', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='baseapp.assetrequest')),
+                ('minhash', models.BinaryField(null=True)),
+                ('attachment_digests', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='assetrequest',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='suspected_duplicates', to='baseapp.assetrequest'),
+        ),
+        migrations.AddField(
+            model_name='assetrequest',
+            name='duplicate_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AssetRequestBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True)),
+                ('asset_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_buckets', to='baseapp.assetrequest')),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_budget_rollup(apps, schema_editor):
+    AssetRequest = apps.get_model('baseapp', 'AssetRequest')
+    BudgetRollup = apps.get_model('baseapp', 'BudgetRollup')
+    groups = (
+        AssetRequest.objects.order_by()
+        .values('financial_year', 'location_id', 'department_id', 'asset_type_id', 'item_type', 'status')
+        .annotate(cost=Sum('estimated_cost'), requests=Count('pk'))
+    )
+    BudgetRollup.objects.bulk_create([
+        BudgetRollup(
+            financial_year=group['financial_year'],
+            location_id=group['location_id'],
+            department_id=group['department_id'],
+            asset_type_id=group['asset_type_id'],
+            item_type=group['item_type'],
+            status=group['status'],
+            total_cost=group['cost'],
+            request_count=group['requests'],
+        )
+        for group in groups
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0008_asset_request_duplicates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BudgetRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('financial_year', models.CharField(max_length=9)),
+                ('item_type', models.CharField(choices=[('capital', 'Capital'), ('revenue', 'Revenue')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('duplicate', 'Duplicate')], max_length=20)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('asset_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='baseapp.category')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='baseapp.department')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='baseapp.location')),
+            ],
+            options={
+                'unique_together': {('financial_year', 'location', 'department', 'asset_type', 'item_type', 'status')},
+            },
+        ),
+        migrations.RunPython(populate_budget_rollup, migrations.RunPython.noop),
+    ]
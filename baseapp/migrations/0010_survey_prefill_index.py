@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0009_budget_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='surveyinfo',
+            index=models.Index(fields=['location', 'category', 'date'], name='surveyinfo_loc_cat_date_idx'),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+BATCH_SIZE = 500
+
+
+def merge_duplicate_surveys(apps, schema_editor):
+    """
+    Keeps the latest of each set of repeated submissions of a survey, as the unique
+    constraint needs one row, and logs the set on it as SurveyRevisions, oldest first,
+    so the counts of the dropped submissions stay recoverable.
+    """
+    SurveyInfo = apps.get_model('baseapp', 'SurveyInfo')
+    SurveyEntry = apps.get_model('baseapp', 'SurveyEntry')
+    SurveyAggregate = apps.get_model('baseapp', 'SurveyAggregate')
+    SurveyRevision = apps.get_model('baseapp', 'SurveyRevision')
+
+    submissions = {}
+    surveys = SurveyInfo.objects.filter(category__isnull=False).order_by('pk').values_list(
+        'pk', 'created_at', 'financial_year', 'location_id', 'category_id', 'date',
+    )
+    for pk, created_at, *key in surveys.iterator():
+        submissions.setdefault(tuple(key), []).append((pk, created_at))
+    repeated = [group for group in submissions.values() if len(group) > 1]
+    if not repeated:
+        return
+
+    stale = []
+    for start in range(0, len(repeated), BATCH_SIZE):
+        groups = repeated[start:start + BATCH_SIZE]
+        counts = {pk: {} for group in groups for pk, _ in group}
+        for survey_info_id, department_id, system_model_id, headcount in SurveyEntry.objects.filter(
+            survey_info_id__in=list(counts),
+        ).values_list('survey_info_id', 'department_id', 'system_model_id', 'headcount').iterator():
+            cells = counts[survey_info_id]
+            cells[department_id, system_model_id] = cells.get((department_id, system_model_id), 0) + headcount
+
+        revisions = []
+        for group in groups:
+            kept, previous = group[-1][0], None
+            for number, (pk, created_at) in enumerate(group, start=1):
+                current = counts[pk]
+                changes = [] if previous is None else [
+                    [*key, previous.get(key, 0), current.get(key, 0)]
+                    for key in sorted(previous.keys() | current.keys())
+                    if previous.get(key, 0) != current.get(key, 0)
+                ]
+                revisions.append(SurveyRevision(
+                    survey_info_id=kept, number=number, changes=changes, entry_count=len(current),
+                    submitted_at=created_at,
+                ))
+                previous = current
+            stale.extend(pk for pk, _ in group[:-1])
+        SurveyRevision.objects.bulk_create(revisions, batch_size=BATCH_SIZE)
+
+    for start in range(0, len(stale), BATCH_SIZE):
+        SurveyInfo.objects.filter(pk__in=stale[start:start + BATCH_SIZE]).delete()
+
+    # Historical models send no signals, so rebuild the aggregates the deleted entries were part of.
+    SurveyAggregate.objects.all().delete()
+    groups = (
+        SurveyEntry.objects.filter(survey_info__isnull=False)
+        .order_by()
+        .values('survey_info__financial_year', 'location_id', 'department_id', 'system_model_id', 'manpower_type')
+        .annotate(headcount_total=Sum('headcount'), entries=Count('pk'))
+    )
+    SurveyAggregate.objects.bulk_create([
+        SurveyAggregate(
+            financial_year=group['survey_info__financial_year'],
+            location_id=group['location_id'],
+            department_id=group['department_id'],
+            system_model_id=group['system_model_id'],
+            manpower_type=group['manpower_type'],
+            headcount=group['headcount_total'],
+            entry_count=group['entries'],
+        )
+        for group in groups
+    ], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0010_survey_prefill_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('changes', models.JSONField(blank=True, default=list)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('submitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='surveyinfo',
+            name='surveyinfo_fy_loc_cat_idx',
+        ),
+        migrations.AddField(
+            model_name='surveyrevision',
+            name='submitted_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='surveyrevision',
+            name='survey_info',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='baseapp.surveyinfo'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='surveyrevision',
+            unique_together={('survey_info', 'number')},
+        ),
+        # Irreversible: the dropped submissions survive only as revisions of the kept survey.
+        migrations.RunPython(merge_duplicate_surveys),
+        migrations.AddConstraint(
+            model_name='surveyinfo',
+            constraint=models.UniqueConstraint(fields=('financial_year', 'location', 'category', 'date'), name='surveyinfo_fy_loc_cat_date_uniq'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:08
+
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 500
+# The SLA settings this migration shipped with, frozen so the data step does not change with
+# later settings; `manage.py reschedule_review_queue` applies the current ones.
+REVIEW_SLA_HOURS = {'capital': 72, 'revenue': 120}
+REVIEW_SLA_COST_TIERS = [(1000000, 24), (100000, 48)]
+
+
+def schedule_pending_requests(apps, schema_editor):
+    """
+    Existing requests have only a submission date: pending ones are taken as
+    submitted at its midnight and given a due time by the SLA above; decided
+    ones get no submission time, which keeps them out of the time-to-decision metrics.
+    """
+    AssetRequest = apps.get_model('baseapp', 'AssetRequest')
+    AssetRequest.objects.exclude(status='pending').update(submitted_at=None)
+
+    def review_hours(estimated_cost, item_type):
+        hours = REVIEW_SLA_HOURS[item_type]
+        for min_cost, tier_hours in REVIEW_SLA_COST_TIERS:
+            if estimated_cost >= min_cost:
+                return min(hours, tier_hours)
+        return hours
+
+    batch = []
+    pending = AssetRequest.objects.filter(status='pending').only('id', 'date', 'estimated_cost', 'item_type')
+    for asset_request in pending.iterator(chunk_size=BATCH_SIZE):
+        asset_request.submitted_at = timezone.make_aware(datetime.combine(asset_request.date, time.min))
+        asset_request.due_at = asset_request.submitted_at + timedelta(
+            hours=review_hours(asset_request.estimated_cost, asset_request.item_type),
+        )
+        batch.append(asset_request)
+        if len(batch) >= BATCH_SIZE:
+            AssetRequest.objects.bulk_update(batch, ['submitted_at', 'due_at'])
+            batch = []
+    AssetRequest.objects.bulk_update(batch, ['submitted_at', 'due_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baseapp', '0012_asset_request_transitions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='assetrequest',
+            name='assetreq_pending_date_idx',
+        ),
+        migrations.AddField(
+            model_name='assetrequest',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='assetrequest',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assetrequest',
+            name='due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assetrequest',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='assetrequest',
+            index=models.Index(fields=['status', 'due_at', 'id'], name='assetreq_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assetrequest',
+            index=models.Index(fields=['status', 'claimed_by', 'claimed_until'], name='assetreq_claims_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statustransition',
+            index=models.Index(fields=['changed_at'], name='transition_changed_at_idx'),
+        ),
+        migrations.RunPython(schedule_pending_requests, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
 # models.py
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
+from slugify import slugify
+
+from .storage import attachment_storage
 
 # Define status choices for AssetRequest
 STATUS_CHOICES = [
@@ -42,7 +47,9 @@ class Department(models.Model):
     location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='departments')
 
     def __str__(self):
-        return f"{self.name} ({self.code}) - {self.location.name}"
+        from .refdata import location_by_id  # refdata imports this module
+        location = location_by_id(self.location_id)
+        return f"{self.name} ({self.code}) - {location.name if location else 'N/A'}"
 
 
 # Category Model
@@ -68,6 +75,8 @@ class SubCategory(models.Model):
 # System Model (Represents a type of system model available at a location and category)
 class SystemModel(models.Model):
     name = models.CharField(max_length=100)
+    # Survey grid input key; unique per location/category so distinct names never share an input.
+    slug = models.SlugField(max_length=120, editable=False)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     subcategory = models.ForeignKey(SubCategory, on_delete=models.CASCADE, null=True, blank=True)
     location = models.ForeignKey(Location, on_delete=models.CASCADE)
@@ -75,10 +84,36 @@ class SystemModel(models.Model):
 
     class Meta:
         unique_together = ('name', 'category', 'location')
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'category', 'slug'], name='sysmodel_loc_cat_slug_uniq'),
+        ]
+        indexes = [
+            # Survey grid: filter on (location, category), ordered by name.
+            models.Index(fields=['location', 'category', 'name'], name='sysmodel_loc_cat_name_idx'),
+        ]
+
+    @staticmethod
+    def unique_slug(name, taken):
+        """Slug for `name` that is not in `taken` (a set of slugs, updated in place)."""
+        base = slugify(name, max_length=100) or 'model'
+        slug, suffix = base, 2
+        while slug in taken:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+        taken.add(slug)
+        return slug
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            taken = set(
+                SystemModel.objects.filter(location_id=self.location_id, category_id=self.category_id)
+                .exclude(pk=self.pk).values_list('slug', flat=True)
+            )
+            self.slug = self.unique_slug(self.name, taken)
+        super().save(*args, **kwargs)
 
     def __str__(self):
-        return 
-        "{self.name} ({self.category.name}) at {self.location.name}"
+        return f"{self.name} ({self.category.name}) at {self.location.name}"
 
 
 # Survey Info Model (Captures the parameters of a survey session)
@@ -90,9 +125,33 @@ class SurveyInfo(models.Model):
     # Department is now nullable for SurveyInfo as it captures overall survey params
     department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # The survey grid prefills from the latest survey for a location/category.
+            models.Index(fields=['location', 'category', 'date'], name='surveyinfo_loc_cat_date_idx'),
+        ]
+        constraints = [
+            # Submitting the same survey again updates it (baseapp.surveys.save_survey_revision).
+            # Also serves the reports, which filter surveys (and their entries) by financial year.
+            models.UniqueConstraint(
+                fields=['financial_year', 'location', 'category', 'date'], name='surveyinfo_fy_loc_cat_date_uniq',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Keeps the SurveyAggregate update (see baseapp/signals.py) in the same transaction as the row.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
     
     def __str__(self):
-        return f"Survey for {self.location.name} - {self.category.name} ({self.financial_year}) on {self.date}"
+        from .refdata import category_by_id, location_by_id  # refdata imports this module
+        location = location_by_id(self.location_id)
+        category = category_by_id(self.category_id)
+        return (
+            f"Survey for {location.name if location else 'N/A'} - {category.name if category else 'N/A'} "
+            f"({self.financial_year}) on {self.date}"
+        )
 
 
 # Survey Entry Model (Individual headcount entry for a model in a department during a survey)
@@ -114,10 +173,50 @@ class SurveyEntry(models.Model):
     class Meta:
         unique_together = ('survey_info', 'department', 'system_model')
 
+    def save(self, *args, **kwargs):
+        # Keeps the SurveyAggregate update (see baseapp/signals.py) in the same transaction as the row.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.department.name} - {self.system_model.name}: {self.headcount} (Survey: {self.survey_info.id if self.survey_info else 'N/A'})"
 
 
+# Survey Revision Model (One submission of a survey, logging only the counts it changed)
+class SurveyRevision(models.Model):
+    survey_info = models.ForeignKey(SurveyInfo, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    # [[department id, system model id, headcount before, headcount after], ...], 0 meaning no entry.
+    # Empty for the first revision: its counts are the current entries with later changes undone.
+    changes = models.JSONField(default=list, blank=True)
+    entry_count = models.PositiveIntegerField(default=0)
+    submitted_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('survey_info', 'number')
+
+    def __str__(self):
+        return f"Survey {self.survey_info_id} revision {self.number}: {len(self.changes)} change(s)"
+
+
+# Survey Aggregate Model (Materialized headcount totals per group, maintained from SurveyEntry writes)
+class SurveyAggregate(models.Model):
+    financial_year = models.CharField(max_length=9)
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    department = models.ForeignKey(Department, on_delete=models.CASCADE)
+    system_model = models.ForeignKey(SystemModel, on_delete=models.CASCADE)
+    manpower_type = models.CharField(max_length=10, choices=MANPOWER_CHOICES, default='exe')
+    headcount = models.PositiveIntegerField(default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('financial_year', 'location', 'department', 'system_model', 'manpower_type')
+
+    def __str__(self):
+        return f"{self.financial_year} - {self.department_id}/{self.system_model_id} ({self.manpower_type}): {self.headcount}"
+
+
 # Asset Request Model
 class AssetRequest(models.Model):
     ITEM_TYPE_CHOICES = [
@@ -141,10 +240,153 @@ class AssetRequest(models.Model):
     )
     remarks = models.TextField(blank=True, null=True)
 
-    indent_file = models.FileField(upload_to='uploads/', blank=True, null=True)
-    annexure_x = models.FileField(upload_to='uploads/', blank=True, null=True)
-    annexure_y = models.FileField(upload_to='uploads/', blank=True, null=True)
-    gem_file = models.FileField(upload_to='uploads/', blank=True, null=True)
+    # Approver queue (baseapp/review_queue.py): pending requests are served earliest-due first and
+    # leased to one approver at a time. submitted_at is null for requests decided before it was tracked.
+    submitted_at = models.DateTimeField(default=timezone.now, null=True, blank=True)
+    due_at = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, db_index=False, related_name='claimed_requests')
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    # Stored content-addressed (one blob per distinct file), see baseapp/storage.py
+    indent_file = models.FileField(upload_to='uploads/', storage=attachment_storage, blank=True, null=True)
+    annexure_x = models.FileField(upload_to='uploads/', storage=attachment_storage, blank=True, null=True)
+    annexure_y = models.FileField(upload_to='uploads/', storage=attachment_storage, blank=True, null=True)
+    gem_file = models.FileField(upload_to='uploads/', storage=attachment_storage, blank=True, null=True)
+
+    # Set at submission when baseapp/duplicates.py finds a probable original; shown in the review queue.
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='suspected_duplicates')
+    duplicate_score = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Review queue: status='pending' earliest-due first. Not partial: the ORM binds 'pending' as a
+            # parameter, and SQLite only uses a partial index when the query spells out its condition.
+            models.Index(fields=['status', 'due_at', 'id'], name='assetreq_queue_idx'),
+            # Live claims: an approver's own, and the count held by others.
+            models.Index(fields=['status', 'claimed_by', 'claimed_until'], name='assetreq_claims_idx'),
+            # Request report: optional financial_year filter, keyset-ordered by -date first.
+            models.Index(fields=['financial_year', '-date'], name='assetreq_fy_date_idx'),
+            models.Index(fields=['-date'], name='assetreq_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Keeps the BudgetRollup and index updates (see baseapp/signals.py) in the same transaction as the row.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Request #{self.id} - {self.location.name} - {self.department.name} - Status: {self.get_status_display()}"
+
+
+# Status Transition Model (Append-only log of AssetRequest status changes, written by baseapp/audit.py)
+class StatusTransitionQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise ValueError("Status transitions are append-only.")
+
+    def delete(self):
+        raise ValueError("Status transitions are append-only.")
+
+
+class StatusTransition(models.Model):
+    # No database constraints or cascades: entries outlive the request and user they name.
+    asset_request = models.ForeignKey(
+        AssetRequest, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='transitions',
+    )
+    from_status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    changed_by = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True, blank=True, related_name='+',
+    )
+    changed_at = models.DateTimeField(default=timezone.now)
+    remarks = models.TextField(blank=True, null=True)
+
+    objects = StatusTransitionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Per-request timeline.
+            models.Index(fields=['asset_request', 'changed_at'], name='transition_request_idx'),
+            # Per-approver throughput: covers counts by to_status over a time range.
+            models.Index(fields=['changed_by', 'changed_at', 'to_status'], name='transition_approver_idx'),
+            # Time-to-decision metrics over a time range.
+            models.Index(fields=['changed_at'], name='transition_changed_at_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Status transitions are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Status transitions are append-only.")
+
+    def __str__(self):
+        return f"Request #{self.asset_request_id}: {self.from_status} -> {self.to_status}"
+
+
+# Budget Rollup Model (Materialized estimated_cost totals per group, maintained from AssetRequest writes)
+class BudgetRollup(models.Model):
+    financial_year = models.CharField(max_length=9)
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+    department = models.ForeignKey(Department, on_delete=models.CASCADE)
+    asset_type = models.ForeignKey(Category, on_delete=models.CASCADE)
+    item_type = models.CharField(max_length=10, choices=AssetRequest.ITEM_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    total_cost = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    request_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('financial_year', 'location', 'department', 'asset_type', 'item_type', 'status')
+
+    def __str__(self):
+        return f"{self.financial_year} - {self.department_id}/{self.asset_type_id} ({self.item_type}, {self.status}): {self.total_cost}"
+
+
+# Asset Request Search Term Model (Inverted index used by baseapp/search.py where SQLite FTS5 is unavailable)
+class AssetRequestSearchTerm(models.Model):
+    term = models.CharField(max_length=64)
+    asset_request = models.ForeignKey(AssetRequest, on_delete=models.CASCADE, related_name='search_terms')
+
+    class Meta:
+        # Leading 'term' serves the prefix range scans; the pair keeps each term once per request.
+        unique_together = ('term', 'asset_request')
+
+    def __str__(self):
+        return f"{self.term} -> Request #{self.asset_request_id}"
+
+
+# Asset Request Fingerprint Model (MinHash signature and attachment digests used by baseapp/duplicates.py)
+class AssetRequestFingerprint(models.Model):
+    asset_request = models.OneToOneField(AssetRequest, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    minhash = models.BinaryField(null=True)
+    attachment_digests = models.TextField(blank=True, default='')  # space-separated SHA-256 hex digests
+
+    def __str__(self):
+        return f"Fingerprint of Request #{self.asset_request_id}"
+
+
+# Asset Request Bucket Model (LSH band / attachment keys; requests sharing a key are duplicate candidates)
+class AssetRequestBucket(models.Model):
+    key = models.BigIntegerField(db_index=True)
+    asset_request = models.ForeignKey(AssetRequest, on_delete=models.CASCADE, related_name='duplicate_buckets')
+
+    def __str__(self):
+        return f"{self.key} -> Request #{self.asset_request_id}"
+
+
+# Chunked Upload Model (An attachment uploaded in pieces before the request form is submitted)
+class ChunkedUpload(models.Model):
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
 
     def __str__(self):
-        return f"Request #{self.id} - {self.location.name} - {self.department.name} - Status: {self.get_status_display()}"
\ No newline at end of file
+        return f"{self.filename} ({self.received}/{self.size} bytes)"
@@ -0,0 +1,104 @@
+# baseapp/pagination.py
+
+from django.core import signing
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """Raised when a pagination cursor is malformed or has been tampered with."""
+
+
+class KeysetPage:
+    """A single page of results produced by KeysetPaginator."""
+
+    def __init__(self, object_list, next_cursor, is_first):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Forward-only paginator that seeks past the last row of the previous page
+    instead of using OFFSET, so every page costs the same regardless of depth.
+
+    `ordering` must be a total order (end it with a unique field such as 'id')
+    and none of its fields may be NULL.
+    """
+    salt = 'baseapp.pagination.cursor'
+
+    def __init__(self, queryset, ordering, per_page=100):
+        self.ordering = tuple(ordering)
+        self.queryset = queryset.order_by(*self.ordering)
+        self.per_page = per_page
+        self.fields = [(key.lstrip('-'), key.startswith('-')) for key in self.ordering]
+
+    def _value(self, obj, path):
+        for attr in path.split('__'):
+            obj = getattr(obj, attr)
+        return obj.isoformat() if hasattr(obj, 'isoformat') else obj
+
+    def encode_cursor(self, obj):
+        """Returns an opaque, signed cursor pointing just past `obj`."""
+        return signing.dumps([self._value(obj, name) for name, _ in self.fields], salt=self.salt)
+
+    def decode_cursor(self, cursor):
+        try:
+            values = signing.loads(cursor, salt=self.salt)
+        except signing.BadSignature:
+            raise InvalidCursor(cursor)
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        return values
+
+    def _seek_filter(self, values):
+        # (a, b, c) > (x, y, z) expanded per column so mixed ASC/DESC keys work.
+        seek = Q()
+        equal = {}
+        for (name, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending else 'gt'
+            seek |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return seek
+
+    def _page_queryset(self, cursor):
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._seek_filter(self.decode_cursor(cursor)))
+        return queryset[:self.per_page + 1]
+
+    def _make_page(self, rows, cursor):
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.encode_cursor(rows[-1])
+        return KeysetPage(rows, next_cursor, is_first=not cursor)
+
+    def page(self, cursor=None):
+        """Returns the page that starts right after `cursor` (or the first page)."""
+        return self._make_page(list(self._page_queryset(cursor)), cursor)
+
+    async def apage(self, cursor=None):
+        """Async version of page(), for async views."""
+        return self._make_page([obj async for obj in self._page_queryset(cursor)], cursor)
+
+    def chunks(self, chunk_size=500):
+        """Yields the whole ordered result set as lists of at most `chunk_size` rows."""
+        chunk = []
+        for obj in self.queryset.iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
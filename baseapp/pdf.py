@@ -0,0 +1,25 @@
+# baseapp/pdf.py
+# Runs inside receipt worker processes, so it must not import Django models.
+
+import os
+import tempfile
+
+
+def write_pdf(html, path):
+    """Converts `html` to a PDF at `path`, writing to a temp file first so readers never see a partial file."""
+    from xhtml2pdf import pisa
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            result = pisa.CreatePDF(html, dest=output, encoding='utf-8')
+        if result.err:
+            raise RuntimeError(f"xhtml2pdf reported {result.err} error(s)")
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return path
@@ -0,0 +1,157 @@
+# baseapp/receipts.py
+
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.template import loader
+
+from .models import AssetRequest, SurveyEntry, SurveyInfo
+from .pdf import write_pdf
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_in_flight = {}
+_lock = threading.RLock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # 'spawn' keeps workers free of the parent's DB connections and threads.
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.RECEIPT_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def _version(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16]
+
+
+class Receipt:
+    """A PDF receipt for one object; its path changes whenever the rendered content would."""
+
+    def __init__(self, kind, pk, version, template_name, context):
+        self.kind = kind
+        self.pk = pk
+        self.version = version
+        self.template_name = template_name
+        self.context = context
+
+    @property
+    def path(self):
+        return os.path.join(settings.RECEIPT_CACHE_DIR, f'{self.kind}-{self.pk}-{self.version}.pdf')
+
+    @property
+    def filename(self):
+        return f'{self.kind}-receipt-{self.pk}.pdf'
+
+    def is_cached(self):
+        return os.path.exists(self.path)
+
+    def render(self):
+        """
+        Returns a Future for the cached PDF, starting a background render if needed.
+
+        Only the template is rendered here; the CPU-heavy HTML -> PDF conversion
+        runs in the worker pool. Concurrent callers share one render.
+        """
+        path = self.path
+        with _lock:
+            future = _in_flight.get(path)
+            if future is not None:
+                return future
+
+        html = loader.render_to_string(self.template_name, self.context)
+        with _lock:
+            future = _in_flight.get(path)
+            if future is None:
+                future = _get_executor().submit(write_pdf, html, path)
+                _in_flight[path] = future
+                future.add_done_callback(lambda done: self._finished(done))
+        return future
+
+    def _finished(self, future):
+        with _lock:
+            _in_flight.pop(self.path, None)
+        if future.exception() is not None:
+            logger.error(f"Rendering {self.filename} failed: {future.exception()}")
+            return
+        # Older versions of this receipt can never be served again.
+        for stale in glob.glob(os.path.join(settings.RECEIPT_CACHE_DIR, f'{self.kind}-{self.pk}-*.pdf')):
+            if stale != self.path:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+
+def request_receipt(asset_request):
+    """Receipt for an AssetRequest (select_related location/department/asset_type to avoid extra queries)."""
+    version = _version(
+        asset_request.location_id, asset_request.department_id, asset_request.asset_type_id,
+        asset_request.financial_year, asset_request.description, str(asset_request.estimated_cost),
+        asset_request.item_type, str(asset_request.date), asset_request.status, asset_request.remarks,
+        asset_request.indent_file.name, asset_request.annexure_x.name, asset_request.annexure_y.name,
+        asset_request.gem_file.name, asset_request.location.name, asset_request.department.name,
+        asset_request.asset_type.name,
+    )
+    return Receipt('request', asset_request.pk, version, 'request_receipt_pdf.html', {'request_entry': asset_request})
+
+
+def _survey_entries(survey_info):
+    return (
+        SurveyEntry.objects.filter(survey_info=survey_info)
+        .select_related('department', 'system_model')
+        .order_by('department__name', 'system_model__name')
+    )
+
+
+def survey_receipt(survey_info):
+    """Receipt for a SurveyInfo and its entries."""
+    return _survey_receipt(survey_info, list(_survey_entries(survey_info)))
+
+
+async def asurvey_receipt(survey_info):
+    """Async version of survey_receipt(), for async views."""
+    return _survey_receipt(survey_info, [entry async for entry in _survey_entries(survey_info)])
+
+
+def _survey_receipt(survey_info, entries):
+    version = _version(
+        survey_info.financial_year, str(survey_info.date), survey_info.location_id, survey_info.category_id,
+        [(entry.pk, entry.department.name, entry.system_model.name, entry.manpower_type, entry.headcount)
+         for entry in entries],
+    )
+    return Receipt('survey', survey_info.pk, version, 'survey_receipt_pdf.html', {
+        'survey_info': survey_info,
+        'survey_entries': entries,
+        'total_headcount': sum(entry.headcount for entry in entries),
+    })
+
+
+def prerender_request_receipt(asset_request_id):
+    """Warms the cache right after a request is saved (call via transaction.on_commit)."""
+    try:
+        asset_request = AssetRequest.objects.select_related('location', 'department', 'asset_type').get(pk=asset_request_id)
+        request_receipt(asset_request).render()
+    except Exception as e:
+        logger.warning(f"Could not pre-render receipt for request {asset_request_id}: {e}")
+
+
+def prerender_survey_receipt(survey_info_id):
+    """Warms the cache right after a survey is saved (call via transaction.on_commit)."""
+    try:
+        survey_info = SurveyInfo.objects.select_related('location', 'category').get(pk=survey_info_id)
+        survey_receipt(survey_info).render()
+    except Exception as e:
+        logger.warning(f"Could not pre-render receipt for survey {survey_info_id}: {e}")
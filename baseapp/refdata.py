@@ -0,0 +1,151 @@
+# baseapp/refdata.py
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Category, Department, Location, SystemModel
+
+VERSION_KEY = 'baseapp:refdata:version'
+
+
+class ReferenceCache:
+    """
+    Process-local cache for small, rarely-changing reference tables.
+
+    Entries are dropped on invalidate() (wired to model signals) and, in
+    process-local mode, after REFDATA_LOCAL_TTL seconds so that other worker
+    processes pick up changes eventually. When REFDATA_CACHE_ALIAS names a
+    Django cache, values are shared through it and a version counter stored
+    there makes invalidation immediate across processes.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = getattr(settings, 'REFDATA_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    def _version(self, shared):
+        if shared is None:
+            return None
+        version = shared.get(VERSION_KEY)
+        if version is None:
+            shared.add(VERSION_KEY, 1, timeout=None)
+            version = shared.get(VERSION_KEY, 1)
+        return version
+
+    def get(self, name, loader):
+        shared = self.shared
+        version = self._version(shared)
+        now = time.monotonic()
+
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version and (shared is not None or entry[1] > now):
+            return entry[2]
+
+        value = None
+        if shared is not None:
+            value = shared.get(f'baseapp:refdata:{version}:{name}')
+        if value is None:
+            value = loader()
+            if shared is not None:
+                shared.set(f'baseapp:refdata:{version}:{name}', value, timeout=None)
+
+        ttl = getattr(settings, 'REFDATA_LOCAL_TTL', 300)
+        with self._lock:
+            self._entries[name] = (version, now + ttl, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+        shared = self.shared
+        if shared is not None:
+            try:
+                shared.incr(VERSION_KEY)
+            except ValueError:
+                shared.set(VERSION_KEY, 1, timeout=None)
+
+
+_cache = ReferenceCache()
+
+
+def invalidate():
+    """Drops cached reference data now and again once the current transaction commits."""
+    _cache.invalidate()
+    transaction.on_commit(_cache.invalidate)
+
+
+def cached(name, loader):
+    """Caches `loader()`, a value derived only from reference data, until reference data next changes."""
+    return _cache.get(name, loader)
+
+
+# --- Lookups ---
+def locations():
+    return _cache.get('locations', lambda: list(Location.objects.order_by('name')))
+
+
+def departments():
+    return _cache.get('departments', lambda: list(Department.objects.select_related('location').order_by('name')))
+
+
+def categories():
+    return _cache.get('categories', lambda: list(Category.objects.order_by('name')))
+
+
+def departments_for_location(location_id):
+    return [department for department in departments() if department.location_id == location_id]
+
+
+class SystemModelIndex:
+    """Name <-> slug <-> id lookups for the SystemModels of one location/category."""
+
+    def __init__(self, rows):
+        # rows: (id, name, slug) tuples in name order
+        self.names = [name for _, name, _ in rows]
+        self.slugs = [slug for _, _, slug in rows]
+        self.by_slug = {slug: (pk, name) for pk, name, slug in rows}
+        self.by_name = {name: (pk, slug) for pk, name, slug in rows}
+        self.by_id = {pk: (name, slug) for pk, name, slug in rows}
+
+    def __len__(self):
+        return len(self.names)
+
+
+def system_models(location_id, category_id):
+    return _cache.get(f'system_models:{location_id}:{category_id}', lambda: SystemModelIndex(list(
+        SystemModel.objects.filter(location_id=location_id, category_id=category_id)
+        .order_by('name').values_list('id', 'name', 'slug')
+    )))
+
+
+def model_names(location_id, category_id):
+    """SystemModel names for a location/category, in name order."""
+    return system_models(location_id, category_id).names
+
+
+def _by_id(objects, pk):
+    for obj in objects:
+        if obj.pk == pk:
+            return obj
+    return None
+
+
+def location_by_id(pk):
+    return _by_id(locations(), pk)
+
+
+def category_by_id(pk):
+    return _by_id(categories(), pk)
+
+
+def department_by_id(pk):
+    return _by_id(departments(), pk)
@@ -0,0 +1,82 @@
+# baseapp/reports.py
+
+from django.db.models import Count, Sum
+
+
+class SurveyPivot:
+    """Department x system-model headcount matrix with row, column and overall totals."""
+
+    def __init__(self, headers, rows, column_totals, overall_total, total_entries):
+        self.headers = headers
+        self.rows = rows
+        self.column_totals = column_totals
+        self.overall_total = overall_total
+        self.total_entries = total_entries
+
+    def as_context(self):
+        """Returns the context variables consolidated_report.html expects."""
+        return {
+            'survey_data_headers': self.headers,
+            'survey_data_rows': self.rows,
+            'model_totals': self.column_totals,
+            'overall_total': self.overall_total,
+            'total_entries': self.total_entries,
+        }
+
+
+def _grouped(queryset, row_field, column_field, value_field, count_field):
+    return (
+        queryset.order_by()
+        .values(row_field, column_field)
+        .annotate(total=Sum(value_field), entries=Sum(count_field) if count_field else Count('pk'))
+    )
+
+
+def build_survey_pivot(queryset, row_field='department__name', column_field='system_model__name',
+                       value_field='headcount', count_field=None):
+    """
+    Pivots `queryset` into a SurveyPivot using a single GROUP BY query.
+
+    Only one row per (row, column) group is pulled into Python, so memory grows
+    with the number of departments and models rather than the number of entries.
+    `count_field` names a pre-aggregated entry count (SurveyAggregate.entry_count);
+    without it the rows themselves are counted.
+    """
+    groups = _grouped(queryset, row_field, column_field, value_field, count_field)
+    return _pivot(groups, row_field, column_field)
+
+
+async def abuild_survey_pivot(queryset, row_field='department__name', column_field='system_model__name',
+                              value_field='headcount', count_field=None):
+    """Async version of build_survey_pivot(), for async views."""
+    groups = [group async for group in _grouped(queryset, row_field, column_field, value_field, count_field)]
+    return _pivot(groups, row_field, column_field)
+
+
+def _pivot(groups, row_field, column_field):
+    matrix = {}
+    headers = set()
+    total_entries = 0
+    for group in groups:
+        row_key = group[row_field]
+        column_key = group[column_field]
+        headers.add(column_key)
+        cells = matrix.setdefault(row_key, {})
+        cells[column_key] = cells.get(column_key, 0) + (group['total'] or 0)
+        total_entries += group['entries']
+
+    headers = sorted(headers)
+    column_totals = [0] * len(headers)
+    rows = []
+    for row_key in sorted(matrix):
+        cells = matrix[row_key]
+        counts_list = [cells.get(column_key, 0) for column_key in headers]
+        for index, count in enumerate(counts_list):
+            column_totals[index] += count
+        rows.append({
+            'department': row_key,
+            'counts_list': counts_list,
+            'dept_total': sum(counts_list),
+        })
+
+    return SurveyPivot(headers, rows, column_totals, sum(column_totals), total_entries)
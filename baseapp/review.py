@@ -0,0 +1,76 @@
+# baseapp/review.py
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import audit, budgets, search
+from .models import AssetRequest
+
+# Approver actions and the status each one moves a pending request to.
+REVIEW_ACTIONS = {
+    'approve': 'approved',
+    'reject': 'rejected',
+    'mark_duplicate': 'duplicate',
+}
+
+
+class ReviewError(ValueError):
+    """Raised for an unknown review action or malformed request ids."""
+
+
+def parse_request_ids(values):
+    """Converts submitted ids to a de-duplicated, non-empty list of ints, preserving order."""
+    if not isinstance(values, (list, tuple)):
+        raise ReviewError("Request ids must be a list.")
+    try:
+        ids = [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise ReviewError("Request ids must be integers.")
+    if not ids:
+        raise ReviewError("Select at least one request.")
+    return list(dict.fromkeys(ids))
+
+
+def apply_review_action(request_ids, action, remarks=None, changed_by=None):
+    """
+    Moves every still-pending request in `request_ids` to the status for `action`.
+
+    Locks the still-pending rows, then runs a single UPDATE ... WHERE id IN (...)
+    AND status = 'pending', so requests already decided by another approver are
+    left untouched. When `changed_by` is given, only requests `changed_by` holds
+    a live claim on (see baseapp/review_queue.py) are decided; unclaimed ones
+    must be claimed from the queue first. The budget rollup and
+    search index, which .update() does not signal, are adjusted in the same
+    transaction, and one StatusTransition per request is appended for
+    `changed_by` from the rows already locked.
+    Returns (new_status, number_of_requests_updated).
+    """
+    if action not in REVIEW_ACTIONS:
+        raise ReviewError(f"Unknown review action: {action!r}")
+    new_status = REVIEW_ACTIONS[action]
+    if not request_ids:
+        return new_status, 0
+
+    requests = AssetRequest.objects.filter(id__in=request_ids, status='pending')
+    if changed_by is not None:
+        requests = requests.filter(claimed_by=changed_by, claimed_until__gt=timezone.now())
+
+    with transaction.atomic():
+        pending = list(
+            requests.select_for_update().values_list('id', 'estimated_cost', *budgets.ROLLUP_KEY_FIELDS)
+        )
+        if not pending:
+            return new_status, 0
+        pending_ids = [row[0] for row in pending]
+        updated = requests.filter(id__in=pending_ids).update(
+            status=new_status,
+            remarks=remarks or None,
+            claimed_by=None,
+            claimed_until=None,
+        )
+        budgets.apply_deltas(budgets.transition_deltas([row[1:] for row in pending], new_status))
+        search.reindex(pending_ids)
+        audit.record_transitions(
+            [(request_id, 'pending', new_status) for request_id in pending_ids], changed_by=changed_by, remarks=remarks,
+        )
+    return new_status, updated
@@ -0,0 +1,157 @@
+# baseapp/review_queue.py
+
+import statistics
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import AssetRequest, StatusTransition
+
+REVIEW_LIST_FIELDS = ('location', 'department', 'asset_type')
+
+
+def review_hours(estimated_cost, item_type):
+    """Hours a request of this cost and item type may wait for a decision."""
+    hours = settings.REVIEW_SLA_HOURS[item_type]
+    for min_cost, tier_hours in settings.REVIEW_SLA_COST_TIERS:
+        if estimated_cost >= min_cost:
+            return min(hours, tier_hours)
+    return hours
+
+
+def schedule(asset_request):
+    """Sets due_at on a pending request from its submission time, cost and item type; drops the claim on a decided one."""
+    if asset_request.status != 'pending':
+        asset_request.claimed_by, asset_request.claimed_until = None, None
+        return
+    submitted_at = asset_request.submitted_at or timezone.make_aware(datetime.combine(asset_request.date, time.min))
+    asset_request.due_at = submitted_at + timedelta(
+        hours=review_hours(asset_request.estimated_cost, asset_request.item_type),
+    )
+
+
+def reschedule(batch_size=500):
+    """Recomputes due_at for every pending request, e.g. after the SLA settings change. Returns the count."""
+    pending = AssetRequest.objects.filter(status='pending').only(
+        'id', 'status', 'date', 'submitted_at', 'estimated_cost', 'item_type', 'due_at',
+    )
+    updated = 0
+    with transaction.atomic():
+        batch = []
+        for asset_request in pending.iterator(chunk_size=batch_size):
+            schedule(asset_request)
+            batch.append(asset_request)
+            if len(batch) >= batch_size:
+                updated += AssetRequest.objects.bulk_update(batch, ['due_at'])
+                batch = []
+        if batch:
+            updated += AssetRequest.objects.bulk_update(batch, ['due_at'])
+    return updated
+
+
+def _claimable(now):
+    return Q(claimed_until__isnull=True) | Q(claimed_until__lte=now)
+
+
+def unclaimed(now=None):
+    """Pending requests nobody holds a live claim on, earliest-due first (served by the queue index)."""
+    return AssetRequest.objects.filter(_claimable(now or timezone.now()), status='pending').order_by('due_at', 'id')
+
+
+def claimed(user, now=None):
+    """Pending requests `user` holds a live claim on, earliest-due first."""
+    now = now or timezone.now()
+    return (
+        AssetRequest.objects.filter(status='pending', claimed_by=user, claimed_until__gt=now)
+        .select_related(*REVIEW_LIST_FIELDS).order_by('due_at', 'id')
+    )
+
+
+def claim_next(user, count=None):
+    """
+    Tops `user`'s claims up to `count` (REVIEW_CLAIM_BATCH) with the earliest-due
+    unclaimed requests and renews the lease on all of them for REVIEW_CLAIM_MINUTES.
+
+    The candidates come off the queue index in due order; the UPDATE
+    re-checks that each is still pending and unclaimed, so a request another
+    approver claimed in between is skipped rather than taken over.
+    Returns the number of requests `user` now holds.
+    """
+    count = count or settings.REVIEW_CLAIM_BATCH
+    now = timezone.now()
+    with transaction.atomic():
+        held = AssetRequest.objects.filter(status='pending', claimed_by=user, claimed_until__gt=now).count()
+        candidates = []
+        if held < count:
+            candidates = list(
+                unclaimed(now).select_for_update(skip_locked=True).values_list('id', flat=True)[:count - held]
+            )
+        return AssetRequest.objects.filter(
+            (Q(id__in=candidates) & _claimable(now)) | Q(claimed_by=user, claimed_until__gt=now),
+            status='pending',
+        ).update(claimed_by=user, claimed_until=now + timedelta(minutes=settings.REVIEW_CLAIM_MINUTES))
+
+
+def release(user, request_ids=None):
+    """Returns `user`'s claims (or only those in `request_ids`) to the queue. Returns the count."""
+    requests = AssetRequest.objects.filter(status='pending', claimed_by=user)
+    if request_ids is not None:
+        requests = requests.filter(id__in=request_ids)
+    return requests.update(claimed_by=None, claimed_until=None)
+
+
+def queue_summary(user, now=None):
+    """Pending, overdue and claimed-by-others counts for the review page header."""
+    now = now or timezone.now()
+    pending = AssetRequest.objects.filter(status='pending')
+    # Two queries, each answered from one index without visiting the table rows.
+    summary = pending.aggregate(pending=Count('id'), overdue=Count('id', filter=Q(due_at__lt=now)))
+    summary['claimed_by_others'] = (
+        pending.filter(claimed_by__isnull=False, claimed_until__gt=now).exclude(claimed_by=user).count()
+    )
+    return summary
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def decision_metrics(since=None, until=None, now=None):
+    """
+    Time-to-decision of the requests decided between `since` and `until`, from
+    the status transition log (hours from submission to leaving 'pending'), how
+    many were decided after their due time, and how many pending ones are overdue.
+    A request sent back to 'pending' and decided again counts once, by its latest decision.
+    """
+    now = now or timezone.now()
+    latest = StatusTransition.objects.filter(
+        asset_request_id=OuterRef('asset_request_id'), from_status='pending',
+    ).order_by('-changed_at', '-pk').values('pk')[:1]
+    decisions = StatusTransition.objects.filter(
+        from_status='pending', asset_request__submitted_at__isnull=False, pk=Subquery(latest),
+    )
+    if since is not None:
+        decisions = decisions.filter(changed_at__gte=since)
+    if until is not None:
+        decisions = decisions.filter(changed_at__lt=until)
+    hours, breached, by_status = [], 0, {}
+    for changed_at, to_status, submitted_at, due_at in decisions.values_list(
+        'changed_at', 'to_status', 'asset_request__submitted_at', 'asset_request__due_at',
+    ).iterator():
+        hours.append((changed_at - submitted_at).total_seconds() / 3600)
+        breached += due_at is not None and changed_at > due_at
+        by_status[to_status] = by_status.get(to_status, 0) + 1
+    hours.sort()
+    return {
+        'decisions': len(hours),
+        'by_status': by_status,
+        'mean_hours': round(statistics.fmean(hours), 2) if hours else None,
+        'p50_hours': round(_percentile(hours, 0.5), 2) if hours else None,
+        'p95_hours': round(_percentile(hours, 0.95), 2) if hours else None,
+        'max_hours': round(hours[-1], 2) if hours else None,
+        'decided_after_due': breached,
+        'pending_overdue': AssetRequest.objects.filter(status='pending', due_at__lt=now).count(),
+    }
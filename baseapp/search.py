@@ -0,0 +1,150 @@
+# baseapp/search.py
+
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import AssetRequest, AssetRequestSearchTerm
+
+# SQLite FTS5 table over the searchable text of each request; rowid = AssetRequest.id.
+FTS_TABLE = 'baseapp_assetrequest_fts'
+FTS_COLUMNS = ('description', 'remarks', 'location', 'department', 'category')
+# AssetRequest values feeding FTS_COLUMNS (in order), after the id.
+SOURCE_FIELDS = ('id', 'description', 'remarks', 'location__name', 'department__name', 'asset_type__name')
+
+MAX_QUERY_TOKENS = 8
+MAX_TERM_LENGTH = 64
+REINDEX_BATCH_SIZE = 1000
+
+_WORD = re.compile(r'[^\W_]+')  # letters and digits; FTS5's unicode61 splits on '_' too
+
+
+def uses_fts():
+    return connection.vendor == 'sqlite'
+
+
+def tokenize(text):
+    """Lower-cased, accent-stripped words, as both the FTS5 tokenizer and the fallback index see them."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [word[:MAX_TERM_LENGTH] for word in _WORD.findall(text.lower())]
+
+
+# --- Querying ---
+
+def _fts_query(tokens):
+    # Every word must match, each as a prefix ("lapt" finds "laptop"); quoting keeps FTS5 syntax inert.
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def filter_requests(queryset, query):
+    """
+    Narrows an AssetRequest queryset to requests matching every word of `query`.
+
+    Words are matched as prefixes against the description, remarks and the
+    location, department and category names. The lookup is a subquery on the
+    search index, so the caller's ordering and pagination still apply.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return queryset
+    if uses_fts():
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [_fts_query(tokens)]
+        ))
+    for token in tokens:
+        # A range instead of LIKE 'x%' so any database can use the (term, asset_request) index.
+        queryset = queryset.filter(id__in=AssetRequestSearchTerm.objects.filter(
+            term__gte=token, term__lt=token + '\uffff',
+        ).values('asset_request_id'))
+    return queryset
+
+
+# --- Index maintenance (wired to model signals in baseapp/signals.py) ---
+
+def _delete(request_ids):
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in request_ids])
+    else:
+        AssetRequestSearchTerm.objects.filter(asset_request_id__in=request_ids).delete()
+
+
+def _insert(rows):
+    if uses_fts():
+        placeholders = ', '.join(['%s'] * (len(FTS_COLUMNS) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)}) VALUES ({placeholders})',
+                [tuple(value or '' for value in row) for row in rows],
+            )
+        return
+    terms = []
+    for pk, *texts in rows:
+        for term in set(tokenize(' '.join(text or '' for text in texts))):
+            terms.append(AssetRequestSearchTerm(term=term, asset_request_id=pk))
+    AssetRequestSearchTerm.objects.bulk_create(terms, batch_size=REINDEX_BATCH_SIZE)
+
+
+def _index(queryset, replace):
+    batch = []
+    for row in queryset.order_by().values_list(*SOURCE_FIELDS).iterator(chunk_size=REINDEX_BATCH_SIZE):
+        batch.append(row)
+        if len(batch) >= REINDEX_BATCH_SIZE:
+            if replace:
+                _delete([row[0] for row in batch])
+            _insert(batch)
+            batch = []
+    if batch:
+        if replace:
+            _delete([row[0] for row in batch])
+        _insert(batch)
+
+
+def reindex_requests(queryset):
+    """(Re)builds the index entries of every request in `queryset`, in batches."""
+    _index(queryset, replace=True)
+
+
+def reindex(request_ids):
+    """Refreshes the index for the given request ids (e.g. after a queryset .update())."""
+    request_ids = list(request_ids)
+    if request_ids:
+        reindex_requests(AssetRequest.objects.filter(id__in=request_ids))
+
+
+def index_new(asset_request):
+    """
+    Indexes a just-created request. It has no entries to replace, and when its
+    location, department and category are already loaded (as they are from the
+    request form) the row comes from the instance instead of being read back.
+    """
+    relations = [AssetRequest._meta.get_field(name) for name in ('location', 'department', 'asset_type')]
+    if not all(field.is_cached(asset_request) for field in relations):
+        _index(AssetRequest.objects.filter(pk=asset_request.pk), replace=False)
+        return
+    _insert([(
+        asset_request.pk, asset_request.description, asset_request.remarks,
+        *(getattr(asset_request, field.name).name for field in relations),
+    )])
+
+
+def remove(request_ids):
+    request_ids = list(request_ids)
+    if request_ids:
+        _delete(request_ids)
+
+
+def rebuild():
+    """Empties and refills the whole index. Returns the number of requests indexed."""
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    else:
+        AssetRequestSearchTerm.objects.all().delete()
+    _index(AssetRequest.objects.all(), replace=False)
+    return AssetRequest.objects.count()
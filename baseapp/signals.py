@@ -0,0 +1,230 @@
+# baseapp/signals.py
+
+import threading
+from contextlib import contextmanager
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import aggregates, audit, budgets, duplicates, refdata, review_queue, search
+from .models import AssetRequest, Category, Department, Location, SurveyEntry, SurveyInfo, SystemModel
+
+# Surveys whose entries are being deleted with the aggregates settled in one go: cascades from a
+# survey delete (in pre_delete) and entries_removed_by_caller() blocks.
+_local = threading.local()
+
+
+def _surveys_being_deleted():
+    if not hasattr(_local, 'survey_ids'):
+        _local.survey_ids = set()
+    return _local.survey_ids
+
+
+@contextmanager
+def entries_removed_by_caller(survey_info_id):
+    """Entry deletes of this survey inside the block skip the per-entry aggregate update; the caller applies the deltas."""
+    survey_ids = _surveys_being_deleted()
+    survey_ids.add(survey_info_id)
+    try:
+        yield
+    finally:
+        survey_ids.discard(survey_info_id)
+
+
+def _financial_year(survey_info_id):
+    if survey_info_id is None:
+        return None
+    return SurveyInfo.objects.filter(pk=survey_info_id).values_list('financial_year', flat=True).first()
+
+
+# --- SurveyAggregate maintenance for single-row writes (admin edits, shell, fixtures) ---
+# Bulk saves from the survey form call baseapp.aggregates.add_entries directly.
+
+@receiver(pre_save, sender=SurveyEntry)
+def remember_previous_entry(sender, instance, raw=False, **kwargs):
+    instance._aggregate_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._aggregate_previous = SurveyEntry.objects.filter(pk=instance.pk).values_list(
+        'survey_info__financial_year', 'location_id', 'department_id', 'system_model_id', 'manpower_type',
+        'headcount',
+    ).first()
+
+
+@receiver(post_save, sender=SurveyEntry)
+def update_aggregates_on_entry_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = aggregates.new_deltas()
+    previous = getattr(instance, '_aggregate_previous', None)
+    if previous:
+        deltas[previous[:5]][0] -= previous[5]
+        deltas[previous[:5]][1] -= 1
+    if instance.survey_info_id is not None:
+        key = aggregates.entry_key(instance, instance.survey_info.financial_year)
+        deltas[key][0] += instance.headcount
+        deltas[key][1] += 1
+    aggregates.apply_deltas(deltas)
+
+
+def _deletion_started_from_surveys(origin):
+    # The delete began at SurveyInfo rows, so every entry reached is one of theirs.
+    return (origin.model if isinstance(origin, QuerySet) else type(origin)) is SurveyInfo
+
+
+@receiver(post_delete, sender=SurveyEntry)
+def update_aggregates_on_entry_delete(sender, instance, origin=None, **kwargs):
+    # The nullable survey_info FK lets Django delete a survey before its entries (after
+    # forget_deleted_survey), so also check where the delete started.
+    if instance.survey_info_id in _surveys_being_deleted() or _deletion_started_from_surveys(origin):
+        return
+    key = aggregates.entry_key(instance, _financial_year(instance.survey_info_id))
+    aggregates.apply_deltas({key: [-instance.headcount, -1]})
+
+
+@receiver(pre_save, sender=SurveyInfo)
+def remember_previous_financial_year(sender, instance, raw=False, **kwargs):
+    instance._aggregate_previous_year = None
+    if not raw and instance.pk is not None:
+        instance._aggregate_previous_year = _financial_year(instance.pk)
+
+
+@receiver(post_save, sender=SurveyInfo)
+def move_aggregates_on_financial_year_change(sender, instance, created=False, raw=False, **kwargs):
+    previous_year = getattr(instance, '_aggregate_previous_year', None)
+    if raw or created or previous_year is None or previous_year == instance.financial_year:
+        return
+    deltas = aggregates.survey_deltas(instance.pk, previous_year, sign=-1)
+    aggregates.survey_deltas(instance.pk, instance.financial_year, deltas=deltas)
+    aggregates.apply_deltas(deltas)
+
+
+@receiver(pre_delete, sender=SurveyInfo)
+def remove_survey_from_aggregates(sender, instance, **kwargs):
+    _surveys_being_deleted().add(instance.pk)
+    aggregates.apply_deltas(aggregates.survey_deltas(instance.pk, instance.financial_year, sign=-1))
+
+
+@receiver(post_delete, sender=SurveyInfo)
+def forget_deleted_survey(sender, instance, **kwargs):
+    _surveys_being_deleted().discard(instance.pk)
+
+
+# --- BudgetRollup maintenance for single-row writes (form submissions, admin edits incl. list_editable) ---
+# Review actions use queryset .update() and adjust the rollup (and log transitions) in baseapp.review.
+
+@receiver(pre_save, sender=AssetRequest)
+def remember_previous_request(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = AssetRequest.objects.filter(pk=instance.pk).values_list(
+        'estimated_cost', *budgets.ROLLUP_KEY_FIELDS,
+    ).first()
+
+
+@receiver(post_save, sender=AssetRequest)
+def update_rollup_on_request_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = budgets.new_deltas()
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        deltas[tuple(previous[1:])][0] -= previous[0]
+        deltas[tuple(previous[1:])][1] -= 1
+    key = budgets.request_key(instance)
+    deltas[key][0] += instance.estimated_cost
+    deltas[key][1] += 1
+    budgets.apply_deltas(deltas)
+
+
+@receiver(post_save, sender=AssetRequest)
+def record_status_transition(sender, instance, raw=False, **kwargs):
+    # The previous status is the last rollup key field, already read in remember_previous_request.
+    previous = getattr(instance, '_rollup_previous', None)
+    if raw or not previous or previous[-1] == instance.status:
+        return
+    audit.record_transitions(
+        [(instance.pk, previous[-1], instance.status)],
+        changed_by=getattr(instance, '_changed_by', None), remarks=instance.remarks,
+    )
+
+
+@receiver(pre_delete, sender=AssetRequest)
+def remember_deleted_request(sender, instance, origin=None, **kwargs):
+    # An instance deleted directly may be stale (e.g. decided since by a review .update()); rows
+    # the collector fetched for a queryset or cascading delete are current, so only re-read the former.
+    instance._rollup_previous = None
+    if origin is instance:
+        instance._rollup_previous = AssetRequest.objects.filter(pk=instance.pk).values_list(
+            'estimated_cost', *budgets.ROLLUP_KEY_FIELDS,
+        ).first()
+
+
+@receiver(post_delete, sender=AssetRequest)
+def update_rollup_on_request_delete(sender, instance, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        budgets.apply_deltas({tuple(previous[1:]): [-previous[0], -1]})
+    else:
+        budgets.apply_deltas({budgets.request_key(instance): [-instance.estimated_cost, -1]})
+
+
+# --- Approver queue scheduling (single-row writes; see baseapp/review_queue.py) ---
+
+@receiver(pre_save, sender=AssetRequest)
+def schedule_review(sender, instance, raw=False, **kwargs):
+    if not raw:
+        review_queue.schedule(instance)
+
+
+# --- Reference-data cache invalidation ---
+
+@receiver([post_save, post_delete], sender=Location)
+@receiver([post_save, post_delete], sender=Department)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=SystemModel)
+def invalidate_reference_data(sender, **kwargs):
+    refdata.invalidate()
+
+
+# --- Search and duplicate index maintenance ---
+# Queryset .update() calls (e.g. baseapp.review) skip these and call search.reindex themselves.
+
+# AssetRequest field pointing at each model whose name is indexed with the request.
+_INDEXED_NAME_FIELDS = {Location: 'location', Department: 'department', Category: 'asset_type'}
+
+
+@receiver(post_save, sender=AssetRequest)
+def index_request_on_save(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        if created:
+            search.index_new(instance)
+        else:
+            search.reindex([instance.pk])
+        duplicates.index_request(instance, created=created)
+
+
+@receiver(post_delete, sender=AssetRequest)
+def remove_request_from_index(sender, instance, **kwargs):
+    search.remove([instance.pk])
+
+
+@receiver(pre_save, sender=Location)
+@receiver(pre_save, sender=Department)
+@receiver(pre_save, sender=Category)
+def remember_previous_name(sender, instance, raw=False, **kwargs):
+    instance._search_previous_name = None
+    if not raw and instance.pk is not None:
+        instance._search_previous_name = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=Department)
+@receiver(post_save, sender=Category)
+def reindex_requests_on_rename(sender, instance, created=False, raw=False, **kwargs):
+    previous_name = getattr(instance, '_search_previous_name', None)
+    if raw or created or previous_name is None or previous_name == instance.name:
+        return
+    search.reindex_requests(AssetRequest.objects.filter(**{_INDEXED_NAME_FIELDS[sender]: instance}))
@@ -0,0 +1,82 @@
+# baseapp/storage.py
+
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = 'cas'
+TEMP_DIR = '.cas-tmp'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that stores each distinct file once, named by its SHA-256.
+
+    Content is hashed while it is streamed to a temp file, so uploads are never
+    held in memory. If a blob with the same digest already exists the temp file
+    is dropped, the existing blob's mtime is refreshed and its name is returned.
+    Blobs are shared between requests, so delete() is a no-op; orphans are
+    removed by the gc_attachment_blobs management command.
+    """
+
+    def blob_name(self, directory, digest, extension):
+        return os.path.join(directory, BLOB_DIR, digest[:2], f'{digest}{extension}').replace('\\', '/')
+
+    def get_available_name(self, name, max_length=None):
+        # _save() picks the final, content-derived name; collisions are the point.
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        temp_dir = self.path(TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            name = self.blob_name(directory, digest.hexdigest(), extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+                # Restart the GC grace period: the blob may be an orphan about to be re-referenced.
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        pass
+
+    def delete_blob(self, name):
+        """Actually removes a blob; only for garbage collection of unreferenced names."""
+        super().delete(name)
+
+
+attachment_storage = ContentAddressedStorage()
+
+
+def blob_digest(name):
+    """Returns the SHA-256 encoded in a content-addressed name, or None for legacy names."""
+    if not name:
+        return None
+    parts = name.replace('\\', '/').split('/')
+    if len(parts) < 3 or parts[-3] != BLOB_DIR:
+        return None
+    return os.path.splitext(parts[-1])[0]
@@ -0,0 +1,232 @@
+# baseapp/survey_import.py
+
+import csv
+import io
+import os
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree
+
+from . import refdata
+from .exports import column_letter
+
+IMPORT_FORMATS = ('.csv', '.xlsx')
+
+# Whole-number headcounts; spreadsheets may hand integers back as "3.0".
+HEADCOUNT_PATTERN = re.compile(r'^\d+(?:\.0*)?$')
+# Refuse worksheets that inflate beyond this (zip bombs); a full organisation is well under 1 MB.
+MAX_SHEET_BYTES = 20 * 1024 * 1024
+# Excel's own sheet limits (row 1,048,576, column XFD); cell references beyond them are refused
+# rather than padded out to, since rows and cells are allocated up to the referenced position.
+MAX_SHEET_ROWS = 1_048_576
+MAX_SHEET_COLUMNS = 16_384
+
+_SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_CELL_REFERENCE = re.compile(r'^([A-Z]+)')
+
+
+class SurveyImportError(ValueError):
+    """Raised when an import file cannot be used; `errors` lists every problem found."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("; ".join(self.errors))
+
+
+# --- Reading ---
+
+def _column_index(reference):
+    index = 0
+    for letter in _CELL_REFERENCE.match(reference).group(1):
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _first_sheet_path(archive):
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{_SPREADSHEET_NS}sheets/{_SPREADSHEET_NS}sheet')
+    if sheet is None:
+        raise SurveyImportError(["The workbook has no worksheets."])
+    relationship_id = sheet.get(f'{_RELATIONSHIP_NS}id')
+    relationships = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for relationship in relationships.iter(f'{_PACKAGE_REL_NS}Relationship'):
+        if relationship.get('Id') == relationship_id:
+            target = relationship.get('Target')
+            return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    raise SurveyImportError(["The workbook's first worksheet could not be found."])
+
+
+def _shared_strings(archive):
+    try:
+        info = archive.getinfo('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+    if info.file_size > MAX_SHEET_BYTES:
+        raise SurveyImportError(["The workbook's shared strings are too large to import."])
+    data = archive.read(info)
+    return [
+        ''.join(text.text or '' for text in item.iter(f'{_SPREADSHEET_NS}t'))
+        for item in ElementTree.fromstring(data).iter(f'{_SPREADSHEET_NS}si')
+    ]
+
+
+def read_xlsx_rows(file):
+    """Returns the first worksheet of an .xlsx file as a list of rows of strings."""
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise SurveyImportError(["The file is not a valid .xlsx workbook."])
+    with archive:
+        try:
+            sheet_path = _first_sheet_path(archive)
+            if archive.getinfo(sheet_path).file_size > MAX_SHEET_BYTES:
+                raise SurveyImportError(["The worksheet is too large to import."])
+            shared_strings = _shared_strings(archive)
+            rows = []
+            with archive.open(sheet_path) as sheet:
+                for _, element in ElementTree.iterparse(sheet):
+                    if element.tag != f'{_SPREADSHEET_NS}row':
+                        continue
+                    row = []
+                    for position, cell in enumerate(element.iter(f'{_SPREADSHEET_NS}c')):
+                        reference = cell.get('r')
+                        index = _column_index(reference) if reference else position
+                        if index >= MAX_SHEET_COLUMNS:
+                            raise SurveyImportError([f"Cell {reference} is beyond the last worksheet column (XFD)."])
+                        cell_type = cell.get('t')
+                        if cell_type == 'inlineStr':
+                            value = ''.join(text.text or '' for text in cell.iter(f'{_SPREADSHEET_NS}t'))
+                        else:
+                            value = cell.findtext(f'{_SPREADSHEET_NS}v') or ''
+                            if cell_type == 's' and value:
+                                value = shared_strings[int(value)]
+                        row.extend([''] * (index + 1 - len(row)))
+                        row[index] = value
+                    row_number = int(element.get('r') or len(rows) + 1)
+                    if not len(rows) < row_number <= MAX_SHEET_ROWS:
+                        raise SurveyImportError([f"Row {row_number} is out of order or beyond the last worksheet row ({MAX_SHEET_ROWS:,})."])
+                    rows.extend([] for _ in range(row_number - 1 - len(rows)))
+                    rows.append(row)
+                    element.clear()
+        except SurveyImportError:
+            raise
+        except (KeyError, IndexError, ValueError, ElementTree.ParseError) as e:
+            raise SurveyImportError([f"The workbook could not be read: {e}"])
+    return rows
+
+
+def read_csv_rows(file):
+    """Returns the rows of a UTF-8 (optionally BOM-prefixed) CSV file."""
+    try:
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        return list(csv.reader(text))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise SurveyImportError([f"The CSV file could not be read: {e}"])
+
+
+def read_matrix(file, filename):
+    """Reads an uploaded or opened CSV/XLSX file (chosen by `filename`'s extension) into rows."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        return read_xlsx_rows(file)
+    if extension == '.csv':
+        return read_csv_rows(file)
+    raise SurveyImportError([f"Unsupported file type {extension or '(none)'}; use one of {', '.join(IMPORT_FORMATS)}."])
+
+
+# --- Validation ---
+
+def parse_matrix(rows, location, category, create_models=False):
+    """
+    Validates a department x model headcount matrix and returns its survey cells.
+
+    The first row holds model names (its first cell is a label and is ignored);
+    every other row starts with a department name or code followed by headcounts.
+    All cells are checked in one pass and departments and model names are each
+    resolved with a single cached lookup, so every problem is reported at once
+    rather than one per submission. Blank and zero cells are skipped, as in the
+    survey grid. Returns (department, model_name, headcount) tuples ready for
+    surveys.save_survey_entries().
+    """
+    rows = [[value.strip() for value in row] for row in rows]
+    while rows and not any(rows[-1]):
+        rows.pop()
+    if len(rows) < 2 or len(rows[0]) < 2:
+        raise SurveyImportError(["The file needs a header row of model names and at least one department row."])
+
+    errors = []
+    header = rows[0]
+
+    # Model columns: an exact match, else a case-insensitive one, against the models already
+    # at this location/category. Model names are case-sensitive, so a header that matches
+    # several of them only by case is ambiguous rather than silently taken as one.
+    known_names = refdata.system_models(location.id, category.id).by_name
+    known_models = {}
+    for known_name in known_names:
+        known_models.setdefault(known_name.lower(), []).append(known_name)
+    model_columns = {}
+    seen_models = set()
+    for index, name in enumerate(header[1:], 1):
+        if not name:
+            continue
+        matches = [name] if name in known_names else known_models.get(name.lower(), [])
+        if len(matches) > 1:
+            errors.append(
+                f"{column_letter(index)}1: model '{name}' matches {', '.join(repr(match) for match in matches)} "
+                f"at {location.name} / {category.name}; use the exact name."
+            )
+            continue
+        if not matches and not create_models:
+            errors.append(f"{column_letter(index)}1: unknown model '{name}' for {location.name} / {category.name}.")
+            continue
+        # New models are compared case-insensitively too, so one file cannot create two that differ only in case.
+        key = matches[0] if matches else name.lower()
+        if key in seen_models:
+            errors.append(f"{column_letter(index)}1: model '{name}' appears more than once.")
+            continue
+        seen_models.add(key)
+        model_columns[index] = matches[0] if matches else name
+
+    # Department rows: by name or code, among this location's departments only.
+    departments = {}
+    for department in refdata.departments_for_location(location.id):
+        departments[department.name.lower()] = department
+        departments.setdefault(department.code.lower(), department)
+
+    cells = []
+    seen_departments = set()
+    for row_number, row in enumerate(rows[1:], 2):
+        if not any(row):
+            continue
+        label = row[0]
+        department = departments.get(label.lower())
+        if department is None:
+            errors.append(f"A{row_number}: '{label}' is not a department at {location.name}.")
+        elif department.id in seen_departments:
+            errors.append(f"A{row_number}: department '{label}' appears more than once.")
+            department = None
+        else:
+            seen_departments.add(department.id)
+
+        for index, value in enumerate(row[1:], 1):
+            if not value:
+                continue
+            if not HEADCOUNT_PATTERN.match(value):
+                errors.append(f"{column_letter(index)}{row_number}: '{value}' is not a whole, non-negative number.")
+                continue
+            if index not in model_columns:
+                if index >= len(header) or not header[index]:
+                    errors.append(f"{column_letter(index)}{row_number}: value in a column without a model name.")
+                continue
+            headcount = int(value.split('.')[0])
+            if headcount and department is not None:
+                cells.append((department, model_columns[index], headcount))
+
+    if errors:
+        raise SurveyImportError(errors)
+    if not cells:
+        raise SurveyImportError(["The file contains no headcounts greater than zero."])
+    return cells
@@ -0,0 +1,269 @@
+# baseapp/surveys.py
+
+import logging
+
+from django.db.models import Subquery
+from django.template import loader
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from . import aggregates, refdata
+from .aggregates import add_entries
+from .models import SurveyEntry, SurveyInfo, SurveyRevision, SystemModel
+from .signals import entries_removed_by_caller
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT; Django further caps this to the backend's bound-parameter limit.
+SURVEY_ENTRY_BATCH_SIZE = 500
+
+# Stands in for each cell's value in the cached grid; escaped names can never contain it.
+GRID_VALUE_SLOT = '<!--value-->'
+
+
+def resolve_system_models(location, category, model_names):
+    """
+    Returns a {name: SystemModel} map for `model_names` at `location`/`category`.
+
+    Existing models are fetched in one query and any missing ones are created
+    with a single bulk insert instead of a get_or_create per name.
+    """
+    model_names = set(model_names)
+    models_by_name = {
+        system_model.name: system_model
+        for system_model in SystemModel.objects.filter(location=location, category=category, name__in=model_names)
+    }
+
+    missing_names = model_names.difference(models_by_name)
+    if missing_names:
+        # bulk_create skips save(), so assign the grid slugs here.
+        taken = set(SystemModel.objects.filter(location=location, category=category).values_list('slug', flat=True))
+        SystemModel.objects.bulk_create(
+            [
+                SystemModel(name=name, slug=SystemModel.unique_slug(name, taken), location=location, category=category)
+                for name in sorted(missing_names)
+            ],
+            ignore_conflicts=True,
+        )
+        # ignore_conflicts leaves pk unset, so read the rows back (also covers concurrent inserts).
+        models_by_name.update(
+            (system_model.name, system_model)
+            for system_model in SystemModel.objects.filter(location=location, category=category, name__in=missing_names)
+        )
+        for name in sorted(missing_names.difference(models_by_name)):
+            # A concurrent insert took the slug we picked; save() chooses a fresh one.
+            models_by_name[name], _ = SystemModel.objects.get_or_create(name=name, location=location, category=category)
+        # bulk_create sends no post_save, so drop the cached model names explicitly.
+        refdata.invalidate()
+        logger.info("Created %d new SystemModel(s) for %s / %s", len(missing_names), location, category)
+
+    return models_by_name
+
+
+def save_survey_entries(survey_info, cells, batch_size=SURVEY_ENTRY_BATCH_SIZE):
+    """
+    Bulk-inserts the SurveyEntry rows of `survey_info`.
+
+    `cells` is an iterable of (department, model_name, headcount) tuples. Call
+    this inside the same transaction that saved `survey_info`; the matching
+    SurveyAggregate rows are updated in that transaction too. Returns the
+    number of entries created.
+    """
+    cells = list(cells)
+    if not cells:
+        return 0
+
+    location = survey_info.location
+    models_by_name = resolve_system_models(location, survey_info.category, {model_name for _, model_name, _ in cells})
+
+    entries = [
+        SurveyEntry(
+            survey_info=survey_info,
+            location=location,
+            department=department,
+            system_model=models_by_name[model_name],
+            headcount=headcount,
+        )
+        for department, model_name, headcount in cells
+    ]
+    SurveyEntry.objects.bulk_create(entries, batch_size=batch_size)
+    add_entries(entries, survey_info.financial_year)
+    return len(entries)
+
+
+def save_survey_revision(location, category, financial_year, survey_date, cells, submitted_by=None):
+    """
+    Saves a survey submission. The first submission for (financial_year, location,
+    category, survey_date) creates the survey; later ones update it in place.
+
+    `cells` is an iterable of (department, model_name, headcount) tuples and is the
+    whole grid: entries missing from it are removed. On resubmission only the cells
+    whose headcount changed are written, with one bulk upsert and one delete, and
+    the aggregates get the net change. Each submission is logged as a
+    SurveyRevision with those changes. Call inside a transaction. Returns
+    (survey_info, revision).
+    """
+    cells = list(cells)
+    survey_info, created = SurveyInfo.objects.get_or_create(
+        financial_year=financial_year, location=location, category=category, date=survey_date,
+    )
+    if created:
+        entry_count = save_survey_entries(survey_info, cells)
+        return survey_info, SurveyRevision.objects.create(
+            survey_info=survey_info, number=1, entry_count=entry_count, submitted_by=submitted_by,
+        )
+
+    models_by_name = resolve_system_models(location, category, {model_name for _, model_name, _ in cells})
+    submitted = {
+        (department.id, models_by_name[model_name].id): headcount
+        for department, model_name, headcount in cells if headcount
+    }
+    existing = {
+        (department_id, system_model_id): (pk, headcount, manpower_type)
+        for pk, department_id, system_model_id, headcount, manpower_type in SurveyEntry.objects.filter(
+            survey_info=survey_info,
+        ).values_list('pk', 'department_id', 'system_model_id', 'headcount', 'manpower_type')
+    }
+
+    changes, upserts, removed, added = [], [], [], 0
+    deltas = aggregates.new_deltas()
+    for key in sorted(existing.keys() | submitted.keys()):
+        pk, before, manpower_type = existing.get(key, (None, 0, 'exe'))
+        after = submitted.get(key, 0)
+        if before == after:
+            continue
+        changes.append([*key, before, after])
+        delta = deltas[(financial_year, location.id, *key, manpower_type)]
+        delta[0] += after - before
+        if after:
+            if pk is None:
+                delta[1] += 1
+                added += 1
+            upserts.append(SurveyEntry(
+                survey_info=survey_info, location=location, department_id=key[0], system_model_id=key[1],
+                headcount=after, manpower_type=manpower_type,
+            ))
+        else:
+            delta[1] -= 1
+            removed.append(pk)
+
+    if upserts:
+        SurveyEntry.objects.bulk_create(
+            upserts, batch_size=SURVEY_ENTRY_BATCH_SIZE, update_conflicts=True,
+            unique_fields=['survey_info', 'department', 'system_model'], update_fields=['headcount'],
+        )
+    if removed:
+        with entries_removed_by_caller(survey_info.pk):
+            SurveyEntry.objects.filter(pk__in=removed).delete()
+    aggregates.apply_deltas(deltas)
+
+    last = survey_info.revisions.order_by('-number').values_list('number', flat=True).first()
+    revision = SurveyRevision.objects.create(
+        survey_info=survey_info,
+        number=(last or 1) + 1,  # surveys saved before revisions were logged count as revision 1
+        changes=changes,
+        entry_count=len(existing) + added - len(removed),
+        submitted_by=submitted_by,
+    )
+    return survey_info, revision
+
+
+class SurveyGrid:
+    """
+    The survey form's department x model input table for one location/category,
+    rendered once and split at each cell's value, so a request only fills in values.
+    """
+
+    def __init__(self, segments, input_names):
+        self.segments = segments  # len(input_names) + 1 pieces of HTML around the values
+        self.input_names = input_names  # count__<dept id>__<model slug>, in page order
+
+    def render(self, values=None, default='0'):
+        """HTML of the table with `values` ({input name: value}) filled in, `default` elsewhere."""
+        values = values or {}
+        parts = [self.segments[0]]
+        for name, segment in zip(self.input_names, self.segments[1:]):
+            value = values.get(name)
+            parts.append(escape(value) if value not in (None, '') else default)
+            parts.append(segment)
+        return mark_safe(''.join(parts))
+
+
+def _build_survey_grid(location_id, category_id):
+    departments = refdata.departments_for_location(location_id)
+    model_index = refdata.system_models(location_id, category_id)
+    if not departments or not model_index:
+        return None
+    html = loader.render_to_string('survey_grid.html', {
+        'departments': departments,
+        'columns': list(zip(model_index.names, model_index.slugs)),
+        'value_slot': GRID_VALUE_SLOT,
+    })
+    input_names = [f'count__{department.id}__{slug}' for department in departments for slug in model_index.slugs]
+    segments = html.split(GRID_VALUE_SLOT)
+    if len(segments) != len(input_names) + 1:
+        raise ValueError(f"survey_grid.html rendered {len(segments) - 1} value slots for {len(input_names)} cells")
+    return SurveyGrid(segments, input_names)
+
+
+def survey_grid(location_id, category_id):
+    """
+    The SurveyGrid for a location/category, or None if it has no departments or
+    models. Cached with the reference data, so Department and SystemModel changes
+    rebuild it.
+    """
+    return refdata.cached(
+        f'survey_grid:{location_id}:{category_id}', lambda: _build_survey_grid(location_id, category_id)
+    )
+
+
+class PriorSurvey:
+    """An earlier survey's headcounts, keyed by (department id, model name)."""
+
+    def __init__(self, survey_info_id, date, financial_year, headcounts):
+        self.survey_info_id = survey_info_id
+        self.date = date
+        self.financial_year = financial_year
+        self.headcounts = headcounts
+
+    def grid_values(self, model_index):
+        """{input name: headcount} for a SurveyGrid; models no longer in `model_index` are dropped."""
+        values = {}
+        for (department_id, model_name), headcount in self.headcounts.items():
+            model = model_index.by_name.get(model_name)
+            if model is not None:
+                values[f'count__{department_id}__{model[1]}'] = str(headcount)
+        return values
+
+    def changes(self, headcounts):
+        """{(department id, model name): (before, after)} for each cell that differs from `headcounts`."""
+        return {
+            key: (self.headcounts.get(key, 0), headcounts.get(key, 0))
+            for key in self.headcounts.keys() | headcounts.keys()
+            if self.headcounts.get(key, 0) != headcounts.get(key, 0)
+        }
+
+
+def prior_survey(location_id, category_id, before=None, survey_info_id=None):
+    """
+    The latest survey for a location/category, dated on or before `before`
+    (or exactly `survey_info_id`), with all its headcounts in one query.
+    Returns a PriorSurvey, or None if there is no such survey with entries.
+    """
+    surveys = SurveyInfo.objects.filter(location_id=location_id, category_id=category_id)
+    if before is not None:
+        surveys = surveys.filter(date__lte=before)
+    if survey_info_id is not None:
+        surveys = surveys.filter(pk=survey_info_id)
+    latest = surveys.order_by('-date', '-pk').values('pk')[:1]
+
+    rows = SurveyEntry.objects.filter(survey_info_id=Subquery(latest)).values_list(
+        'survey_info_id', 'survey_info__date', 'survey_info__financial_year',
+        'department_id', 'system_model__name', 'headcount',
+    )
+    prior = None
+    for survey_info_id, date, financial_year, department_id, model_name, headcount in rows:
+        if prior is None:
+            prior = PriorSurvey(survey_info_id, date, financial_year, {})
+        prior.headcounts[department_id, model_name] = headcount
+    return prior
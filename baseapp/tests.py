@@ -1,3 +1,1587 @@
-from django.test import TestCase
+import csv
+import hashlib
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import Future
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import Group, User
+from django.contrib.messages import get_messages
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import budgets, receipts, refdata, review_queue, search
+from .audit import approver_throughput, request_timeline
+from .aggregates import rebuild_aggregates
+from .duplicates import DUPLICATE_THRESHOLD, Fingerprint, find_duplicates, flag_duplicates
+from .exports import EXPORT_CHUNK_ROWS, EXPORT_FORMATS, stream_xlsx
+from .forms import SurveyInfoForm
+from .instrumentation import QueryBudgetExceeded, registry
+from .models import (
+    AssetRequest, AssetRequestBucket, AssetRequestFingerprint, AssetRequestSearchTerm, BudgetRollup, Category,
+    ChunkedUpload, Department, Location, StatusTransition, SurveyAggregate, SurveyEntry, SurveyInfo, SystemModel,
+)
+from .pagination import InvalidCursor, KeysetPaginator
+from .reports import build_survey_pivot
+from .review import apply_review_action
+from .storage import attachment_storage, blob_digest
+from .survey_import import SurveyImportError, parse_matrix, read_matrix, read_xlsx_rows
+from .surveys import prior_survey, save_survey_entries, save_survey_revision
+from .transactions import DatabaseBusy, atomic_with_retry
+from .uploads import UploadError, append_chunk, temp_path
+from .views import REQUEST_EXPORT_COLUMNS, REQUEST_REPORT_ORDERING, SURVEY_EXPORT_COLUMNS
+
+
+# --- Query plan checks (SQLite EXPLAIN QUERY PLAN) ---
+@skipUnless(connection.vendor == 'sqlite', "Query plan assertions are written against SQLite's planner output.")
+class QueryPlanTests(TestCase):
+    """Proves the hot report/review queries are served by indexes rather than full table scans."""
+
+    def assertUsesIndex(self, queryset, table, index_name):
+        plan = queryset.explain()
+        self.assertRegex(plan, rf'{table} USING (COVERING )?INDEX {index_name}\b')
+        self.assertNoFullScan(queryset, table)
+
+    def assertNoFullScan(self, queryset, table):
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            self.assertFalse(line.rstrip().endswith(f'SCAN {table}'), plan)
+
+    def test_review_queue_next_batch_uses_queue_index(self):
+        self.assertUsesIndex(review_queue.unclaimed()[:20], 'baseapp_assetrequest', 'assetreq_queue_idx')
+
+    def test_claimed_requests_use_claims_index(self):
+        user = User.objects.create_user('approver')
+        self.assertUsesIndex(review_queue.claimed(user), 'baseapp_assetrequest', 'assetreq_claims_idx')
+
+    def test_request_report_by_financial_year(self):
+        queryset = AssetRequest.objects.select_related('location', 'department', 'asset_type').filter(
+            financial_year='2025-2026'
+        ).order_by(*REQUEST_REPORT_ORDERING)[:101]
+        self.assertUsesIndex(queryset, 'baseapp_assetrequest', 'assetreq_fy_date_idx')
+
+    def test_request_report_all_years(self):
+        queryset = AssetRequest.objects.select_related('location', 'department', 'asset_type').order_by(
+            *REQUEST_REPORT_ORDERING
+        )[:101]
+        self.assertUsesIndex(queryset, 'baseapp_assetrequest', 'assetreq_date_idx')
+
+    def test_survey_entries_by_financial_year(self):
+        queryset = SurveyEntry.objects.filter(survey_info__financial_year='2025-2026')
+        # SQLite backs the surveyinfo_fy_loc_cat_date_uniq constraint with an automatic index.
+        self.assertUsesIndex(queryset, 'baseapp_surveyinfo', 'sqlite_autoindex_baseapp_surveyinfo_1')
+        self.assertNoFullScan(queryset, 'baseapp_surveyentry')
+
+    def test_consolidated_report_aggregates_by_financial_year(self):
+        queryset = SurveyAggregate.objects.filter(financial_year='2025-2026').values(
+            'department__name', 'system_model__name'
+        ).annotate(total=Sum('headcount'))
+        self.assertNoFullScan(queryset, 'baseapp_surveyaggregate')
+
+    def test_latest_survey_for_prefill(self):
+        queryset = SurveyInfo.objects.filter(location_id=1, category_id=1, date__lte=date(2025, 6, 1)).order_by(
+            '-date', '-pk'
+        )[:1]
+        self.assertUsesIndex(queryset, 'baseapp_surveyinfo', 'surveyinfo_loc_cat_date_idx')
+
+    def test_survey_grid_models(self):
+        queryset = SystemModel.objects.filter(location_id=1, category_id=1).order_by('name')
+        self.assertUsesIndex(queryset, 'baseapp_systemmodel', 'sysmodel_loc_cat_name_idx')
+
+
+# --- Per-view query budgets (VIEW_QUERY_BUDGETS) ---
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """Renders each budgeted view over enough rows that an N+1 query would exceed its budget."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.category = Category.objects.create(name='Desktop')
+        cls.departments = [
+            Department.objects.create(name=f'Dept {index}', code=f'D{index}', location=cls.location)
+            for index in range(5)
+        ]
+        cls.system_models = [
+            SystemModel.objects.create(name=f'Model {index}', category=cls.category, location=cls.location)
+            for index in range(5)
+        ]
+        for index in range(40):
+            AssetRequest.objects.create(
+                location=cls.location, department=cls.departments[index % 5], financial_year='2025-2026',
+                asset_type=cls.category, description=f'Request {index}', estimated_cost=Decimal(100 + index),
+                item_type='capital', date=date(2025, 6, 1) - timedelta(days=index),
+            )
+        survey_info = SurveyInfo.objects.create(financial_year='2025-2026', location=cls.location, category=cls.category)
+        for department in cls.departments:
+            for system_model in cls.system_models:
+                SurveyEntry.objects.create(
+                    survey_info=survey_info, location=cls.location, department=department,
+                    system_model=system_model, headcount=2,
+                )
+        approver = User.objects.create_user('approver', password='secret')
+        approver.groups.add(Group.objects.create(name='Approvers'))
+
+    def setUp(self):
+        refdata._cache.invalidate()
+        self.client.login(username='approver', password='secret')
+
+    def get(self, url, data=None):
+        response = self.client.get(url, data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_reports_stay_within_budget(self):
+        self.get('/request/report/')
+        self.get('/request/report/', {'all': '1'})
+        self.get('/request/report/export/csv/')
+        self.get('/report/')
+        self.get('/report/export/xlsx/')
+
+    def test_forms_and_review_stay_within_budget(self):
+        self.get('/')
+        self.get('/request/')
+        self.get('/requests/review/')
+        self.get('/survey/', {
+            'location': self.location.id, 'category': self.category.id,
+            'date': '2025-06-01', 'financial_year': '2025-2026',
+        })
+
+    async def test_async_views_stay_within_budget_under_asgi(self):
+        await self.async_client.alogin(username='approver', password='secret')
+        for url in ('/', '/request/report/', '/request/report/?all=1', '/report/', '/report/export/csv/'):
+            response = await self.async_client.get(url)
+            if response.streaming:
+                # Under ASGI streamed content must be async, or Django buffers all of it first.
+                self.assertTrue(response.is_async)
+                content = b''.join([chunk async for chunk in response.streaming_content])
+            else:
+                content = response.content
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(content)
+
+    def test_request_submission_stays_within_budget(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        data = {
+            'location': self.location.id, 'department': self.departments[0].id, 'financial_year': '2025-2026',
+            'asset_type': self.category.id, 'description': 'Request 0', 'estimated_cost': '1200',
+            'item_type': 'capital', 'date': '2025-06-01',
+        }
+        with override_settings(MEDIA_ROOT=media_root, CHUNKED_UPLOAD_TEMP_DIR=os.path.join(media_root, 'partial')):
+            # A duplicate of 'Request 0' with a finished chunked upload, on a cold reference-data cache: the worst case.
+            upload = self.client.post(
+                '/request/uploads/', json.dumps({'filename': 'indent.pdf', 'size': 4}), content_type='application/json',
+            ).json()
+            self.client.post(
+                f"/request/uploads/{upload['token']}/", b'%PDF', content_type='application/octet-stream', HTTP_UPLOAD_OFFSET='0',
+            )
+            refdata._cache.invalidate()
+            response = self.client.post('/request/', {**data, 'indent_file_token': upload['token']})
+            self.assertRedirects(response, '/request/receipt/', fetch_redirect_response=False)
+            response = self.client.post('/request/', {**data, 'description': 'A new request'})
+            self.assertRedirects(response, '/request/receipt/', fetch_redirect_response=False)
+        flagged = AssetRequest.objects.get(description='Request 0', indent_file__startswith='uploads/')
+        self.assertEqual(flagged.duplicate_of.description, 'Request 0')
+
+    def test_survey_submission_and_import_stay_within_budget(self):
+        survey = {'location': self.location.id, 'category': self.category.id, 'financial_year': '2025-2026'}
+        cells = {
+            f'count__{department.id}__{system_model.slug}': '3'
+            for department in self.departments for system_model in self.system_models
+        }
+        for counts in ('3', '4'):  # creates the survey, then updates it in place
+            response = self.client.post('/survey/', {**survey, 'date': '2025-07-01', **dict.fromkeys(cells, counts)})
+            self.assertRedirects(response, '/survey/receipt/', fetch_redirect_response=False)
+        # A grid prefilled from that survey, submitted on a cold cache, reports what changed since.
+        prior = SurveyInfo.objects.get(date=date(2025, 7, 1))
+        refdata._cache.invalidate()
+        response = self.client.post('/survey/', {
+            **survey, 'date': '2025-07-15', 'prefilled_from': prior.id, **dict.fromkeys(cells, '4'), next(iter(cells)): '6',
+        })
+        self.assertRedirects(response, '/survey/receipt/', fetch_redirect_response=False)
+        self.assertIn('1 count(s) differ', str(list(get_messages(response.wsgi_request))))
+
+        # The first import also creates a model missing from the location/category; the second updates it.
+        header = ','.join(['Department'] + [system_model.name for system_model in self.system_models] + ['Model new'])
+        for counts in ('2', '5'):
+            matrix = '\n'.join([header] + [
+                ','.join([department.code] + [counts] * (len(self.system_models) + 1)) for department in self.departments
+            ])
+            refdata._cache.invalidate()
+            response = self.client.post('/survey/import/', {
+                **survey, 'date': '2025-08-01', 'create_models': 'on',
+                'file': SimpleUploadedFile('survey.csv', matrix.encode(), content_type='text/csv'),
+            })
+            self.assertRedirects(response, '/survey/receipt/', fetch_redirect_response=False)
+        self.assertEqual(SurveyInfo.objects.get(date=date(2025, 8, 1)).entries.count(), 30)
+
+    def test_review_actions_stay_within_budget(self):
+        approver = User.objects.get(username='approver')
+        self.client.post('/requests/review/', {'action': 'claim'})
+        response = self.client.post('/requests/review/', {'request_id': review_queue.claimed(approver)[0].pk, 'action': 'approve'})
+        self.assertRedirects(response, '/requests/review/', fetch_redirect_response=False)
+        self.client.post('/requests/review/', {'action': 'claim'})  # tops the batch back up to 20
+        response = self.client.post('/requests/review/batch/', json.dumps({
+            'request_ids': [item.pk for item in review_queue.claimed(approver)], 'action': 'reject', 'remarks': 'Over budget',
+        }), content_type='application/json', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['updated'], 20)
+        self.assertEqual(StatusTransition.objects.count(), 21)
+
+    @override_settings(VIEW_QUERY_BUDGETS={'home': 1})
+    def test_exceeding_a_budget_fails(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/')
+
+    def test_metrics_endpoint_reports_recorded_views(self):
+        registry.reset()
+        self.get('/report/')
+        # Not staff: refused even from a local address, as every client is one behind a proxy.
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='127.0.0.1').status_code, 404)
+        User.objects.filter(username='approver').update(is_staff=True)
+        views = self.client.get('/metrics/').json()['views']
+        self.assertEqual(views['consolidated_report']['requests'], 1)
+        self.assertLessEqual(views['consolidated_report']['max_queries'], views['consolidated_report']['query_budget'])
+
+
+# --- Retried write transactions (baseapp/transactions.py) ---
+@override_settings(DB_WRITE_RETRY_BACKOFF=0)
+class WriteRetryTests(TransactionTestCase):
+    """A transaction that hits "database is locked" is rolled back and run again, a bounded number of times."""
+
+    def locked_once(self):
+        attempts = []
+
+        def write():
+            attempts.append(Location.objects.create(name=f'Attempt {len(attempts)}'))
+            if len(attempts) == 1:
+                raise OperationalError('database is locked')
+            return attempts[-1]
+
+        return write, attempts
+
+    def test_locked_transaction_is_rolled_back_and_retried(self):
+        write, attempts = self.locked_once()
+        location = atomic_with_retry(write)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(list(Location.objects.values_list('name', flat=True)), [location.name])
+
+    def test_gives_up_after_the_last_attempt(self):
+        def write():
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(DatabaseBusy):
+            atomic_with_retry(write, attempts=2)
+
+    def test_inner_transactions_are_not_retried(self):
+        write, attempts = self.locked_once()
+        with self.assertRaises(OperationalError) as raised, transaction.atomic():
+            atomic_with_retry(write)
+        self.assertEqual(len(attempts), 1)
+        # Not DatabaseBusy: nothing was retried, and the outer transaction's owner decides what to do.
+        self.assertNotIsInstance(raised.exception, DatabaseBusy)
+
+
+# --- Survey resubmission (baseapp.surveys.save_survey_revision) ---
+class SurveyRevisionTests(TestCase):
+    """Submitting a survey again updates it in place and logs only the changed counts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.category = Category.objects.create(name='Desktop')
+        cls.finance = Department.objects.create(name='Finance', code='FIN', location=cls.location)
+        cls.sales = Department.objects.create(name='Sales', code='SAL', location=cls.location)
+        cls.model_a = SystemModel.objects.create(name='Model A', category=cls.category, location=cls.location)
+        cls.model_b = SystemModel.objects.create(name='Model B', category=cls.category, location=cls.location)
+
+    def submit(self, cells):
+        with transaction.atomic():
+            return save_survey_revision(self.location, self.category, '2025-2026', date(2025, 6, 1), cells)
+
+    def aggregates(self):
+        return sorted(SurveyAggregate.objects.values_list(
+            'financial_year', 'department_id', 'system_model_id', 'headcount', 'entry_count',
+        ))
+
+    def test_resubmission_updates_the_survey_in_place(self):
+        survey_info, revision = self.submit([
+            (self.finance, 'Model A', 3), (self.finance, 'Model B', 4), (self.sales, 'Model A', 5),
+        ])
+        self.assertEqual((revision.number, revision.changes, revision.entry_count), (1, [], 3))
+
+        resubmitted, revision = self.submit([
+            (self.finance, 'Model A', 3), (self.finance, 'Model B', 6), (self.sales, 'Model B', 2),
+        ])
+        self.assertEqual(resubmitted.pk, survey_info.pk)
+        self.assertEqual(SurveyInfo.objects.count(), 1)
+        self.assertEqual(revision.number, 2)
+        self.assertEqual(revision.entry_count, 3)
+        self.assertEqual(revision.changes, [
+            [self.finance.id, self.model_b.id, 4, 6],
+            [self.sales.id, self.model_a.id, 5, 0],
+            [self.sales.id, self.model_b.id, 0, 2],
+        ])
+        self.assertEqual(sorted(survey_info.entries.values_list('department_id', 'system_model_id', 'headcount')), sorted([
+            (self.finance.id, self.model_a.id, 3), (self.finance.id, self.model_b.id, 6), (self.sales.id, self.model_b.id, 2),
+        ]))
+
+        maintained = self.aggregates()
+        rebuild_aggregates()
+        self.assertEqual(maintained, self.aggregates())
+
+    def test_form_accepts_a_resubmission_but_not_a_clash_with_another_survey(self):
+        june, _ = self.submit([(self.finance, 'Model A', 3)])
+        july = SurveyInfo.objects.create(
+            financial_year='2025-2026', location=self.location, category=self.category, date=date(2025, 7, 1),
+        )
+        data = {'location': self.location.id, 'category': self.category.id, 'financial_year': '2025-2026'}
+
+        form = SurveyInfoForm({**data, 'date': '2025-06-01'})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.instance.pk, june.pk)
+
+        form = SurveyInfoForm({**data, 'date': '2025-06-01'}, instance=july)
+        self.assertFalse(form.is_valid())
+        self.assertIn('__all__', form.errors)
+
+
+# --- Status transition log (baseapp.audit) ---
+class StatusTransitionTests(TestCase):
+    """Review actions and single-row saves append who moved a request from which status to which."""
+
+    @classmethod
+    def setUpTestData(cls):
+        location = Location.objects.create(name='HQ')
+        department = Department.objects.create(name='Finance', code='FIN', location=location)
+        category = Category.objects.create(name='Desktop')
+        cls.requests = [
+            AssetRequest.objects.create(
+                location=location, department=department, financial_year='2025-2026', asset_type=category,
+                estimated_cost=Decimal(100), item_type='capital',
+            )
+            for _ in range(3)
+        ]
+        cls.approver = User.objects.create_user('approver')
+        cls.admin = User.objects.create_user('admin')
+
+    def test_transitions_are_logged_and_append_only(self):
+        first, second, third = self.requests
+        review_queue.claim_next(self.approver)
+        with CaptureQueriesContext(connection) as queries:
+            apply_review_action([first.pk, second.pk], 'approve', 'OK', changed_by=self.approver)
+        # Both transitions in one INSERT, and no extra read of the requests.
+        logged = [query['sql'] for query in queries if 'baseapp_statustransition' in query['sql']]
+        self.assertEqual(len(logged), 1)
+        self.assertTrue(logged[0].startswith('INSERT'))
+        apply_review_action([first.pk, third.pk], 'reject', changed_by=self.approver)  # first is no longer pending
+
+        first.status, first.remarks, first._changed_by = 'rejected', 'Over budget', self.admin
+        first.save()
+        first.save()  # status unchanged: nothing logged
+
+        self.assertEqual(list(request_timeline(first.pk).values_list('from_status', 'to_status', 'changed_by', 'remarks')), [
+            ('pending', 'approved', self.approver.pk, 'OK'),
+            ('approved', 'rejected', self.admin.pk, 'Over budget'),
+        ])
+        self.assertEqual(approver_throughput(), {
+            self.approver.pk: {'approved': 2, 'rejected': 1},
+            self.admin.pk: {'rejected': 1},
+        })
+
+        transition = StatusTransition.objects.first()
+        with self.assertRaises(ValueError):
+            transition.save()
+        with self.assertRaises(ValueError):
+            StatusTransition.objects.update(remarks='')
+        with self.assertRaises(ValueError):
+            StatusTransition.objects.all().delete()
+
+
+# --- Approver queue (baseapp.review_queue) ---
+class ReviewQueueTests(TestCase):
+    """Pending requests are claimed earliest-due first, by one approver at a time, and timed against their SLA."""
+
+    @classmethod
+    def setUpTestData(cls):
+        location = Location.objects.create(name='HQ')
+        department = Department.objects.create(name='Finance', code='FIN', location=location)
+        category = Category.objects.create(name='Desktop')
+        now = timezone.now()
+
+        def create(item_type, cost, age):
+            return AssetRequest.objects.create(
+                location=location, department=department, financial_year='2025-2026', asset_type=category,
+                estimated_cost=Decimal(cost), item_type=item_type, submitted_at=now - age,
+            )
+        # Due (with the default SLA settings): 2 days ago, in 23 hours, in 1 day, in 3 days.
+        cls.overdue = create('capital', 500, timedelta(days=5))
+        cls.costly = create('capital', 2000000, timedelta(hours=1))
+        cls.old_revenue = create('revenue', 1000, timedelta(days=4))
+        cls.new_capital = create('capital', 1000, timedelta())
+        group = Group.objects.create(name='Approvers')
+        cls.first, cls.second = User.objects.create_user('first', password='secret'), User.objects.create_user('second')
+        group.user_set.add(cls.first, cls.second)
+
+    def claimed_ids(self, user):
+        return list(review_queue.claimed(user).values_list('id', flat=True))
+
+    def test_claims_are_exclusive_and_earliest_due_first(self):
+        self.assertEqual(review_queue.claim_next(self.first, count=2), 2)
+        self.assertEqual(review_queue.claim_next(self.second, count=2), 2)
+        self.assertEqual(self.claimed_ids(self.first), [self.overdue.pk, self.costly.pk])
+        self.assertEqual(self.claimed_ids(self.second), [self.old_revenue.pk, self.new_capital.pk])
+
+        # A request claimed by another approver is left alone; deciding one drops its claim.
+        _, updated = apply_review_action([self.overdue.pk, self.old_revenue.pk], 'approve', changed_by=self.first)
+        self.assertEqual(updated, 1)
+        self.assertEqual(self.claimed_ids(self.first), [self.costly.pk])
+        self.assertEqual(AssetRequest.objects.get(pk=self.old_revenue.pk).status, 'pending')
+
+        # An expired lease returns the request to the queue.
+        AssetRequest.objects.filter(pk=self.costly.pk).update(claimed_until=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(review_queue.claim_next(self.second, count=3), 3)
+        self.assertEqual(self.claimed_ids(self.second), [self.costly.pk, self.old_revenue.pk, self.new_capital.pk])
+        self.assertEqual(self.claimed_ids(self.first), [])
+
+    def test_decisions_need_a_live_claim(self):
+        # Nobody has claimed anything yet: neither the review page nor the batch endpoint decides.
+        self.client.login(username='first', password='secret')
+        response = self.client.post('/requests/review/', {'request_id': self.overdue.pk, 'action': 'approve'})
+        self.assertRedirects(response, '/requests/review/', fetch_redirect_response=False)
+        self.assertIn('claim it from the queue first', str(list(get_messages(response.wsgi_request))))
+        self.assertEqual(self.post_batch([self.overdue.pk, self.costly.pk])[1]['updated'], 0)
+
+        review_queue.claim_next(self.first, count=2)
+        AssetRequest.objects.filter(pk=self.costly.pk).update(claimed_until=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.post_batch([self.overdue.pk, self.costly.pk])[1]['updated'], 1)  # costly's lease ran out
+        self.assertEqual(AssetRequest.objects.get(pk=self.costly.pk).status, 'pending')
+        self.assertFalse(StatusTransition.objects.filter(asset_request_id=self.costly.pk).exists())
+
+    def test_review_page_lists_own_claims(self):
+        review_queue.claim_next(self.second, count=1)
+        self.client.login(username='first', password='secret')
+        self.assertRedirects(self.client.post('/requests/review/', {'action': 'claim'}), '/requests/review/')
+        response = self.client.get('/requests/review/')
+        self.assertEqual([item.pk for item in response.context['pending_requests']], [
+            self.costly.pk, self.old_revenue.pk, self.new_capital.pk,
+        ])
+        self.assertEqual(response.context['queue'], {'pending': 4, 'overdue': 1, 'claimed_by_others': 1})
+
+    def test_decision_metrics(self):
+        review_queue.claim_next(self.first, count=2)
+        apply_review_action([self.overdue.pk, self.costly.pk], 'approve', changed_by=self.first)
+        metrics = review_queue.decision_metrics()
+        self.assertEqual((metrics['decisions'], metrics['decided_after_due'], metrics['pending_overdue']), (2, 1, 0))
+        self.assertAlmostEqual(metrics['max_hours'], 120, places=1)
+
+        # Sent back to the queue and decided again: still one decision, timed by the latest one.
+        self.costly.status = 'pending'
+        self.costly.save()
+        review_queue.claim_next(self.second, count=1)
+        apply_review_action([self.costly.pk], 'reject', changed_by=self.second)
+        metrics = review_queue.decision_metrics()
+        self.assertEqual((metrics['decisions'], metrics['by_status']), (2, {'approved': 1, 'rejected': 1}))
+
+    def post_batch(self, request_ids, action='approve', **payload):
+        response = self.client.post('/requests/review/batch/', json.dumps({
+            'request_ids': request_ids, 'action': action, **payload,
+        }), content_type='application/json')
+        return response.status_code, response.json()
+
+    def test_batch_review_skips_requests_already_decided(self):
+        review_queue.claim_next(self.first, count=4)
+        self.client.login(username='first', password='secret')
+        self.assertEqual(self.post_batch([self.overdue.pk, self.costly.pk]), (200, {
+            'status': 'approved', 'request_ids': [self.overdue.pk, self.costly.pk], 'updated': 2,
+        }))
+        # The first id is already approved, so only the second is rejected.
+        status, body = self.post_batch([self.overdue.pk, self.old_revenue.pk, self.old_revenue.pk], 'reject', remarks=' Late ')
+        self.assertEqual((status, body['request_ids'], body['updated']), (200, [self.overdue.pk, self.old_revenue.pk], 1))
+        self.assertEqual(
+            dict(AssetRequest.objects.values_list('id', 'status')),
+            {self.overdue.pk: 'approved', self.costly.pk: 'approved', self.old_revenue.pk: 'rejected', self.new_capital.pk: 'pending'},
+        )
+        self.assertEqual(AssetRequest.objects.get(pk=self.old_revenue.pk).remarks, 'Late')
+
+        response = self.client.post('/requests/review/batch/', {
+            'request_ids': [self.new_capital.pk, self.costly.pk], 'action': 'reject', 'remarks_field': 'Duplicate',
+        })
+        self.assertRedirects(response, '/requests/review/', fetch_redirect_response=False)
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)], ['1 request(s) marked as rejected.'])
+        self.assertEqual(AssetRequest.objects.get(pk=self.new_capital.pk).status, 'rejected')
+
+    def test_batch_review_rejects_missing_or_invalid_ids(self):
+        self.client.login(username='first', password='secret')
+        for request_ids, error in (
+            ([], "Select at least one request."),
+            (['12', 'x'], "Request ids must be integers."),
+            (str(self.overdue.pk), "Request ids must be a list."),
+            (None, "Request ids must be a list."),
+        ):
+            self.assertEqual(self.post_batch(request_ids), (400, {'error': error}))
+        self.assertEqual(self.post_batch([self.overdue.pk], 'escalate'), (400, {'error': "Unknown review action: 'escalate'"}))
+        response = self.client.post('/requests/review/batch/', '[1, 2]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/requests/review/batch/', {'action': 'approve'})
+        self.assertRedirects(response, '/requests/review/', fetch_redirect_response=False)
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)], ["Select at least one request."])
+        self.assertFalse(AssetRequest.objects.exclude(status='pending').exists())
+
+
+# --- Cached survey grid (baseapp.surveys.survey_grid) ---
+class SurveyGridTests(TestCase):
+    """The grid is rendered once per location/category; only cell values are filled in per request."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.category = Category.objects.create(name='Desktop')
+        cls.department = Department.objects.create(name='Finance', code='FIN', location=cls.location)
+        cls.system_model = SystemModel.objects.create(name='Model A', category=cls.category, location=cls.location)
+        User.objects.create_user('surveyor', password='secret')
+
+    def setUp(self):
+        refdata._cache.invalidate()
+        self.client.login(username='surveyor', password='secret')
+        self.grid_query = {
+            'location': self.location.id, 'category': self.category.id,
+            'date': '2025-06-01', 'financial_year': '2025-2026',
+        }
+
+    def test_grid_is_rebuilt_when_models_change(self):
+        self.assertContains(self.client.get('/survey/', self.grid_query), 'data-model-name="Model A"', count=3)
+        SystemModel.objects.create(name='Model <B>', category=self.category, location=self.location)
+        response = self.client.get('/survey/', self.grid_query)
+        self.assertContains(response, 'name="count__', count=2)
+        self.assertContains(response, 'data-model-name="Model &lt;B&gt;"', count=3)
+
+    def test_rejected_post_shows_the_entered_values(self):
+        slug = SystemModel.objects.get().slug
+        response = self.client.post('/survey/', {
+            **self.grid_query, f'count__{self.department.id}__{slug}': '"x',
+        })
+        self.assertContains(response, f'name="count__{self.department.id}__{slug}"')
+        self.assertContains(response, 'value="&quot;x"')
+        self.assertFalse(SurveyInfo.objects.exists())
+
+    def test_models_missing_from_a_stale_cache_are_reloaded_before_refusing(self):
+        self.client.get('/survey/', self.grid_query)  # caches the grid's models
+        # Created without signals, as another process's cache would still miss it
+        SystemModel.objects.bulk_create([
+            SystemModel(name='Model B', slug='model-b', category=self.category, location=self.location),
+        ])
+        response = self.client.post('/survey/', {**self.grid_query, f'count__{self.department.id}__model-b': '4'})
+        self.assertRedirects(response, '/survey/receipt/', fetch_redirect_response=False)
+        self.assertEqual(list(SurveyEntry.objects.values_list('system_model__name', 'headcount')), [('Model B', 4)])
+
+        response = self.client.post('/survey/', {
+            **self.grid_query, 'date': '2025-06-02',
+            f'count__{self.department.id}__{self.system_model.slug}': '2',
+            f'count__{self.department.id}__retired-model': '5',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no longer in the HQ / Desktop survey', str(list(get_messages(response.wsgi_request))))
+        self.assertFalse(SurveyInfo.objects.filter(date=date(2025, 6, 2)).exists())
+
+    def save_survey(self, survey_date, headcount):
+        survey_info = SurveyInfo.objects.create(
+            financial_year='2025-2026', date=survey_date, location=self.location, category=self.category,
+        )
+        save_survey_entries(survey_info, [(self.department, 'Model A', headcount)])
+        return survey_info
+
+    def test_prefill_uses_the_latest_earlier_survey(self):
+        self.save_survey(date(2025, 1, 1), 3)
+        latest = self.save_survey(date(2025, 5, 1), 7)
+        self.save_survey(date(2025, 7, 1), 9)  # after the survey date
+        with self.assertNumQueries(1):
+            prior = prior_survey(self.location.id, self.category.id, before=date(2025, 6, 1))
+        self.assertEqual(prior.survey_info_id, latest.id)
+        self.assertEqual(prior.headcounts, {(self.department.id, 'Model A'): 7})
+
+        response = self.client.get('/survey/', {**self.grid_query, 'prefill': 'on'})
+        self.assertContains(response, 'value="7"')
+        self.assertContains(response, f'name="prefilled_from" value="{latest.id}"')
+
+    def test_submission_reports_changes_from_the_prefilled_survey(self):
+        prior = self.save_survey(date(2025, 5, 1), 7)
+        response = self.client.post('/survey/', {
+            **self.grid_query, 'prefilled_from': prior.id, f'count__{self.department.id}__{self.system_model.slug}': '8',
+        })
+        self.assertRedirects(response, '/survey/receipt/', fetch_redirect_response=False)
+        self.assertIn('1 count(s) differ from the survey of 2025-05-01.', str(list(get_messages(response.wsgi_request))))
+
+
+# --- System model slugs (SystemModel.unique_slug, migration 0006) ---
+class SystemModelSlugTests(TestCase):
+    """Slugs are unique per location/category, survive renames, and are backfilled for existing rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.category = Category.objects.create(name='Desktop')
+        cls.printer = Category.objects.create(name='Printer')
+
+    def create(self, name, category=None):
+        return SystemModel.objects.create(name=name, category=category or self.category, location=self.location)
+
+    def test_names_that_slugify_alike_get_numbered_suffixes(self):
+        slugs = [self.create(name).slug for name in ('Model A', 'model a', 'Model-A!', '***')]
+        self.assertEqual(slugs, ['model-a', 'model-a-2', 'model-a-3', 'model'])
+        self.assertEqual(self.create('Model A', self.printer).slug, 'model-a')  # unique per category only
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SystemModel.objects.create(name='Other', slug='model-a', category=self.category, location=self.location)
+
+    def test_renaming_keeps_the_slug(self):
+        system_model = self.create('Model A')
+        system_model.name = 'Model Z'
+        system_model.save()
+        system_model.refresh_from_db()
+        self.assertEqual(system_model.slug, 'model-a')
+        self.assertEqual(self.create('Model A').slug, 'model-a-2')
+
+    def test_migration_backfills_existing_rows(self):
+        system_models = [self.create(name) for name in ('Model B', 'model b', 'Model C')]
+        for position, system_model in enumerate(system_models):  # as if added before slugs existed
+            SystemModel.objects.filter(pk=system_model.pk).update(slug=f'unset-{position}')
+        migration = importlib.import_module('baseapp.migrations.0006_systemmodel_slug')
+        migration.populate_slugs(apps, connection.schema_editor())
+        self.assertEqual(
+            list(SystemModel.objects.order_by('pk').values_list('slug', flat=True)), ['model-b', 'model-b-2', 'model-c'],
+        )
+
+
+# --- PDF receipts (baseapp/receipts.py, baseapp/pdf.py) ---
+class HeldExecutor:
+    """Stands in for the receipt worker pool: renders run in-process, but only when run() is called."""
+
+    def __init__(self):
+        self.submitted = 0
+        self.pending = []
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        future = Future()
+        self.pending.append((future, fn, args))
+        return future
+
+    def run(self):
+        while self.pending:
+            future, fn, args = self.pending.pop(0)
+            future.set_result(fn(*args))
+
+
+class ReceiptRenderTests(TestCase):
+    """Downloads answer 202 while a render runs, then serve the cached PDF until the receipt's content changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.department = Department.objects.create(name='Finance', code='FIN', location=cls.location)
+        cls.category = Category.objects.create(name='Desktop')
+        SystemModel.objects.create(name='Model A', category=cls.category, location=cls.location)
+        User.objects.create_user('viewer', password='secret')
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.enterContext(override_settings(RECEIPT_CACHE_DIR=cache_dir, RECEIPT_RENDER_WAIT=0))
+        self.executor = HeldExecutor()
+        self.enterContext(mock.patch('baseapp.receipts._get_executor', return_value=self.executor))
+        self.addCleanup(receipts._in_flight.clear)
+        self.client.login(username='viewer', password='secret')
+        self.asset_request = AssetRequest.objects.create(
+            location=self.location, department=self.department, financial_year='2025-2026', asset_type=self.category,
+            description='Desktop for Finance', estimated_cost=Decimal('900.00'), item_type='capital', date=date(2025, 6, 1),
+        )
+
+    def reload(self):
+        return AssetRequest.objects.select_related('location', 'department', 'asset_type').get(pk=self.asset_request.pk)
+
+    def download(self, url):
+        response = self.client.get(url)
+        if response.status_code == 200:
+            response.content_bytes = b''.join(response.streaming_content)
+            response.close()
+        return response
+
+    def test_pending_render_answers_202_then_the_cached_pdf_is_served(self):
+        url = f'/request/{self.asset_request.pk}/receipt.pdf'
+        for _ in range(2):  # a second download while rendering shares the same render
+            response = self.download(url)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response['Retry-After'], '5')
+        self.assertEqual(self.executor.submitted, 1)
+
+        self.executor.run()
+        for _ in range(2):
+            response = self.download(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertTrue(response.content_bytes.startswith(b'%PDF'))
+        self.assertEqual(self.executor.submitted, 1)  # both served from the cache
+
+    def test_edits_change_the_receipt_version(self):
+        url = f'/request/{self.asset_request.pk}/receipt.pdf'
+        self.download(url)
+        self.executor.run()
+        stale_path = receipts.request_receipt(self.reload()).path
+        self.assertTrue(os.path.exists(stale_path))
+
+        AssetRequest.objects.filter(pk=self.asset_request.pk).update(estimated_cost=Decimal('950.00'))
+        self.assertNotEqual(receipts.request_receipt(self.reload()).path, stale_path)
+        self.assertEqual(self.download(url).status_code, 202)  # the stale PDF is not served
+        self.executor.run()
+        self.assertFalse(os.path.exists(stale_path))
+        self.assertEqual(self.download(url).status_code, 200)
+
+        survey_info = SurveyInfo.objects.create(
+            financial_year='2025-2026', date=date(2025, 6, 1), location=self.location, category=self.category,
+        )
+        save_survey_entries(survey_info, [(self.department, 'Model A', 3)])
+        first = receipts.survey_receipt(survey_info)
+        self.assertEqual(self.download(f'/survey/{survey_info.pk}/receipt.pdf').status_code, 202)
+        self.executor.run()
+        self.assertTrue(first.is_cached())
+        SurveyEntry.objects.filter(survey_info=survey_info).update(headcount=4)
+        self.assertFalse(receipts.survey_receipt(survey_info).is_cached())
+        self.assertEqual(self.download(f'/survey/{survey_info.pk}/receipt.pdf').status_code, 202)
+        self.assertEqual(self.executor.submitted, 4)
+
+
+# --- Content-addressed attachments (baseapp/storage.py, gc_attachment_blobs) ---
+class AttachmentStorageTests(TestCase):
+    """Identical uploads share one blob; GC removes only blobs that are unreferenced and past the grace period."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def age(self, name, hours=2):
+        past = time.time() - hours * 3600
+        os.utime(attachment_storage.path(name), (past, past))
+
+    def gc(self):
+        call_command('gc_attachment_blobs', stdout=io.StringIO())
+
+    def test_identical_content_is_stored_once(self):
+        first = attachment_storage.save('uploads/indent.pdf', ContentFile(b'%PDF-1.4 same'))
+        second = attachment_storage.save('uploads/copy.PDF', ContentFile(b'%PDF-1.4 same'))
+        other = attachment_storage.save('uploads/other.pdf', ContentFile(b'%PDF-1.4 other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(blob_digest(first), hashlib.sha256(b'%PDF-1.4 same').hexdigest())
+        self.assertEqual(len(os.listdir(os.path.dirname(attachment_storage.path(first)))), 1)
+
+    def test_gc_deletes_only_old_unreferenced_blobs(self):
+        referenced = attachment_storage.save('uploads/a.pdf', ContentFile(b'referenced'))
+        orphan = attachment_storage.save('uploads/b.pdf', ContentFile(b'orphan'))
+        recent = attachment_storage.save('uploads/c.pdf', ContentFile(b'recent'))
+        location = Location.objects.create(name='HQ')
+        AssetRequest.objects.create(
+            location=location, department=Department.objects.create(name='IT', code='IT', location=location),
+            financial_year='2025-2026', asset_type=Category.objects.create(name='Desktop'), description='PC',
+            estimated_cost=Decimal(100), item_type='capital', date=date(2025, 6, 1), indent_file=referenced,
+        )
+        self.age(referenced)
+        self.age(orphan)
+        self.gc()
+        self.assertTrue(attachment_storage.exists(referenced))
+        self.assertFalse(attachment_storage.exists(orphan))
+        self.assertTrue(attachment_storage.exists(recent))
+
+    def test_gc_deletes_stale_temp_files(self):
+        attachment_storage.save('uploads/a.pdf', ContentFile(b'saved'))  # creates the temp directory
+        for name in ('abandoned', 'in-progress'):
+            with open(attachment_storage.path(f'.cas-tmp/{name}'), 'wb') as temp:
+                temp.write(b'partial')
+        self.age('.cas-tmp/abandoned')
+        call_command('gc_attachment_blobs', '--dry-run', stdout=io.StringIO())
+        self.assertTrue(attachment_storage.exists('.cas-tmp/abandoned'))
+        output = io.StringIO()
+        call_command('gc_attachment_blobs', stdout=output)
+        self.assertIn('1 stale temp file(s)', output.getvalue())
+        self.assertEqual(os.listdir(attachment_storage.path('.cas-tmp')), ['in-progress'])
+
+    def test_uploading_an_orphan_again_restarts_its_grace_period(self):
+        name = attachment_storage.save('uploads/a.pdf', ContentFile(b'orphan'))
+        self.age(name)
+        # Uploaded again for a request that is still being saved.
+        self.assertEqual(attachment_storage.save('uploads/a.pdf', ContentFile(b'orphan')), name)
+        self.gc()
+        self.assertTrue(attachment_storage.exists(name))
+
+
+# --- Resumable chunked uploads (baseapp/uploads.py) ---
+class ChunkedUploadTests(TestCase):
+    """Chunks are accepted only at the next expected offset, by the upload's owner, and attached on submission."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('requester', password='secret')
+        User.objects.create_user('other', password='secret')
+        cls.location = Location.objects.create(name='HQ')
+        cls.department = Department.objects.create(name='IT', code='IT', location=cls.location)
+        cls.category = Category.objects.create(name='Desktop')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=media_root, CHUNKED_UPLOAD_TEMP_DIR=os.path.join(media_root, 'partial'),
+        ))
+        self.client.login(username='requester', password='secret')
+
+    def start(self, size, filename='indent.pdf'):
+        response = self.client.post(
+            '/request/uploads/', json.dumps({'filename': filename, 'size': size}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['token']
+
+    def send(self, token, offset, chunk):
+        return self.client.post(
+            f'/request/uploads/{token}/', chunk, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_upload_resumes_from_the_received_offset(self):
+        token = self.start(10)
+        self.assertEqual(self.send(token, 0, b'%PDF-').json()['received'], 5)
+        # The client lost track of its progress: it asks, then continues from there.
+        status = self.client.get(f'/request/uploads/{token}/').json()
+        self.assertEqual((status['received'], status['complete']), (5, False))
+        status = self.send(token, status['received'], b'1.4 x').json()
+        self.assertEqual((status['received'], status['complete']), (10, True))
+        with open(temp_path(ChunkedUpload.objects.get(token=token)), 'rb') as partial:
+            self.assertEqual(partial.read(), b'%PDF-1.4 x')
+
+    def test_unexpected_offsets_are_rejected(self):
+        token = self.start(10)
+        self.send(token, 0, b'%PDF-')
+        for offset, chunk in ((0, b'%PDF-'), (8, b'xx'), (3, b'F-1.4')):  # duplicate, ahead, overlapping
+            response = self.send(token, offset, chunk)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.json()['received'], 5)
+        self.assertEqual(self.send(token, 5, b'1.4 xxx').status_code, 413)  # past the declared size
+        self.send(token, 5, b'1.4 x')
+        self.assertEqual(self.send(token, 10, b'x').status_code, 409)  # already complete
+        with open(temp_path(ChunkedUpload.objects.get(token=token)), 'rb') as partial:
+            self.assertEqual(partial.read(), b'%PDF-1.4 x')
+
+    def test_failed_chunk_hands_its_offset_back(self):
+        upload = ChunkedUpload.objects.get(token=self.start(10))
+        with self.assertRaisesMessage(UploadError, 'shorter than its Content-Length'):
+            append_chunk(upload, 0, io.BytesIO(b'%PDF'), 5)
+        stream = mock.Mock(read=mock.Mock(side_effect=OSError('connection reset')))
+        with self.assertRaises(OSError):
+            append_chunk(upload, 0, stream, 5)
+        self.assertEqual(ChunkedUpload.objects.get(pk=upload.pk).received, 0)
+
+        # Another writer has already claimed the offset: this one is turned away before writing.
+        ChunkedUpload.objects.filter(pk=upload.pk).update(received=5)
+        with self.assertRaisesMessage(UploadError, 'modified concurrently'):
+            append_chunk(upload, 0, io.BytesIO(b'XXXXX'), 5)
+        with open(temp_path(upload), 'rb') as partial:
+            self.assertEqual(partial.read(), b'%PDF')
+
+        upload.refresh_from_db()
+        append_chunk(upload, 5, io.BytesIO(b'1.4 x'), 5)
+        self.assertTrue(ChunkedUpload.objects.get(pk=upload.pk).is_complete)
+
+    def test_uploads_belong_to_their_user(self):
+        token = self.start(4)
+        self.client.login(username='other', password='secret')
+        self.assertEqual(self.client.get(f'/request/uploads/{token}/').status_code, 404)
+        self.assertEqual(self.send(token, 0, b'%PDF').status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.send(token, 0, b'%PDF').status_code, 302)
+        self.assertEqual(ChunkedUpload.objects.get(token=token).received, 0)
+
+    def test_submission_attaches_finished_uploads_only(self):
+        data = {
+            'location': self.location.id, 'department': self.department.id, 'financial_year': '2025-2026',
+            'asset_type': self.category.id, 'description': 'Workstation', 'estimated_cost': '1200',
+            'item_type': 'capital', 'date': '2025-06-01',
+        }
+        token = self.start(8)
+        self.send(token, 0, b'%PDF')
+        response = self.client.post('/request/', {**data, 'indent_file_token': token})
+        self.assertEqual(response.status_code, 200)  # form error: the upload has not finished
+        self.assertFalse(AssetRequest.objects.exists())
+
+        partial = temp_path(ChunkedUpload.objects.get(token=token))
+        self.send(token, 4, b'-1.4')
+        response = self.client.post('/request/', {**data, 'indent_file_token': token})
+        self.assertRedirects(response, '/request/receipt/', fetch_redirect_response=False)
+        asset_request = AssetRequest.objects.get()
+        with asset_request.indent_file.open('rb') as attached:
+            self.assertEqual(attached.read(), b'%PDF-1.4')
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertFalse(os.path.exists(partial))
+
+
+# --- Duplicate detection (baseapp/duplicates.py) ---
+class DuplicateDetectionTests(TestCase):
+    """Near-identical descriptions in the same group are flagged; the index follows edits and deletes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.accounts = Department.objects.create(name='Accounts', code='ACC', location=cls.location)
+        cls.stores = Department.objects.create(name='Stores', code='STO', location=cls.location)
+        cls.category = Category.objects.create(name='Desktop')
+
+    def create(self, description, department=None):
+        return AssetRequest.objects.create(
+            location=self.location, department=department or self.accounts, financial_year='2025-2026',
+            asset_type=self.category, description=description, estimated_cost=Decimal(1200),
+            item_type='capital', date=date(2025, 6, 1),
+        )
+
+    def matches(self, asset_request):
+        return [match.asset_request_id for match in find_duplicates(asset_request)]
+
+    def test_near_duplicate_is_flagged(self):
+        original = self.create('Dell OptiPlex 7010 desktop for the accounts team')
+        resubmitted = self.create('Dell Optiplex 7010 desktops for accounts team')
+        match = flag_duplicates(resubmitted)
+        self.assertEqual(match.asset_request_id, original.pk)
+        self.assertGreaterEqual(match.score, DUPLICATE_THRESHOLD)
+        resubmitted.refresh_from_db()
+        self.assertEqual((resubmitted.duplicate_of_id, resubmitted.duplicate_score), (original.pk, match.score))
+
+    def test_different_request_or_group_is_not_a_duplicate(self):
+        self.create('Dell OptiPlex 7010 desktop for the accounts team')
+        self.assertEqual(self.matches(self.create('HP LaserJet printer toner for the accounts team')), [])
+        # Same words, other department: a separate need, not a duplicate.
+        other = self.create('Dell OptiPlex 7010 desktop for the accounts team', department=self.stores)
+        self.assertIsNone(flag_duplicates(other))
+        other.refresh_from_db()
+        self.assertIsNone(other.duplicate_of_id)
+
+    def test_index_follows_edits_and_deletes(self):
+        original = self.create('Dell OptiPlex 7010 desktop for the accounts team')
+        resubmitted = self.create('Dell Optiplex 7010 desktops for accounts team')
+        self.assertEqual(self.matches(resubmitted), [original.pk])
+
+        original.description = 'HP LaserJet printer toner for the stores section'
+        original.save()
+        self.assertEqual(self.matches(resubmitted), [])
+        self.assertEqual(
+            set(original.duplicate_buckets.values_list('key', flat=True)), Fingerprint(original).keys,
+        )
+
+        original.description = 'Dell OptiPlex 7010 desktop for the accounts team'
+        original.save()
+        self.assertEqual(self.matches(resubmitted), [original.pk])
+
+        original.delete()
+        self.assertEqual(self.matches(resubmitted), [])
+        self.assertFalse(AssetRequestBucket.objects.filter(asset_request_id=original.pk).exists())
+        self.assertTrue(AssetRequestFingerprint.objects.filter(asset_request_id=resubmitted.pk).exists())
+
+
+# --- Request search index (baseapp/search.py) ---
+class SearchIndexTests(TestCase):
+    """The index follows creates, edits, renames and deletes, with FTS5 and with the fallback term index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='Head Office')
+        cls.department = Department.objects.create(name='Accounts', code='ACC', location=cls.location)
+        cls.category = Category.objects.create(name='Desktop')
+
+    def search(self, query):
+        return sorted(search.filter_requests(AssetRequest.objects.all(), query).values_list('pk', flat=True))
+
+    def check_index_follows_changes(self):
+        laptop = AssetRequest.objects.create(
+            location=self.location, department=self.department, financial_year='2025-2026',
+            asset_type=self.category, description='Lenovo ThinkPad laptop', estimated_cost=Decimal(900),
+            item_type='capital', date=date(2025, 6, 1),
+        )
+        # Created from ids only: indexed from a re-read of the row instead.
+        printer = AssetRequest.objects.create(
+            location_id=self.location.id, department_id=self.department.id, financial_year='2025-2026',
+            asset_type_id=self.category.id, description='Colour printer', remarks='Café floor',
+            estimated_cost=Decimal(300), item_type='revenue', date=date(2025, 6, 1),
+        )
+        self.assertEqual(self.search('lapt'), [laptop.pk])
+        self.assertEqual(self.search('cafe accounts'), [printer.pk])
+        self.assertEqual(self.search('head office desktop'), [laptop.pk, printer.pk])
+
+        laptop.description = 'Dell Latitude notebook'
+        laptop.save()
+        self.assertEqual(self.search('laptop'), [])
+        self.assertEqual(self.search('latitude'), [laptop.pk])
+
+        self.location.name = 'Branch'
+        self.location.save()
+        self.assertEqual(self.search('office'), [])
+        self.assertEqual(self.search('branch printer'), [printer.pk])
+
+        printer.delete()
+        self.assertEqual(self.search('printer'), [])
+        self.assertEqual(self.search('branch'), [laptop.pk])
+        self.assertEqual(search.rebuild(), 1)
+        self.assertEqual(self.search('branch'), [laptop.pk])
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 index is SQLite-only')
+    def test_fts_index_follows_changes(self):
+        self.check_index_follows_changes()
+        self.assertFalse(AssetRequestSearchTerm.objects.exists())
+
+    def test_fallback_index_follows_changes(self):
+        with mock.patch('baseapp.search.uses_fts', return_value=False):
+            self.check_index_follows_changes()
+        self.assertTrue(AssetRequestSearchTerm.objects.filter(term='latitude').exists())
+
+    def test_new_request_is_indexed_without_reading_it_back(self):
+        with CaptureQueriesContext(connection) as queries:
+            AssetRequest.objects.create(
+                location=self.location, department=self.department, financial_year='2025-2026',
+                asset_type=self.category, description='Scanner', estimated_cost=Decimal(200),
+                item_type='revenue', date=date(2025, 6, 1),
+            )
+        fts_queries = [query['sql'] for query in queries if search.FTS_TABLE in query['sql']]
+        self.assertEqual(len(fts_queries), 1)
+        self.assertIn(f'INSERT INTO {search.FTS_TABLE}', fts_queries[0])
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "baseapp_assetrequest"."id"')])
+
+
+# --- Survey matrix import (baseapp/survey_import.py) ---
+class SurveyImportTests(TestCase):
+    """CSV and XLSX matrices parse to the same cells, and every problem in a file is reported at once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.category = Category.objects.create(name='Desktop')
+        cls.finance = Department.objects.create(name='Finance', code='FIN', location=cls.location)
+        cls.sales = Department.objects.create(name='Sales', code='SAL', location=cls.location)
+        SystemModel.objects.create(name='Model A', category=cls.category, location=cls.location)
+        SystemModel.objects.create(name='Model B', category=cls.category, location=cls.location)
+
+    def setUp(self):
+        refdata._cache.invalidate()
+
+    def parse(self, rows, **kwargs):
+        return sorted(
+            (department.code, model_name, headcount)
+            for department, model_name, headcount in parse_matrix(rows, self.location, self.category, **kwargs)
+        )
+
+    def errors(self, rows, **kwargs):
+        with self.assertRaises(SurveyImportError) as raised:
+            parse_matrix(rows, self.location, self.category, **kwargs)
+        return raised.exception.errors
+
+    expected = [('FIN', 'Model A', 3), ('SAL', 'Model A', 1), ('SAL', 'Model B', 12)]
+
+    def test_csv_matrix(self):
+        data = '\ufeffDepartment,model a,Model B\r\nFIN,3.0,\r\nsales,1,12\r\n,,\r\n'.encode('utf-8')
+        rows = read_matrix(io.BytesIO(data), 'survey.CSV')
+        self.assertEqual(self.parse(rows), self.expected)
+
+    def test_xlsx_matrix(self):
+        workbook = b''.join(stream_xlsx(['Department', 'Model A', 'Model B'], [['Finance', 3, 0], ['SAL', 1, 12]]))
+        rows = read_matrix(io.BytesIO(workbook), 'survey.xlsx')
+        self.assertEqual(rows[1], ['Finance', '3', '0'])
+        self.assertEqual(self.parse(rows), self.expected)
+
+    def test_every_problem_is_reported(self):
+        errors = self.errors([
+            ['Department', 'Model A', 'Model Z', 'model a', ''],
+            ['FIN', '2', '1', '', ''],
+            ['Marketing', '1', '', '', ''],
+            ['fin', '-1', '', '', '4'],
+        ])
+        self.assertEqual(errors, [
+            "C1: unknown model 'Model Z' for HQ / Desktop.",
+            "D1: model 'model a' appears more than once.",
+            "A3: 'Marketing' is not a department at HQ.",
+            "A4: department 'fin' appears more than once.",
+            "B4: '-1' is not a whole, non-negative number.",
+            "E4: value in a column without a model name.",
+        ])
+        self.assertEqual(self.errors([['Department', 'Model A'], ['FIN', '0']]), [
+            "The file contains no headcounts greater than zero.",
+        ])
+
+    def test_new_models_are_created_only_on_request(self):
+        rows = [['Department', 'Model C'], ['FIN', '2']]
+        self.assertEqual(self.errors(rows), ["B1: unknown model 'Model C' for HQ / Desktop."])
+        self.assertEqual(self.parse(rows, create_models=True), [('FIN', 'Model C', 2)])
+        self.assertEqual(
+            self.errors([['Department', 'Model C', 'model c'], ['FIN', '2', '1']], create_models=True),
+            ["C1: model 'model c' appears more than once."],
+        )
+
+    def test_models_differing_only_in_case_need_the_exact_name(self):
+        SystemModel.objects.create(name='MODEL A', category=self.category, location=self.location)
+        self.assertEqual(self.errors([['Department', 'model a'], ['FIN', '2']]), [
+            "B1: model 'model a' matches 'MODEL A', 'Model A' at HQ / Desktop; use the exact name.",
+        ])
+        self.assertEqual(
+            self.parse([['Department', 'Model A', 'MODEL A'], ['FIN', '2', '5']]),
+            [('FIN', 'MODEL A', 5), ('FIN', 'Model A', 2)],
+        )
+
+    def test_unreadable_files(self):
+        with self.assertRaisesMessage(SurveyImportError, 'not a valid .xlsx workbook'):
+            read_matrix(io.BytesIO(b'Department,Model A'), 'survey.xlsx')
+        with self.assertRaisesMessage(SurveyImportError, 'could not be read'):
+            read_matrix(io.BytesIO('Department,Model A'.encode('utf-16')), 'survey.csv')
+        with self.assertRaisesMessage(SurveyImportError, 'Unsupported file type .xls'):
+            read_matrix(io.BytesIO(b''), 'survey.xls')
+
+    def rewritten_workbook(self, replacements, extra=()):
+        source = zipfile.ZipFile(io.BytesIO(b''.join(stream_xlsx(['Department', 'Model A'], [['FIN', 2]]))))
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, 'w') as archive:
+            for name in source.namelist():
+                data = source.read(name)
+                for old, new in replacements:
+                    data = data.replace(old, new)
+                archive.writestr(name, data)
+            for name, data in extra:
+                archive.writestr(name, data)
+        output.seek(0)
+        return output
+
+    def test_oversized_cell_references_are_refused_before_padding(self):
+        with self.assertRaisesMessage(SurveyImportError, 'Row 999999999 is out of order or beyond the last worksheet row'):
+            read_matrix(self.rewritten_workbook([(b'<row r="2">', b'<row r="999999999">')]), 'survey.xlsx')
+        with self.assertRaisesMessage(SurveyImportError, 'Cell ZZZZ2 is beyond the last worksheet column'):
+            read_matrix(self.rewritten_workbook([(b'<c r="B2">', b'<c r="ZZZZ2">')]), 'survey.xlsx')
+        with mock.patch('baseapp.survey_import.MAX_SHEET_BYTES', 1024):
+            with self.assertRaisesMessage(SurveyImportError, 'shared strings are too large'):
+                read_matrix(self.rewritten_workbook([], [('xl/sharedStrings.xml', b' ' * 2048)]), 'survey.xlsx')
+
+
+# --- Budget rollup (baseapp/budgets.py) ---
+class BudgetRollupTests(TestCase):
+    """The incrementally maintained rollup matches a full rebuild after edits, review actions and deletes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.finance = Department.objects.create(name='Finance', code='FIN', location=cls.location)
+        cls.sales = Department.objects.create(name='Sales', code='SAL', location=cls.location)
+        cls.desktop = Category.objects.create(name='Desktop')
+        cls.printer = Category.objects.create(name='Printer')
+        User.objects.create_user('viewer', password='secret')
+
+    def create(self, department, category, cost, item_type='capital', financial_year='2025-2026'):
+        return AssetRequest.objects.create(
+            location=self.location, department=department, financial_year=financial_year, asset_type=category,
+            description=f'{category.name} for {department.name}', estimated_cost=Decimal(cost),
+            item_type=item_type, date=date(2025, 6, 1),
+        )
+
+    def rollup(self):
+        return sorted(BudgetRollup.objects.values_list(
+            *budgets.ROLLUP_KEY_FIELDS, 'total_cost', 'request_count',
+        ))
+
+    def assert_matches_rebuild(self):
+        maintained = self.rollup()
+        budgets.rebuild_rollup()
+        self.assertEqual(maintained, self.rollup())
+
+    def test_incremental_rollup_matches_a_rebuild(self):
+        requests = [
+            self.create(department, category, 100 * (index + 1), item_type)
+            for index, (department, category, item_type) in enumerate([
+                (self.finance, self.desktop, 'capital'), (self.finance, self.desktop, 'capital'),
+                (self.finance, self.printer, 'revenue'), (self.sales, self.desktop, 'capital'),
+                (self.sales, self.printer, 'revenue'), (self.sales, self.printer, 'capital'),
+            ])
+        ]
+        self.create(self.sales, self.desktop, 50, financial_year='2024-2025')
+        self.assert_matches_rebuild()
+
+        # Single-row saves that move a request between groups or change its cost.
+        requests[0].estimated_cost = Decimal('150.50')
+        requests[0].save()
+        requests[1].department = self.sales
+        requests[1].status = 'approved'
+        requests[1].save()
+        self.assert_matches_rebuild()
+
+        # Review actions (queryset .update()); a request decided already is left alone.
+        apply_review_action([requests[2].pk, requests[3].pk, requests[1].pk], 'approve')
+        apply_review_action([requests[4].pk], 'reject')
+        self.assert_matches_rebuild()
+
+        requests[5].delete()
+        requests[3].delete()  # the last request in its group: the row is removed
+        self.assert_matches_rebuild()
+        self.sales.delete()  # cascades to its requests
+        self.assert_matches_rebuild()
+        self.assertEqual(set(BudgetRollup.objects.values_list('department_id', flat=True)), {self.finance.id})
+
+    def test_api_totals_come_from_the_rollup(self):
+        self.create(self.finance, self.desktop, 100)
+        self.create(self.finance, self.printer, 40, 'revenue')
+        apply_review_action([self.create(self.sales, self.desktop, 250).pk], 'approve')
+        self.client.login(username='viewer', password='secret')
+
+        data = self.client.get('/budget/api/', {'financial_year': '2025-2026'}).json()
+        self.assertEqual(data['group_by'], 'location')
+        self.assertEqual(data['totals']['request_count'], 3)
+        self.assertEqual(Decimal(data['totals']['total_cost']), Decimal(390))
+
+        data = self.client.get('/budget/api/', {
+            'financial_year': '2025-2026', 'location': self.location.id, 'group_by': 'department',
+        }).json()
+        self.assertEqual(
+            [(row['label'], Decimal(row['total_cost']), Decimal(row['by_status']['approved'])) for row in data['rows']],
+            [('Finance', Decimal(140), Decimal(0)), ('Sales', Decimal(250), Decimal(250))],
+        )
+
+
+# --- Streaming exports (baseapp/exports.py) ---
+class ExportTests(TestCase):
+    """CSV and XLSX exports stream every matching row in chunks, under the report's header."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.department = Department.objects.create(name='Finance', code='FIN', location=cls.location)
+        cls.category = Category.objects.create(name='Desktop')
+        # Bulk-created: spans several EXPORT_CHUNK_ROWS chunks without running the index signals per row.
+        AssetRequest.objects.bulk_create([
+            AssetRequest(
+                location=cls.location, department=cls.department, asset_type=cls.category,
+                financial_year='2025-2026' if index % 4 else '2024-2025', description=f'Request {index}',
+                estimated_cost=Decimal(100 + index), item_type='capital', date=date(2025, 6, 1),
+            )
+            for index in range(EXPORT_CHUNK_ROWS * 2 + 100)
+        ])
+        AssetRequest.objects.filter(description='Request 1').update(description='=HYPERLINK("x")\x07')
+        survey_info = SurveyInfo.objects.create(financial_year='2025-2026', location=cls.location, category=cls.category)
+        for name in ('Model A', 'Model B'):
+            system_model = SystemModel.objects.create(name=name, category=cls.category, location=cls.location)
+            SurveyEntry.objects.create(
+                survey_info=survey_info, location=cls.location, department=cls.department,
+                system_model=system_model, headcount=2,
+            )
+        User.objects.create_user('viewer', password='secret')
+
+    def setUp(self):
+        self.client.login(username='viewer', password='secret')
+
+    def export(self, url, data=None):
+        response = self.client.get(url, data)
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        return response, chunks, b''.join(chunks)
+
+    def test_request_report_csv(self):
+        response, chunks, content = self.export('/request/report/export/csv/')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="asset_requests.csv"')
+        self.assertGreater(len(chunks), 2)
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8'))))
+        self.assertEqual(rows[0], [label for label, _ in REQUEST_EXPORT_COLUMNS])
+        self.assertEqual(len(rows) - 1, AssetRequest.objects.count())
+        # Text a spreadsheet would run as a formula is quoted.
+        self.assertIn("'=HYPERLINK(\"x\")\x07", [row[7] for row in rows])
+
+        _, _, content = self.export('/request/report/export/csv/', {'financial_year': '2025-2026'})
+        self.assertEqual(
+            content.decode('utf-8').count('\r\n') - 1, AssetRequest.objects.filter(financial_year='2025-2026').count(),
+        )
+
+    def test_request_report_xlsx(self):
+        response, chunks, content = self.export('/request/report/export/xlsx/')
+        self.assertEqual(response['Content-Type'], EXPORT_FORMATS['xlsx'][0])
+        self.assertGreater(len(chunks), 2)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertIn('xl/worksheets/sheet1.xml', archive.namelist())
+        rows = read_xlsx_rows(io.BytesIO(content))
+        self.assertEqual(rows[0], [label for label, _ in REQUEST_EXPORT_COLUMNS])
+        self.assertEqual(len(rows) - 1, AssetRequest.objects.count())
+        # Control characters are dropped; XML 1.0 cannot hold them.
+        self.assertIn('=HYPERLINK("x")', [row[7] for row in rows])
+
+    def test_consolidated_report_exports(self):
+        _, _, content = self.export('/report/export/csv/')
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8'))))
+        self.assertEqual(rows[0], [label for label, _ in SURVEY_EXPORT_COLUMNS])
+        self.assertEqual([row[3] for row in rows[1:]], ['Model A', 'Model B'])
+
+        _, _, content = self.export('/report/export/xlsx/')
+        self.assertEqual(read_xlsx_rows(io.BytesIO(content))[1:], [
+            ['2025-2026', 'HQ', 'Finance', name, 'Executive', '2', '1'] for name in ('Model A', 'Model B')
+        ])
+        self.assertEqual(self.client.get('/report/export/pdf/').status_code, 404)
+
+
+# --- Keyset pagination (baseapp/pagination.py) ---
+class KeysetPaginationTests(TestCase):
+    """Pages follow the report ordering through ties, stay put under inserts and reject forged cursors."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.finance = Department.objects.create(name='Finance', code='FIN', location=cls.location)
+        cls.sales = Department.objects.create(name='Sales', code='SAL', location=cls.location)
+        cls.category = Category.objects.create(name='Desktop')
+        # Many rows share date, location and department, so only the id breaks the ties.
+        for index in range(11):
+            cls.create(cls.sales if index % 3 else cls.finance, date(2025, 6, 1 + index % 2))
+        User.objects.create_user('viewer', password='secret')
+
+    @classmethod
+    def create(cls, department, request_date):
+        return AssetRequest.objects.create(
+            location=cls.location, department=department, financial_year='2025-2026', asset_type=cls.category,
+            description='Monitor', estimated_cost=Decimal(100), item_type='capital', date=request_date,
+        )
+
+    def paginator(self):
+        return KeysetPaginator(
+            AssetRequest.objects.select_related('location', 'department'), REQUEST_REPORT_ORDERING, per_page=3,
+        )
+
+    def walk(self, cursor=None):
+        ids = []
+        while True:
+            page = self.paginator().page(cursor)
+            ids.extend(request.pk for request in page)
+            if not page.has_next:
+                return ids
+            cursor = page.next_cursor
+
+    def test_pages_follow_the_ordering_through_ties(self):
+        ordered = list(AssetRequest.objects.order_by(*REQUEST_REPORT_ORDERING).values_list('pk', flat=True))
+        self.assertEqual(self.walk(), ordered)
+        first = self.paginator().page()
+        self.assertTrue(first.is_first)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(
+            [request.pk for chunk in self.paginator().chunks(chunk_size=4) for request in chunk], ordered,
+        )
+
+    def test_cursor_is_stable_under_inserts(self):
+        first = self.paginator().page()
+        rest = self.walk(first.next_cursor)
+        seen = {request.pk for request in first}
+        # One row sorts before the cursor (newer date), one after it (older date), one at the same position.
+        self.create(self.finance, date(2025, 6, 9))
+        later = self.create(self.sales, date(2025, 5, 1))
+        tied = self.create(self.sales, date(2025, 6, 1))
+
+        after_insert = self.walk(first.next_cursor)
+        self.assertFalse(seen.intersection(after_insert))
+        self.assertEqual([pk for pk in after_insert if pk not in (later.pk, tied.pk)], rest)
+        self.assertEqual(after_insert[-1], later.pk)
+        self.assertIn(tied.pk, after_insert)
+
+    def test_forged_cursors_are_rejected(self):
+        cursor = self.paginator().page().next_cursor
+        value, signature = cursor.rsplit(':', 1)
+        forged = [
+            f'{value}:{signature[:-1]}{"A" if signature[-1] != "A" else "B"}',
+            signing.dumps(['2030-01-01', 'HQ', 'Finance', 1], salt='some.other.salt'),
+            signing.dumps(['2030-01-01', 1], salt=KeysetPaginator.salt),  # signed, but the wrong shape
+            'garbage',
+        ]
+        for cursor in forged:
+            with self.assertRaises(InvalidCursor):
+                self.paginator().page(cursor)
+
+        self.client.login(username='viewer', password='secret')
+        response = self.client.get('/request/report/', {'after': forged[0]})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['page'].is_first)
+
+
+# --- Consolidated report pivot (baseapp/reports.py) ---
+class SurveyPivotTests(TestCase):
+    """The GROUP BY pivot over SurveyAggregate matches a pivot built entry by entry in Python."""
+
+    @classmethod
+    def setUpTestData(cls):
+        hq, branch = Location.objects.create(name='HQ'), Location.objects.create(name='Branch')
+        category = Category.objects.create(name='Desktop')
+        rows = [
+            # (location, department, model, financial year, manpower type, headcount)
+            (hq, 'Finance', 'Model A', '2025-2026', 'exe', 3),
+            (hq, 'Finance', 'Model A', '2025-2026', 'mr', 2),
+            (hq, 'Finance', 'Model B', '2025-2026', 'exe', 0),
+            (hq, 'Sales', 'Model B', '2025-2026', 'dr', 7),
+            (branch, 'Stores', 'Model A', '2025-2026', 'exe', 4),  # a model name shared across locations: one column
+            (branch, 'Stores', 'Model C', '2024-2025', 'exe', 5),
+            (hq, 'Sales', 'Model A', '2024-2025', 'exe', 1),
+        ]
+        departments, system_models = {}, {}
+        for index, (location, department_name, model_name, financial_year, manpower_type, headcount) in enumerate(rows):
+            if (location, department_name) not in departments:
+                departments[location, department_name] = Department.objects.create(
+                    name=department_name, code=f'{location.name[0]}{department_name[:3]}', location=location,
+                )
+            if (location, model_name) not in system_models:
+                system_models[location, model_name] = SystemModel.objects.create(
+                    name=model_name, category=category, location=location,
+                )
+            survey_info = SurveyInfo.objects.create(
+                financial_year=financial_year, location=location, category=category,
+                date=date(2025, 6, 1) + timedelta(days=index),
+            )
+            SurveyEntry.objects.create(
+                survey_info=survey_info, location=location, department=departments[location, department_name],
+                system_model=system_models[location, model_name], headcount=headcount, manpower_type=manpower_type,
+            )
+        User.objects.create_user('viewer', password='secret')
+
+    def python_pivot(self, financial_year=None):
+        entries = SurveyEntry.objects.select_related('survey_info', 'department', 'system_model')
+        if financial_year:
+            entries = entries.filter(survey_info__financial_year=financial_year)
+        matrix, total_entries = {}, 0
+        for entry in entries:
+            cells = matrix.setdefault(entry.department.name, {})
+            cells[entry.system_model.name] = cells.get(entry.system_model.name, 0) + entry.headcount
+            total_entries += 1
+        headers = sorted({name for cells in matrix.values() for name in cells})
+        rows = [
+            {
+                'department': name,
+                'counts_list': [matrix[name].get(header, 0) for header in headers],
+                'dept_total': sum(matrix[name].values()),
+            }
+            for name in sorted(matrix)
+        ]
+        column_totals = [sum(row['counts_list'][index] for row in rows) for index in range(len(headers))]
+        return {
+            'survey_data_headers': headers,
+            'survey_data_rows': rows,
+            'model_totals': column_totals,
+            'overall_total': sum(column_totals),
+            'total_entries': total_entries,
+        }
+
+    def test_pivot_matches_the_python_built_report(self):
+        self.client.login(username='viewer', password='secret')
+        for financial_year in (None, '2025-2026', '2024-2025'):
+            expected = self.python_pivot(financial_year)
+            aggregates = SurveyAggregate.objects.all()
+            entries = SurveyEntry.objects.all()
+            if financial_year:
+                aggregates = aggregates.filter(financial_year=financial_year)
+                entries = entries.filter(survey_info__financial_year=financial_year)
+            self.assertEqual(build_survey_pivot(aggregates, count_field='entry_count').as_context(), expected)
+            self.assertEqual(build_survey_pivot(entries).as_context(), expected)
+
+            response = self.client.get('/report/', {'financial_year': financial_year} if financial_year else {})
+            self.assertEqual({key: response.context[key] for key in expected}, expected)
+        self.assertEqual(self.python_pivot()['survey_data_rows'][0], {
+            'department': 'Finance', 'counts_list': [5, 0, 0], 'dept_total': 5,
+        })
+
+
+# --- Survey aggregates (baseapp/aggregates.py, kept up to date in baseapp/signals.py) ---
+class SurveyAggregateTests(TestCase):
+    """Admin edits, entry deletes and survey deletes leave the aggregates equal to a full rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = Location.objects.create(name='HQ')
+        cls.category = Category.objects.create(name='Desktop')
+        cls.finance = Department.objects.create(name='Finance', code='FIN', location=cls.location)
+        cls.sales = Department.objects.create(name='Sales', code='SAL', location=cls.location)
+        cls.stores = Department.objects.create(name='Stores', code='STO', location=cls.location)
+        cls.model_a = SystemModel.objects.create(name='Model A', category=cls.category, location=cls.location)
+        cls.model_b = SystemModel.objects.create(name='Model B', category=cls.category, location=cls.location)
+        User.objects.create_superuser('admin', password='secret')
+
+    def setUp(self):
+        self.june = self.survey(date(2025, 6, 1), 3)
+        self.july = self.survey(date(2025, 7, 1), 5)
+        self.client.login(username='admin', password='secret')
+
+    def survey(self, survey_date, headcount):
+        survey_info = SurveyInfo.objects.create(
+            financial_year='2025-2026', date=survey_date, location=self.location, category=self.category,
+        )
+        save_survey_entries(survey_info, [
+            (department, system_model.name, headcount)
+            for department in (self.finance, self.sales) for system_model in (self.model_a, self.model_b)
+        ])
+        return survey_info
+
+    def aggregates(self):
+        return sorted(SurveyAggregate.objects.values_list(
+            'financial_year', 'department_id', 'system_model_id', 'manpower_type', 'headcount', 'entry_count',
+        ))
+
+    def assert_matches_rebuild(self):
+        maintained = self.aggregates()
+        rebuild_aggregates()
+        self.assertEqual(maintained, self.aggregates())
+        return maintained
+
+    def test_admin_edits(self):
+        entry = self.june.entries.get(department=self.finance, system_model=self.model_a)
+        response = self.client.post(f'/admin/baseapp/surveyentry/{entry.pk}/change/', {
+            'survey_info': self.june.pk, 'location': self.location.pk, 'department': self.stores.pk,
+            'system_model': self.model_a.pk, 'headcount': 9, 'manpower_type': 'mr',
+            'created_at_0': '2025-06-01', 'created_at_1': '09:00:00',
+        })
+        self.assertEqual(response.status_code, 302)
+        maintained = self.assert_matches_rebuild()
+        self.assertIn(('2025-2026', self.stores.id, self.model_a.id, 'mr', 9, 1), maintained)
+        self.assertIn(('2025-2026', self.finance.id, self.model_a.id, 'exe', 5, 1), maintained)
+
+        response = self.client.post(f'/admin/baseapp/surveyinfo/{self.july.pk}/change/', {
+            'date': '2025-07-01', 'financial_year': '2026-2027', 'location': self.location.pk,
+            'category': self.category.pk, 'created_at_0': '2025-07-01', 'created_at_1': '09:00:00',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(('2026-2027', self.finance.id, self.model_a.id, 'exe', 5, 1), self.assert_matches_rebuild())
+
+    def test_entry_deletes(self):
+        self.june.entries.get(department=self.finance, system_model=self.model_a).delete()
+        self.assert_matches_rebuild()
+        SurveyEntry.objects.filter(department=self.sales).delete()
+        self.assert_matches_rebuild()
+        entry = self.july.entries.get(system_model=self.model_a)
+        response = self.client.post(f'/admin/baseapp/surveyentry/{entry.pk}/delete/', {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.assert_matches_rebuild(), [('2025-2026', self.finance.id, self.model_b.id, 'exe', 8, 2)])
+
+    def test_survey_delete_cascades_to_the_aggregates(self):
+        june_id = self.june.pk
+        self.june.delete()
+        self.assertEqual(self.assert_matches_rebuild(), sorted(
+            ('2025-2026', department.id, system_model.id, 'exe', 5, 1)
+            for department in (self.finance, self.sales) for system_model in (self.model_a, self.model_b)
+        ))
+        self.assertFalse(SurveyEntry.objects.filter(survey_info_id=june_id).exists())
+
+        SurveyInfo.objects.filter(pk=self.july.pk).delete()
+        self.assertEqual(self.assert_matches_rebuild(), [])
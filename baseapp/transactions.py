@@ -0,0 +1,55 @@
+# baseapp/transactions.py
+
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseBusy(OperationalError):
+    """A write transaction still found the database locked after every retry."""
+
+
+def is_lock_error(exc):
+    """True for SQLite's "database is locked" / "database table is locked" errors."""
+    return isinstance(exc, OperationalError) and 'locked' in str(exc).lower()
+
+
+def atomic_with_retry(func, attempts=None, backoff=None, using=DEFAULT_DB_ALIAS):
+    """
+    Runs `func()` in transaction.atomic() and returns its result, rerunning the
+    whole transaction when another writer holds the database lock.
+
+    SQLite already waits busy_timeout for the lock; this covers writers that
+    still lose, with up to DB_WRITE_ATTEMPTS tries and jittered exponential
+    backoff from DB_WRITE_RETRY_BACKOFF seconds, then raises DatabaseBusy.
+    `func` must be safe to run again from the start.
+
+    Only the outermost transaction can be rolled back and rerun, so inside an
+    outer atomic block (or with ATOMIC_REQUESTS) `func` runs exactly once, as a
+    savepoint, and a lock error propagates unchanged for whoever owns the outer
+    transaction to handle. Call it outside any transaction to get the retries.
+    """
+    if connections[using].in_atomic_block:
+        with transaction.atomic(using=using):
+            return func()
+
+    attempts = attempts or settings.DB_WRITE_ATTEMPTS
+    backoff = settings.DB_WRITE_RETRY_BACKOFF if backoff is None else backoff
+
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic(using=using):
+                return func()
+        except OperationalError as e:
+            if not is_lock_error(e):
+                raise
+            if attempt == attempts:
+                raise DatabaseBusy(f"Database still locked after {attempts} attempt(s): {e}") from e
+            delay = backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            logger.warning(f"Database locked (attempt {attempt} of {attempts}), retrying in {delay * 1000:.0f} ms")
+            time.sleep(delay)
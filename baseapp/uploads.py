@@ -0,0 +1,106 @@
+# baseapp/uploads.py
+
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import ChunkedUpload
+
+# AssetRequest FileFields that can be filled from a finished chunked upload.
+ATTACHMENT_FIELDS = ('indent_file', 'annexure_x', 'annexure_y', 'gem_file')
+
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Raised when a chunk cannot be accepted; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def temp_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, upload.token.hex)
+
+
+def start_upload(user, filename, size):
+    """Registers a new upload and creates its (empty) temp file."""
+    if size < 0 or size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise UploadError(f"Files must be between 0 and {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes.", status=413)
+    upload = ChunkedUpload.objects.create(user=user, filename=os.path.basename(filename)[:255], size=size)
+    os.makedirs(settings.CHUNKED_UPLOAD_TEMP_DIR, exist_ok=True)
+    open(temp_path(upload), 'wb').close()
+    if size == 0:
+        ChunkedUpload.objects.filter(pk=upload.pk).update(completed_at=timezone.now())
+        upload.refresh_from_db()
+    return upload
+
+
+def append_chunk(upload, offset, stream, length):
+    """
+    Writes `length` bytes read from `stream` at `offset` and advances the upload.
+
+    Only the next expected offset is accepted, so a client that lost a response
+    can ask for the status and resume from `received` without corrupting the file.
+    The byte range is claimed with a conditional UPDATE before anything is
+    written, so a concurrent writer for the same offset is turned away before it
+    touches the file; a chunk that fails mid-write hands its range back for the
+    retry. The upload is only marked complete once the last bytes are on disk.
+    """
+    if upload.is_complete:
+        raise UploadError("Upload is already complete.", status=409)
+    if offset != upload.received:
+        raise UploadError(f"Expected offset {upload.received}.", status=409)
+    if length <= 0 or length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(f"Chunks must be between 1 and {settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE} bytes.", status=413)
+    if offset + length > upload.size:
+        raise UploadError("Chunk runs past the declared file size.", status=413)
+
+    received = offset + length
+    if not ChunkedUpload.objects.filter(pk=upload.pk, received=offset).update(received=received):
+        raise UploadError("Upload was modified concurrently; fetch its status and resume.", status=409)
+    try:
+        written = 0
+        with open(temp_path(upload), 'r+b') as destination:
+            destination.seek(offset)
+            while written < length:
+                block = stream.read(min(COPY_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                destination.write(block)
+                written += len(block)
+        if written != length:
+            raise UploadError("Chunk body was shorter than its Content-Length.")
+    except BaseException:
+        # Chunks claimed after this one may have landed meanwhile; they are resent from `offset` too.
+        ChunkedUpload.objects.filter(pk=upload.pk, received__gte=received).update(received=offset, completed_at=None)
+        raise
+
+    upload.received = received
+    if received == upload.size:
+        upload.completed_at = timezone.now()
+        ChunkedUpload.objects.filter(pk=upload.pk).update(completed_at=upload.completed_at)
+    return upload
+
+
+def attach_uploads(asset_request, uploads_by_field):
+    """Moves finished uploads into `asset_request`'s file fields (the caller saves the request)."""
+    for field_name, upload in uploads_by_field.items():
+        with open(temp_path(upload), 'rb') as source:
+            getattr(asset_request, field_name).save(upload.filename, File(source), save=False)
+
+
+def discard_uploads(uploads):
+    """Deletes uploads and their temp files."""
+    uploads = list(uploads)
+    if not uploads:
+        return
+    for upload in uploads:
+        try:
+            os.remove(temp_path(upload))
+        except FileNotFoundError:
+            pass
+    ChunkedUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
@@ -7,11 +7,22 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('', views.home, name='home'),
+    path('metrics/', views.metrics_view, name='metrics'),
     path('request/', views.request_submission, name='request_submission'),
+    path('request/uploads/', views.chunked_upload_start_view, name='chunked_upload_start'),
+    path('request/uploads/<uuid:token>/', views.chunked_upload_view, name='chunked_upload'),
     path('request/receipt/', views.request_receipt_view, name='request_receipt'),
+    path('request/<int:pk>/receipt.pdf', views.request_receipt_pdf_view, name='request_receipt_pdf'),
     path('request/report/', views.request_report_view, name='request_report'),
+    path('request/report/export/<str:export_format>/', views.request_report_export_view, name='request_report_export'),
     path('requests/review/', views.review_requests_view, name='review_requests'),
+    path('requests/review/batch/', views.review_requests_batch_view, name='review_requests_batch'),
     path('survey/', views.survey_form_view, name='survey_form'),
+    path('survey/import/', views.survey_import_view, name='survey_import'),
     path('survey/receipt/', views.survey_receipt_view, name='survey_receipt'),
+    path('survey/<int:pk>/receipt.pdf', views.survey_receipt_pdf_view, name='survey_receipt_pdf'),
     path('report/', views.consolidated_report_view, name='consolidated_report'),
+    path('report/export/<str:export_format>/', views.consolidated_report_export_view, name='consolidated_report_export'),
+    path('budget/', views.budget_dashboard_view, name='budget_dashboard'),
+    path('budget/api/', views.budget_rollup_api_view, name='budget_rollup_api'),
 ]
\ No newline at end of file
@@ -1,22 +1,39 @@
 # views.py (Updated with proper debugging and error handling)
 
+import asyncio
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import date
-from django.http import HttpResponse, JsonResponse
-from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
+from django.template import loader
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.views.decorators.http import require_POST
 from django.db import transaction, IntegrityError
 from django.db.models import Sum, Q
 from django.utils import timezone
 from django.contrib import messages
-from slugify import slugify
+import json
 import logging
+import os
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-from .forms import LoginForm, ReportFilterForm, AssetRequestForm, RequestReportFilterForm, SurveyInfoForm
-from .models import AssetRequest, Location, Department, Category, STATUS_CHOICES, SystemModel, SurveyEntry, SurveyInfo
+from . import budgets, receipts, refdata, review_queue, search
+from .exports import EXPORT_CHUNK_ROWS, EXPORT_FORMATS, export_response, iterate_in_thread, streaming_content
+from .instrumentation import registry as metrics_registry
+from .forms import LoginForm, ReportFilterForm, AssetRequestForm, BudgetRollupFilterForm, RequestReportFilterForm, SurveyImportForm, SurveyInfoForm
+from .pagination import InvalidCursor, KeysetPaginator
+from .reports import abuild_survey_pivot
+from .review import ReviewError, apply_review_action, parse_request_ids
+from .survey_import import SurveyImportError, parse_matrix, read_matrix
+from .surveys import prior_survey, save_survey_revision, survey_grid
+from .transactions import DatabaseBusy, atomic_with_retry
+from .uploads import UploadError, append_chunk, start_upload
+from .models import AssetRequest, MANPOWER_CHOICES, STATUS_CHOICES, SurveyEntry, SurveyInfo, SurveyAggregate, ChunkedUpload
 
 
 # --- Authentication Views ---
@@ -49,32 +66,60 @@ def is_approver(user):
     return user.groups.filter(name='Approvers').exists()
 
 
+async def ais_approver(user):
+    """Async version of is_approver()."""
+    return await user.groups.filter(name='Approvers').aexists()
+
+
+async def _auser(request):
+    """
+    Loads the user for an async view and puts it on request.user, so templates
+    (and the auth context processor) never trigger the lazy, sync-only lookup.
+    """
+    request.user = await request.auser()
+    return request.user
+
+
+def _wants_json(request):
+    """True for fetch()/XHR callers that asked for a JSON response instead of a redirect."""
+    return 'application/json' in request.headers.get('Accept', '') or request.content_type == 'application/json'
+
+
 # --- Main Application Views ---
 @login_required
-def home(request):
+async def home(request):
     """Renders the home page with role-based links."""
-    is_user_approver = is_approver(request.user)
+    is_user_approver = await ais_approver(await _auser(request))
     return render(request, 'home.html', {
         'is_user_approver': is_user_approver,
         'now': timezone.now()
     })
 
+
+def metrics_view(request):
+    """Per-view query counts and timings recorded by this process (staff only)."""
+    if not request.user.is_staff:
+        raise Http404
+    return JsonResponse({'pid': os.getpid(), 'views': metrics_registry.snapshot()})
+
+
 @login_required
 def request_submission(request):
     """Handles the submission of new asset requests."""
     if request.method == 'POST':
-        form = AssetRequestForm(request.POST, request.FILES)
+        form = AssetRequestForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
             asset_request = form.save()
             request.session['last_request_id'] = asset_request.id
+            transaction.on_commit(lambda: receipts.prerender_request_receipt(asset_request.id))
             return redirect('request_receipt')
         else:
             today = date.today()
             current_year = today.year
             financial_years = [f"{year}-{year+1}" for year in range(current_year-2, current_year + 6)]
-            locations = Location.objects.all()
-            departments = Department.objects.all()
-            asset_types = Category.objects.all()
+            locations = refdata.locations()
+            departments = refdata.departments()
+            asset_types = refdata.categories()
 
             context = {
                 'form': form,
@@ -83,17 +128,18 @@ def request_submission(request):
                 'asset_types': asset_types,
                 'financial_years': financial_years,
                 'today': today.strftime("%Y-%m-%d"),
+                'upload_chunk_size': settings.CHUNKED_UPLOAD_CHUNK_SIZE,
             }
             return render(request, 'request_form.html', context)
     else:
-        form = AssetRequestForm()
+        form = AssetRequestForm(user=request.user)
 
     today = date.today()
     current_year = today.year
     financial_years = [f"{year}-{year+1}" for year in range(current_year-2, current_year + 6)]
-    locations = Location.objects.all()
-    departments = Department.objects.all()
-    asset_types = Category.objects.all()
+    locations = refdata.locations()
+    departments = refdata.departments()
+    asset_types = refdata.categories()
 
     context = {
         'form': form,
@@ -102,122 +148,318 @@ def request_submission(request):
         'asset_types': asset_types,
         'financial_years': financial_years,
         'today': today.strftime("%Y-%m-%d"),
+        'upload_chunk_size': settings.CHUNKED_UPLOAD_CHUNK_SIZE,
     }
     return render(request, 'request_form.html', context)
 
 
 @login_required
-def request_receipt_view(request):
+async def request_receipt_view(request):
     """Displays the receipt for a submitted asset request."""
-    request_id = request.session.get('last_request_id')
+    await _auser(request)
+    request_id = await request.session.aget('last_request_id')
     asset_request = None
     if request_id:
         try:
-            asset_request = AssetRequest.objects.select_related(
+            asset_request = await AssetRequest.objects.select_related(
                 'location', 'department', 'asset_type'
-            ).get(id=request_id)
-            if 'last_request_id' in request.session:
-                del request.session['last_request_id']
+            ).aget(id=request_id)
+            await request.session.apop('last_request_id', None)
         except AssetRequest.DoesNotExist:
             asset_request = None
 
     return render(request, 'request_receipt.html', {'request_entry': asset_request})
 
 
+# --- Chunked Attachment Uploads ---
+def _upload_status(upload):
+    return {
+        'token': str(upload.token),
+        'filename': upload.filename,
+        'size': upload.size,
+        'received': upload.received,
+        'complete': upload.is_complete,
+    }
+
+
 @login_required
-def request_report_view(request):
-    """Displays a report of all asset requests, with filtering options."""
-    requests = AssetRequest.objects.select_related('location', 'department', 'asset_type').order_by('-date', 'location__name', 'department__name')
-    form = RequestReportFilterForm(request.GET or None)
+@require_POST
+def chunked_upload_start_view(request):
+    """Registers a new chunked upload. Expects JSON {"filename": ..., "size": ...}."""
+    try:
+        payload = json.loads(request.body or b'{}')
+        filename = str(payload['filename'])
+        size = int(payload['size'])
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'filename and size are required.'}, status=400)
+
+    try:
+        upload = start_upload(request.user, filename, size)
+    except UploadError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    return JsonResponse(_upload_status(upload), status=201)
+
 
+@login_required
+def chunked_upload_view(request, token):
+    """GET returns how much of the upload has arrived; POST appends the chunk at the Upload-Offset header."""
+    upload = get_object_or_404(ChunkedUpload, token=token, user=request.user)
+    if request.method == 'GET':
+        return JsonResponse(_upload_status(upload))
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed.'}, status=405)
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.headers.get('Content-Length', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Upload-Offset and Content-Length headers are required.'}, status=400)
+
+    try:
+        append_chunk(upload, offset, request, length)
+    except UploadError as e:
+        return JsonResponse({**_upload_status(upload), 'error': str(e)}, status=e.status)
+    return JsonResponse(_upload_status(upload))
+
+
+# Keyset ordering for the request report; 'id' makes it a total order so cursors are stable.
+REQUEST_REPORT_ORDERING = ('-date', 'location__name', 'department__name', 'id')
+REQUEST_REPORT_PAGE_SIZE = 100
+REQUEST_REPORT_STREAM_CHUNK_SIZE = 500
+REQUEST_REPORT_ROWS_MARKER = '<!-- request-report-rows -->'
+
+
+def _report_query(params, **updates):
+    """Returns the urlencoded query string of `params` with `updates` applied (None removes a key)."""
+    query = params.copy()
+    for key, value in updates.items():
+        query.pop(key, None)
+        if value is not None:
+            query[key] = value
+    return query.urlencode()
+
+
+def _stream_request_report(request, context, paginator):
+    """Streams the full report: page chrome first, then table rows chunk by chunk."""
+    page_html = loader.render_to_string('request_report.html', {
+        **context,
+        'streaming': True,
+        'rows_marker': REQUEST_REPORT_ROWS_MARKER,
+    }, request=request)
+    head, tail = page_html.split(REQUEST_REPORT_ROWS_MARKER, 1)
+    rows_template = loader.get_template('request_report_rows.html')
+
+    def generate():
+        yield head
+        for chunk in paginator.chunks(REQUEST_REPORT_STREAM_CHUNK_SIZE):
+            yield rows_template.render({'requests': chunk}, request)
+        yield tail
+
+    return StreamingHttpResponse(streaming_content(request, generate()), content_type='text/html; charset=utf-8')
+
+
+def _filter_request_report(request, requests):
+    """Applies the request report's financial-year and search filters; returns (form, queryset)."""
+    form = RequestReportFilterForm(request.GET or None)
     if form.is_valid():
         financial_year = form.cleaned_data.get('financial_year')
         if financial_year:
             requests = requests.filter(financial_year=financial_year)
+        if form.cleaned_data.get('q'):
+            requests = search.filter_requests(requests, form.cleaned_data['q'])
+    return form, requests
 
+
+@login_required
+async def request_report_view(request):
+    """Displays a keyset-paginated report of asset requests; `?all=1` streams every matching row."""
+    await _auser(request)
+    form, requests = _filter_request_report(
+        request, AssetRequest.objects.select_related('location', 'department', 'asset_type'),
+    )
+
+    paginator = KeysetPaginator(requests, REQUEST_REPORT_ORDERING, per_page=REQUEST_REPORT_PAGE_SIZE)
     context = {
         'form': form,
-        'requests': requests,
-        'STATUS_CHOICES': STATUS_CHOICES
+        'STATUS_CHOICES': STATUS_CHOICES,
+        'export_query': _report_query(request.GET, after=None, all=None),
     }
+
+    if request.GET.get('all'):
+        return _stream_request_report(request, context, paginator)
+
+    try:
+        page = await paginator.apage(request.GET.get('after'))
+    except InvalidCursor:
+        logger.warning("Invalid request report cursor, restarting from the first page")
+        page = await paginator.apage()
+
+    context.update({
+        'requests': page.object_list,
+        'page': page,
+        'first_page_query': _report_query(request.GET, after=None, all=None),
+        'next_page_query': _report_query(request.GET, after=page.next_cursor, all=None),
+        'all_rows_query': _report_query(request.GET, after=None, all='1'),
+    })
     return render(request, 'request_report.html', context)
 
 
+REQUEST_EXPORT_COLUMNS = (
+    ('ID', 'id'),
+    ('Date', 'date'),
+    ('Financial Year', 'financial_year'),
+    ('Location', 'location__name'),
+    ('Department', 'department__name'),
+    ('Asset Type', 'asset_type__name'),
+    ('Item Type', 'item_type'),
+    ('Description', 'description'),
+    ('Estimated Cost', 'estimated_cost'),
+    ('Status', 'status'),
+    ('Remarks', 'remarks'),
+)
+
+
+@login_required
+def request_report_export_view(request, export_format):
+    """Streams the (filtered) request report as CSV or XLSX without materialising the queryset."""
+    if export_format not in EXPORT_FORMATS:
+        raise Http404("Unknown export format")
+    _, requests = _filter_request_report(request, AssetRequest.objects.all())
+
+    statuses = dict(STATUS_CHOICES)
+    item_types = dict(AssetRequest.ITEM_TYPE_CHOICES)
+    status_index = [field for _, field in REQUEST_EXPORT_COLUMNS].index('status')
+    item_type_index = [field for _, field in REQUEST_EXPORT_COLUMNS].index('item_type')
+
+    def rows():
+        queryset = requests.order_by(*REQUEST_REPORT_ORDERING).values_list(
+            *(field for _, field in REQUEST_EXPORT_COLUMNS)
+        )
+        for row in queryset.iterator(chunk_size=EXPORT_CHUNK_ROWS):
+            row = list(row)
+            row[status_index] = statuses.get(row[status_index], row[status_index])
+            row[item_type_index] = item_types.get(row[item_type_index], row[item_type_index])
+            yield row
+
+    logger.info(f"User {request.user.username} exported the request report as {export_format}")
+    return export_response(export_format, 'asset_requests', [label for label, _ in REQUEST_EXPORT_COLUMNS], rows(), request)
+
+
 @login_required
 @user_passes_test(is_approver, login_url='/login/')
 def review_requests_view(request):
-    """Allows approvers to review and change the status of pending requests."""
+    """
+    Shows an approver the pending requests they have claimed from the review
+    queue (baseapp/review_queue.py) and applies their decisions. POST
+    action=claim takes the next earliest-due batch, action=release hands the
+    claims back.
+    """
     if request.method == 'POST':
-        request_id = request.POST.get('request_id')
         action = request.POST.get('action')
-        remarks = request.POST.get('remarks_field', '').strip()
-
-        asset_request = get_object_or_404(AssetRequest, id=request_id)
+        if action in ('claim', 'release'):
+            if action == 'claim':
+                try:
+                    held = atomic_with_retry(lambda: review_queue.claim_next(request.user))
+                except DatabaseBusy as e:
+                    logger.error(f"Claiming review requests gave up on a locked database: {e}")
+                    if _wants_json(request):
+                        return JsonResponse({'error': "The database is busy right now. Please try again."}, status=503)
+                    messages.error(request, "The database is busy right now. Please try again.")
+                    return redirect('review_requests')
+            else:
+                held = 0
+                released = review_queue.release(request.user)
+                logger.info(f"{request.user.username} released {released} claimed request(s)")
+            if _wants_json(request):
+                return JsonResponse({'claimed': held})
+            return redirect('review_requests')
 
-        if action == 'approve':
-            asset_request.status = 'approved'
-        elif action == 'reject':
-            asset_request.status = 'rejected'
-        elif action == 'mark_duplicate':
-            asset_request.status = 'duplicate'
-        else:
-            pass
+        remarks = request.POST.get('remarks_field', '').strip()
 
-        asset_request.remarks = remarks if remarks else None
-        asset_request.save()
+        try:
+            request_ids = parse_request_ids([request.POST.get('request_id')])
+            new_status, updated = apply_review_action(request_ids, action, remarks, changed_by=request.user)
+        except ReviewError as e:
+            if _wants_json(request):
+                return JsonResponse({'error': str(e)}, status=400)
+            raise Http404(str(e))
+
+        if _wants_json(request):
+            return JsonResponse({'status': new_status, 'request_ids': request_ids, 'updated': updated})
+        if not updated:
+            messages.warning(request, "That request is not one of your claimed requests; claim it from the queue first.")
         return redirect('review_requests')
 
-    pending_requests = AssetRequest.objects.filter(status='pending').select_related('location', 'department', 'asset_type').order_by('-date')
+    now = timezone.now()
     context = {
-        'pending_requests': pending_requests,
+        'pending_requests': review_queue.claimed(request.user, now),
+        'queue': review_queue.queue_summary(request.user, now),
+        'claim_batch': settings.REVIEW_CLAIM_BATCH,
+        'now': now,
         'STATUS_CHOICES': STATUS_CHOICES
     }
     return render(request, 'review_requests.html', context)
 
 
 @login_required
-def survey_form_view(request):
-    """Handles the survey form submission and display with improved error handling."""
-    # Initialize variables
-    form = SurveyInfoForm(request.GET or None)
-    departments_in_location = Department.objects.none()
-    unique_model_names = []
-    table_data = []
-    model_totals = {}
-    
-    location_obj = None
-    category_obj = None
-    survey_date = date.today()
-    selected_financial_year = None
-    
-    # Handle GET request for form display and dynamic table generation
-    if request.method == 'GET' and form.is_valid():
-        location_obj = form.cleaned_data.get('location')
-        category_obj = form.cleaned_data.get('category')
-        survey_date = form.cleaned_data.get('date')
-        selected_financial_year = form.cleaned_data.get('financial_year')
+@user_passes_test(is_approver, login_url='/login/')
+@require_POST
+def review_requests_batch_view(request):
+    """Applies one review action to many pending requests with a single UPDATE.
+
+    Accepts a form POST (`request_ids` repeated, `action`, `remarks_field`) or a
+    JSON body ({"request_ids": [...], "action": ..., "remarks": ...}).
+    """
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON body.'}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({'error': 'The JSON body must be an object.'}, status=400)
+        raw_ids = payload.get('request_ids', [])
+        action = payload.get('action')
+        remarks = (payload.get('remarks') or '').strip()
+    else:
+        raw_ids = request.POST.getlist('request_ids')
+        action = request.POST.get('action')
+        remarks = request.POST.get('remarks_field', '').strip()
 
-        if location_obj:
-            departments_in_location = Department.objects.filter(location=location_obj).order_by('name')
+    try:
+        request_ids = parse_request_ids(raw_ids)
+        new_status, updated = apply_review_action(request_ids, action, remarks, changed_by=request.user)
+    except ReviewError as e:
+        if _wants_json(request):
+            return JsonResponse({'error': str(e)}, status=400)
+        messages.error(request, str(e))
+        return redirect('review_requests')
 
-        if location_obj and category_obj:
-            all_relevant_models = SystemModel.objects.filter(
-                location=location_obj,
-                category=category_obj
-            ).order_by('name')
+    logger.info(f"{request.user.username} set {updated} of {len(request_ids)} request(s) to {new_status}")
+    if _wants_json(request):
+        return JsonResponse({'status': new_status, 'request_ids': request_ids, 'updated': updated})
+    messages.success(request, f"{updated} request(s) marked as {new_status}.")
+    return redirect('review_requests')
 
-            unique_model_names = list(all_relevant_models.values_list('name', flat=True).distinct().order_by('name'))
 
-            for dept in departments_in_location:
-                row_cells = []
-                for model_name in unique_model_names:
-                    row_cells.append({
-                        'type': 'input',
-                        'model_name': model_name,
-                        'dept_id': dept.id,
-                        'initial_value': ''
-                    })
-                table_data.append({'dept': dept, 'cells': row_cells})
+@login_required
+def survey_form_view(request):
+    """Handles the survey form submission and display with improved error handling."""
+    form = SurveyInfoForm(request.GET or None)
+
+    def render_form(location, category, survey_date, financial_year, values=None, prior=None):
+        # The grid is cached per location/category; only the cell values are filled in here.
+        grid = survey_grid(location.id, category.id) if location and category else None
+        if grid and prior and values is None:
+            values = prior.grid_values(refdata.system_models(location.id, category.id))
+        return render(request, 'survey_form.html', {
+            'form': form,
+            'survey_grid': grid.render(values) if grid else None,
+            'prior_survey': prior,
+            'location_obj': location,
+            'category_obj': category,
+            'survey_date': survey_date,
+            'selected_financial_year': financial_year,
+        })
 
     # Handle POST request for survey submission
     if request.method == 'POST':
@@ -229,16 +471,7 @@ def survey_form_view(request):
         if not form.is_valid():
             logger.error(f"Form validation failed: {form.errors}")
             messages.error(request, f"Form validation failed: {form.errors}")
-            return render(request, 'survey_form.html', {
-                'form': form,
-                'departments_in_location': departments_in_location,
-                'unique_model_names': unique_model_names,
-                'table_data': table_data,
-                'location_obj': location_obj,
-                'category_obj': category_obj,
-                'survey_date': survey_date,
-                'selected_financial_year': selected_financial_year,
-            })
+            return render_form(None, None, date.today(), None)
         
         # Validate count inputs
         count_inputs_valid = True
@@ -250,120 +483,103 @@ def survey_form_view(request):
         
         if not loc or not cat:
             messages.error(request, "Location and Category are required.")
-            return render(request, 'survey_form.html', {
-                'form': form,
-                'departments_in_location': departments_in_location,
-                'unique_model_names': unique_model_names,
-                'table_data': table_data,
-                'location_obj': location_obj,
-                'category_obj': category_obj,
-                'survey_date': survey_date,
-                'selected_financial_year': selected_financial_year,
-            })
+            return render_form(None, None, date.today(), None)
         
+        survey_date = form.cleaned_data.get('date', date.today())
+        selected_financial_year = form.cleaned_data.get('financial_year')
+        # The survey the grid was prefilled from, to report what changed since
+        prefilled_from = request.POST.get('prefilled_from', '')
+        prior = prior_survey(loc.id, cat.id, survey_info_id=int(prefilled_from)) if prefilled_from.isdigit() else None
+
         # Get departments and models for this location/category
-        departments_in_location_post = Department.objects.filter(location=loc).order_by('name')
-        all_relevant_models_for_post = SystemModel.objects.filter(
-            location=loc,
-            category=cat
-        ).order_by('name')
-        unique_model_names_for_post = list(all_relevant_models_for_post.values_list('name', flat=True).distinct().order_by('name'))
+        departments_by_id = {str(dept.id): dept for dept in refdata.departments_for_location(loc.id)}
+        model_index = refdata.system_models(loc.id, cat.id)
         
-        # Validate all count inputs
-        for dept in departments_in_location_post:
-            for model_name in unique_model_names_for_post:
-                slugified_model_name = slugify(model_name)
-                input_name = f'count__{dept.id}__{slugified_model_name}'
-                headcount_str = request.POST.get(input_name, '0').strip()
-                
-                logger.info(f"Processing input {input_name}: '{headcount_str}'")
-                
-                if headcount_str and not headcount_str.isdigit():
+        # Validate all submitted count inputs (count__<dept id>__<model slug>), one lookup each
+        refreshed = False
+        for input_name, headcount_str in request.POST.items():
+            if not input_name.startswith('count__'):
+                continue
+            dept_id, _, model_slug = input_name[len('count__'):].partition('__')
+            dept = departments_by_id.get(dept_id)
+            model = model_index.by_slug.get(model_slug)
+            headcount_str = headcount_str.strip()
+            if (dept is None or model is None) and not refreshed:
+                # The grid may list a department or model this process has not cached yet; reload once
+                refdata.invalidate()
+                refreshed = True
+                departments_by_id = {str(dept.id): dept for dept in refdata.departments_for_location(loc.id)}
+                model_index = refdata.system_models(loc.id, cat.id)
+                dept = departments_by_id.get(dept_id)
+                model = model_index.by_slug.get(model_slug)
+            if dept is None or model is None:
+                logger.warning(f"Survey input {input_name} is not in the grid for {loc.name} / {cat.name}")
+                if headcount_str:
                     count_inputs_valid = False
-                    messages.error(request, f"Invalid count for {model_name} in {dept.name}: '{headcount_str}' is not a valid number")
-                    continue
-                
-                if headcount_str.isdigit():
-                    headcount_value = int(headcount_str)
-                    if headcount_value > 0:
-                        count_data[input_name] = {
-                            'dept': dept,
-                            'model_name': model_name,
-                            'headcount': headcount_value
-                        }
+                    messages.error(request, f"A count was entered for a department or model that is no longer in the {loc.name} / {cat.name} survey. Please reload the form and try again.")
+                continue
+            model_name = model[1]
+            
+            if headcount_str and not headcount_str.isdigit():
+                count_inputs_valid = False
+                messages.error(request, f"Invalid count for {model_name} in {dept.name}: '{headcount_str}' is not a valid number")
+                continue
+            
+            if headcount_str.isdigit():
+                headcount_value = int(headcount_str)
+                if headcount_value > 0:
+                    count_data[input_name] = {
+                        'dept': dept,
+                        'model_name': model_name,
+                        'headcount': headcount_value
+                    }
         
         if not count_inputs_valid:
             logger.error("Count input validation failed")
-            return render(request, 'survey_form.html', {
-                'form': form,
-                'departments_in_location': departments_in_location_post,
-                'unique_model_names': unique_model_names_for_post,
-                'table_data': table_data,
-                'location_obj': loc,
-                'category_obj': cat,
-                'survey_date': form.cleaned_data.get('date', date.today()),
-                'selected_financial_year': form.cleaned_data.get('financial_year'),
-            })
+            return render_form(loc, cat, survey_date, selected_financial_year, request.POST, prior)
         
         # Check if we have any data to save
         if not count_data:
             messages.warning(request, "No survey data entered. Please enter at least one count value.")
-            return render(request, 'survey_form.html', {
-                'form': form,
-                'departments_in_location': departments_in_location_post,
-                'unique_model_names': unique_model_names_for_post,
-                'table_data': table_data,
-                'location_obj': loc,
-                'category_obj': cat,
-                'survey_date': form.cleaned_data.get('date', date.today()),
-                'selected_financial_year': form.cleaned_data.get('financial_year'),
-            })
+            return render_form(loc, cat, survey_date, selected_financial_year, request.POST, prior)
         
-        # Save the data using transaction
+        def save_survey():
+            # Creates the survey, or updates it in place if it was submitted before
+            survey_info_instance, revision = save_survey_revision(
+                loc, cat, selected_financial_year, survey_date,
+                ((data['dept'], data['model_name'], data['headcount']) for data in count_data.values()),
+                submitted_by=request.user,
+            )
+            logger.info(f"Saved SurveyInfo with ID: {survey_info_instance.id} (revision {revision.number})")
+            transaction.on_commit(lambda: receipts.prerender_survey_receipt(survey_info_instance.id))
+            return survey_info_instance, revision
+
+        # Save the data in one transaction, retried if another writer holds the database lock
         try:
-            with transaction.atomic():
-                logger.info("Starting atomic transaction for survey save")
-                
-                # Save the SurveyInfo object
-                survey_info_instance = form.save()
-                logger.info(f"Saved SurveyInfo with ID: {survey_info_instance.id}")
-                
-                entries_created = 0
-                
-                # Create SurveyEntry objects
-                for input_name, data in count_data.items():
-                    dept = data['dept']
-                    model_name = data['model_name']
-                    headcount = data['headcount']
-                    
-                    # Get or create the SystemModel
-                    system_model_instance, created = SystemModel.objects.get_or_create(
-                        name=model_name,
-                        location=loc,
-                        category=cat
-                    )
-                    
-                    if created:
-                        logger.info(f"Created new SystemModel: {system_model_instance}")
-                    
-                    # Create the SurveyEntry
-                    survey_entry = SurveyEntry.objects.create(
-                        survey_info=survey_info_instance,
-                        location=loc,
-                        department=dept,
-                        system_model=system_model_instance,
-                        headcount=headcount
-                    )
-                    entries_created += 1
-                    logger.info(f"Created SurveyEntry: {survey_entry}")
-                
-                logger.info(f"Successfully created {entries_created} survey entries")
-                messages.success(request, f"Survey saved successfully! Created {entries_created} entries.")
-                
-                # Store the survey info ID in session for receipt
-                request.session['survey_info_id'] = survey_info_instance.id
-                return redirect('survey_receipt')
-                
+            logger.info("Starting atomic transaction for survey save")
+            survey_info_instance, revision = atomic_with_retry(save_survey)
+
+            if revision.number == 1:
+                logger.info(f"Successfully created {revision.entry_count} survey entries")
+                message = f"Survey saved successfully! Created {revision.entry_count} entries."
+            else:
+                logger.info(f"Survey {survey_info_instance.id} revision {revision.number} changed {len(revision.changes)} count(s)")
+                message = f"Survey updated (revision {revision.number}): {len(revision.changes)} count(s) changed."
+            if prior and prior.survey_info_id != survey_info_instance.id:
+                changes = prior.changes({
+                    (data['dept'].id, data['model_name']): data['headcount'] for data in count_data.values()
+                })
+                message += f" {len(changes)} count(s) differ from the survey of {prior.date:%Y-%m-%d}."
+            messages.success(request, message)
+
+            # Store the survey info ID in session for receipt
+            request.session['survey_info_id'] = survey_info_instance.id
+            return redirect('survey_receipt')
+
+        except DatabaseBusy as e:
+            logger.error(f"Survey save gave up on a locked database: {e}")
+            messages.error(request, "The database is busy right now. Please submit the survey again.")
+
         except IntegrityError as e:
             logger.error(f"Database integrity error during survey save: {e}")
             messages.error(request, f"Database error: {str(e)}. This might be due to duplicate entries.")
@@ -372,43 +588,89 @@ def survey_form_view(request):
             logger.error(f"Unexpected error during survey save: {e}")
             messages.error(request, f"An unexpected error occurred: {str(e)}")
     
-    # Render the form
-    context = {
+        # The save failed: show the grid again with what was entered
+        return render_form(loc, cat, survey_date, selected_financial_year, request.POST, prior)
+
+    if form.is_valid():
+        location, category = form.cleaned_data.get('location'), form.cleaned_data.get('category')
+        survey_date = form.cleaned_data.get('date')
+        prior = None
+        if form.cleaned_data.get('prefill') and location and category:
+            prior = prior_survey(location.id, category.id, before=survey_date)
+        return render_form(location, category, survey_date, form.cleaned_data.get('financial_year'), prior=prior)
+    return render_form(None, None, date.today(), None)
+
+
+# Import problems listed on the page; the rest are summarised as a count.
+SURVEY_IMPORT_MAX_ERRORS = 50
+
+
+@login_required
+def survey_import_view(request):
+    """Creates a survey from an uploaded CSV/XLSX department x model headcount matrix."""
+    form = SurveyImportForm(request.POST or None, request.FILES or None)
+    import_errors = []
+
+    if request.method == 'POST' and form.is_valid():
+        location = form.cleaned_data['location']
+        category = form.cleaned_data['category']
+        uploaded = form.cleaned_data['file']
+        try:
+            cells = parse_matrix(
+                read_matrix(uploaded, uploaded.name), location, category,
+                create_models=form.cleaned_data['create_models'],
+            )
+        except SurveyImportError as e:
+            logger.warning(f"Survey import of {uploaded.name} by {request.user.username} rejected with {len(e.errors)} error(s)")
+            import_errors = e.errors
+        else:
+            with transaction.atomic():
+                survey_info_instance, revision = save_survey_revision(
+                    location, category, form.cleaned_data['financial_year'], form.cleaned_data['date'], cells,
+                    submitted_by=request.user,
+                )
+                transaction.on_commit(lambda: receipts.prerender_survey_receipt(survey_info_instance.id))
+
+            logger.info(
+                f"{request.user.username} imported survey {survey_info_instance.id} revision {revision.number} "
+                f"from {uploaded.name} ({revision.entry_count} entries)"
+            )
+            if revision.number == 1:
+                messages.success(request, f"Survey imported successfully! Created {revision.entry_count} entries.")
+            else:
+                messages.success(request, f"Survey updated from the import (revision {revision.number}): {len(revision.changes)} count(s) changed.")
+            request.session['survey_info_id'] = survey_info_instance.id
+            return redirect('survey_receipt')
+
+    return render(request, 'survey_import.html', {
         'form': form,
-        'departments_in_location': departments_in_location,
-        'unique_model_names': unique_model_names,
-        'table_data': table_data,
-        'location_obj': location_obj,
-        'category_obj': category_obj,
-        'survey_date': survey_date,
-        'selected_financial_year': selected_financial_year,
-    }
-    
-    return render(request, 'survey_form.html', context)
+        'import_errors': import_errors[:SURVEY_IMPORT_MAX_ERRORS],
+        'hidden_error_count': max(len(import_errors) - SURVEY_IMPORT_MAX_ERRORS, 0),
+    })
 
 
 @login_required
-def survey_receipt_view(request):
+async def survey_receipt_view(request):
     """Displays the receipt for a submitted survey."""
-    survey_info_id = request.session.get('survey_info_id')
+    await _auser(request)
+    survey_info_id = await request.session.aget('survey_info_id')
     survey_info = None
     survey_entries = []
     
     if survey_info_id:
         try:
-            survey_info = SurveyInfo.objects.select_related(
+            survey_info = await SurveyInfo.objects.select_related(
                 'location', 'category'
-            ).get(id=survey_info_id)
+            ).aget(id=survey_info_id)
             
-            survey_entries = SurveyEntry.objects.filter(
+            survey_entries = [entry async for entry in SurveyEntry.objects.filter(
                 survey_info=survey_info
             ).select_related('department', 'system_model').order_by(
                 'department__name', 'system_model__name'
-            )
+            )]
             
             # Clear the session
-            if 'survey_info_id' in request.session:
-                del request.session['survey_info_id']
+            await request.session.apop('survey_info_id', None)
                 
         except SurveyInfo.DoesNotExist:
             survey_info = None
@@ -420,34 +682,174 @@ def survey_receipt_view(request):
     })
 
 
+# --- PDF Receipts ---
+async def _receipt_response(request, receipt):
+    """Serves a cached receipt, or waits briefly for a background render and answers 202 if it is still running."""
+    if not receipt.is_cached():
+        future = receipt.render()
+        try:
+            # shield(): timing out must not cancel a render other downloads may be waiting on.
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), settings.RECEIPT_RENDER_WAIT)
+        except (asyncio.TimeoutError, FutureTimeoutError):
+            response = HttpResponse("Your receipt is being generated. Please try again in a few seconds.", status=202)
+            response['Retry-After'] = '5'
+            return response
+        except Exception as e:
+            logger.error(f"Receipt rendering failed: {e}")
+            return HttpResponse("The receipt could not be generated.", status=500)
+    response = FileResponse(open(receipt.path, 'rb'), as_attachment=True, filename=receipt.filename,
+                            content_type='application/pdf')
+    if isinstance(request, ASGIRequest):
+        # Under WSGI keep the file itself as the content, so the server can use sendfile.
+        response.streaming_content = iterate_in_thread(iter(response.streaming_content))
+    return response
+
+
 @login_required
-def consolidated_report_view(request):
-    """Displays consolidated report of all surveys."""
+async def request_receipt_pdf_view(request, pk):
+    """Downloads the PDF receipt of an asset request."""
+    asset_request = await aget_object_or_404(AssetRequest.objects.select_related('location', 'department', 'asset_type'), pk=pk)
+    return await _receipt_response(request, receipts.request_receipt(asset_request))
+
+
+@login_required
+async def survey_receipt_pdf_view(request, pk):
+    """Downloads the PDF receipt of a survey."""
+    survey_info = await aget_object_or_404(SurveyInfo.objects.select_related('location', 'category'), pk=pk)
+    return await _receipt_response(request, await receipts.asurvey_receipt(survey_info))
+
+
+def _filter_consolidated_report(request):
+    """Applies the consolidated report's financial-year filter; returns (form, aggregates)."""
     form = ReportFilterForm(request.GET or None)
-    survey_entries = SurveyEntry.objects.select_related(
-        'survey_info', 'location', 'department', 'system_model'
-    ).order_by('-survey_info__date', 'location__name', 'department__name')
-    
+    survey_aggregates = SurveyAggregate.objects.all()
     if form.is_valid():
         financial_year = form.cleaned_data.get('financial_year')
         if financial_year:
-            survey_entries = survey_entries.filter(survey_info__financial_year=financial_year)
-    
-    # Group entries by survey
-    surveys = {}
-    for entry in survey_entries:
-        survey_id = entry.survey_info.id
-        if survey_id not in surveys:
-            surveys[survey_id] = {
-                'info': entry.survey_info,
-                'entries': []
-            }
-        surveys[survey_id]['entries'].append(entry)
-    
-    context = {
-        'form': form,
-        'surveys': surveys.values(),
-        'total_entries': survey_entries.count()
-    }
-    
+            survey_aggregates = survey_aggregates.filter(financial_year=financial_year)
+    return form, survey_aggregates
+
+
+@login_required
+async def consolidated_report_view(request):
+    """Displays the consolidated department x model headcount report."""
+    await _auser(request)
+    form, survey_aggregates = _filter_consolidated_report(request)
+
+    context = {'form': form, 'export_query': request.GET.urlencode()}
+    context.update((await abuild_survey_pivot(survey_aggregates, count_field='entry_count')).as_context())
+
     return render(request, 'consolidated_report.html', context)
+
+
+SURVEY_EXPORT_COLUMNS = (
+    ('Financial Year', 'financial_year'),
+    ('Location', 'location__name'),
+    ('Department', 'department__name'),
+    ('System Model', 'system_model__name'),
+    ('Manpower Type', 'manpower_type'),
+    ('Headcount', 'headcount'),
+    ('Entries', 'entry_count'),
+)
+
+
+@login_required
+def consolidated_report_export_view(request, export_format):
+    """Streams the consolidated report as one row per department/model group (CSV or XLSX)."""
+    if export_format not in EXPORT_FORMATS:
+        raise Http404("Unknown export format")
+    _, survey_aggregates = _filter_consolidated_report(request)
+
+    manpower_types = dict(MANPOWER_CHOICES)
+    manpower_index = [field for _, field in SURVEY_EXPORT_COLUMNS].index('manpower_type')
+
+    def rows():
+        queryset = survey_aggregates.filter(entry_count__gt=0).order_by(
+            'financial_year', 'location__name', 'department__name', 'system_model__name', 'manpower_type',
+        ).values_list(*(field for _, field in SURVEY_EXPORT_COLUMNS))
+        for row in queryset.iterator(chunk_size=EXPORT_CHUNK_ROWS):
+            row = list(row)
+            row[manpower_index] = manpower_types.get(row[manpower_index], row[manpower_index])
+            yield row
+
+    logger.info(f"User {request.user.username} exported the consolidated report as {export_format}")
+    return export_response(export_format, 'consolidated_report', [label for label, _ in SURVEY_EXPORT_COLUMNS], rows(), request)
+
+
+# --- Budget Rollup ---
+BUDGET_LEVEL_LABELS = {
+    'financial_year': 'Financial Year',
+    'location': 'Location',
+    'department': 'Department',
+    'asset_type': 'Asset Type',
+    'item_type': 'Item Type',
+    'status': 'Status',
+}
+
+
+def _budget_summary(request):
+    """Validates the rollup filters in the query string; returns (form, filters, group_by, rows, totals)."""
+    form = BudgetRollupFilterForm(request.GET)
+    if not form.is_valid():
+        return form, None, None, None, None
+    filters = form.filters()
+    group_by = form.cleaned_data.get('group_by') or budgets.next_level(filters) or 'item_type'
+    rows, totals = budgets.summarize(filters, group_by)
+    return form, filters, group_by, rows, totals
+
+
+@login_required
+def budget_rollup_api_view(request):
+    """
+    JSON totals of estimated_cost by one dimension (`group_by`) within the given
+    filters, read from the BudgetRollup table. Without `group_by` the next
+    drill-down level (year, location, department, asset type) is used.
+    """
+    form, filters, group_by, rows, totals = _budget_summary(request)
+    if filters is None:
+        return JsonResponse({'errors': form.errors}, status=400)
+    return JsonResponse({
+        'filters': filters,
+        'group_by': group_by,
+        'next_level': budgets.next_level(dict(filters, **{group_by: None})),
+        'totals': totals,
+        'rows': rows,
+    })
+
+
+@login_required
+def budget_dashboard_view(request):
+    """Drill-down table of estimated_cost totals by year, location, department and asset type."""
+    form, filters, group_by, rows, totals = _budget_summary(request)
+    if filters is None:
+        raise Http404("Invalid budget filters")
+
+    drillable = group_by in budgets.DRILL_DOWN_LEVELS
+    for row in rows:
+        row['status_costs'] = [row['by_status'][status] for status, _ in STATUS_CHOICES]
+        row['item_type_costs'] = [row['by_item_type'][item_type] for item_type, _ in AssetRequest.ITEM_TYPE_CHOICES]
+        if drillable and budgets.next_level(dict(filters, **{group_by: row['key']})):
+            row['drill_query'] = _report_query(request.GET, group_by=None, **{group_by: row['key']})
+    totals['status_costs'] = [totals['by_status'][status] for status, _ in STATUS_CHOICES]
+    totals['item_type_costs'] = [totals['by_item_type'][item_type] for item_type, _ in AssetRequest.ITEM_TYPE_CHOICES]
+
+    # Breadcrumbs: each pinned level links back to itself with the deeper levels removed.
+    levels = budgets.DRILL_DOWN_LEVELS
+    breadcrumbs = [{'label': 'All', 'query': _report_query(request.GET, group_by=None, **dict.fromkeys(levels))}]
+    for index, level in enumerate(levels):
+        if level in filters:
+            breadcrumbs.append({
+                'label': f"{BUDGET_LEVEL_LABELS[level]}: {budgets.label(level, filters[level])}",
+                'query': _report_query(request.GET, group_by=None, **dict.fromkeys(levels[index + 1:])),
+            })
+
+    return render(request, 'budget_dashboard.html', {
+        'form': form,
+        'group_by_label': BUDGET_LEVEL_LABELS[group_by],
+        'rows': rows,
+        'totals': totals,
+        'breadcrumbs': breadcrumbs,
+        'STATUS_CHOICES': STATUS_CHOICES,
+        'ITEM_TYPE_CHOICES': AssetRequest.ITEM_TYPE_CHOICES,
+        'api_query': request.GET.urlencode(),
+    })